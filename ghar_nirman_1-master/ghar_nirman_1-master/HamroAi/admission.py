@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Admission control for the document-extraction endpoints
+Each request is accepted, degraded (extracted from the text layer only, no OCR) or shed
+with 429/503 and a Retry-After hint, judged from extraction requests in flight, jobs
+waiting in the scheduler queues and a running (EWMA) average of recent latency
+"""
+
+import math
+import threading
+from typing import NamedTuple, Optional
+
+LATENCY_ALPHA = 0.2
+
+
+class Admission(NamedTuple):
+    action: str                 # 'accept', 'degrade' or 'reject'
+    status_code: Optional[int]  # 429 (too many in flight) or 503 (queues/latency) when rejected
+    retry_after: Optional[int]  # seconds, when rejected
+    reason: Optional[str]
+    pressure: float             # highest load ratio; 1.0 is the limit
+
+    @property
+    def allow_ocr(self):
+        return self.action == 'accept'
+
+
+class AdmissionController:
+    """
+    Load is the largest of in_flight / max_in_flight, queue_depth / max_queue and
+    latency_ewma / latency_target_ms. At degrade_at and above requests run without OCR;
+    at 1.0 they are rejected before any work is done.
+    """
+
+    def __init__(self, max_in_flight=8, max_queue=16, latency_target_ms=30000, degrade_at=0.75, alpha=LATENCY_ALPHA):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.latency_target_ms = latency_target_ms
+        self.degrade_at = degrade_at
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.latency_ewma_ms = None
+        self.admitted = 0
+        self.degraded = 0
+        self.shed = {429: 0, 503: 0}
+
+    def _load(self, queue_depth):
+        load = {
+            'in_flight': self.in_flight / self.max_in_flight if self.max_in_flight else 0.0,
+            'queue': queue_depth / self.max_queue if self.max_queue else 0.0,
+            'latency': 0.0,
+        }
+        # Old latency only says something while work is still running; an idle service admits again
+        if self.in_flight and self.latency_ewma_ms is not None and self.latency_target_ms:
+            load['latency'] = self.latency_ewma_ms / self.latency_target_ms
+        return load
+
+    def _retry_after(self, queue_depth):
+        """Seconds until the backlog should have drained, at the recent latency"""
+        latency_ms = self.latency_ewma_ms if self.latency_ewma_ms is not None else self.latency_target_ms
+        backlog = (self.in_flight + queue_depth) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(latency_ms * backlog / 1000))
+
+    def admit(self, queue_depth=0):
+        """Decide on one request; every accepted or degraded request must be released"""
+        with self._lock:
+            load = self._load(queue_depth)
+            reason = max(load, key=load.get)
+            pressure = load[reason]
+            if pressure >= 1.0:
+                status_code = 429 if reason == 'in_flight' else 503
+                self.shed[status_code] += 1
+                return Admission('reject', status_code, self._retry_after(queue_depth), reason, round(pressure, 3))
+
+            self.in_flight += 1
+            self.admitted += 1
+            if pressure >= self.degrade_at:
+                self.degraded += 1
+                return Admission('degrade', None, None, reason, round(pressure, 3))
+            return Admission('accept', None, None, None, round(pressure, 3))
+
+    def release(self, latency_ms=None):
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            if latency_ms is not None:
+                if self.latency_ewma_ms is None:
+                    self.latency_ewma_ms = latency_ms
+                else:
+                    self.latency_ewma_ms = (1 - self.alpha) * self.latency_ewma_ms + self.alpha * latency_ms
+
+    def stats(self, queue_depth=0):
+        with self._lock:
+            return {
+                'in_flight': self.in_flight,
+                'queue_depth': queue_depth,
+                'latency_ewma_ms': round(self.latency_ewma_ms, 1) if self.latency_ewma_ms is not None else None,
+                'load': {name: round(value, 3) for name, value in self._load(queue_depth).items()},
+                'admitted': self.admitted,
+                'degraded': self.degraded,
+                'shed_429': self.shed[429],
+                'shed_503': self.shed[503],
+                'limits': {
+                    'max_in_flight': self.max_in_flight,
+                    'max_queue': self.max_queue,
+                    'latency_target_ms': self.latency_target_ms,
+                    'degrade_at': self.degrade_at,
+                },
+            }
@@ -1,23 +1,101 @@
+import gc
+import hashlib
+import json
 import os
-import shutil
+import time
 import traceback
-import uuid
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import joblib
+from starlette.formparsers import MultiPartParser
 import numpy as np
 import uvicorn
 
-from HamroAi.tender_predictor import TenderPredictor  # Your PDF feature extractor
+from HamroAi.admission import AdmissionController
+from HamroAi.extraction_scheduler import ExtractionScheduler
+from HamroAi.micro_batcher import MicroBatcher
+from HamroAi.model_store import ModelRegistry
+from HamroAi.near_duplicates import NearDuplicateIndex, fill_from_prior
+from HamroAi.single_flight import SingleFlight
+from HamroAi.tender_predictor import IN_MEMORY_PDF_MAX_BYTES
+from HamroAi.upload_store import ContentAddressedStore, StoredFile
 
-# Load the saved model, scaler, and kmeans
-model = joblib.load("HamroAi/xgboost_model.pkl")
-scaler = joblib.load("HamroAi/scaler.pkl")
-kmeans = joblib.load("HamroAi/kmeans.pkl")
+# Saved model, scaler, and kmeans
+ARTIFACT_DIR = os.getenv("AI_ARTIFACT_DIR", "HamroAi")
+# Memory-map the artifact arrays read-only so worker processes share one copy in the page cache
+MMAP_ARTIFACTS = os.getenv("AI_MMAP_ARTIFACTS", "1") == "1"
+# Load at import time so a pre-forking server (gunicorn --preload -k uvicorn.workers.UvicornWorker)
+# shares the loaded models copy-on-write; with 0 each worker loads on its first request
+PRELOAD_MODELS = os.getenv("AI_PRELOAD_MODELS", "1") == "1"
+# Seconds between checks of the artifact files for a new model version (0 disables hot reload)
+MODEL_POLL_SECONDS = float(os.getenv("AI_MODEL_POLL_SECONDS", "5"))
 
-app = FastAPI(title="Tender AI Prediction Microservice")
+registry = ModelRegistry(ARTIFACT_DIR, mmap=MMAP_ARTIFACTS, poll_seconds=MODEL_POLL_SECONDS)
+
+def get_artifacts():
+    """The active model version - fetch once per request so a swap never mixes versions"""
+    return registry.get()
+
+if PRELOAD_MODELS:
+    get_artifacts()
+    # Keep the garbage collector from touching (and un-sharing) the preloaded objects after fork
+    gc.freeze()
+
+# Largest number of rows accepted by /predict/batch in a single request
+MAX_BATCH_SIZE = int(os.getenv("AI_MAX_BATCH_SIZE", "10000"))
+# Largest /predict/batch body in bytes, enforced before anything is parsed
+MAX_BATCH_BYTES = int(os.getenv("AI_MAX_BATCH_BYTES", str(16 * 1024 * 1024)))
+# Rows per chunk when streaming batch results back
+STREAM_CHUNK_ROWS = 1000
+# Coalesce concurrent /predict calls into one vectorized pass
+MICRO_BATCHING = os.getenv("AI_MICRO_BATCHING", "1") == "1"
+BATCH_WINDOW_MS = float(os.getenv("AI_BATCH_WINDOW_MS", "2"))
+BATCH_MAX_ROWS = int(os.getenv("AI_BATCH_MAX_ROWS", "64"))
+# Content-addressed upload store: identical files are kept once, old ones evicted
+UPLOAD_DIR = os.getenv("AI_UPLOAD_DIR", "uploaded_files")
+UPLOAD_QUOTA_MB = float(os.getenv("AI_UPLOAD_QUOTA_MB", "2048"))
+UPLOAD_MAX_AGE_DAYS = float(os.getenv("AI_UPLOAD_MAX_AGE_DAYS", "30"))
+# Seconds PDF feature extraction may take per document; fields not found in time are defaulted
+EXTRACTION_BUDGET_SECONDS = float(os.getenv("AI_EXTRACTION_BUDGET_SECONDS", "60"))
+# Extraction runs in separate process pools for cheap and expensive documents; a job is
+# "fast" when its estimated cost (page count, share of scanned pages) is under the limit
+EXTRACTION_FAST_WORKERS = int(os.getenv("AI_EXTRACTION_FAST_WORKERS", "2"))
+EXTRACTION_HEAVY_WORKERS = int(os.getenv("AI_EXTRACTION_HEAVY_WORKERS", "1"))
+EXTRACTION_FAST_MAX_MS = float(os.getenv("AI_EXTRACTION_FAST_MAX_MS", "5000"))
+# Admission control for uploads that need extraction: past AI_ADMISSION_DEGRADE_AT of any limit
+# documents are read without OCR, at the limit they are refused with 429/503 and Retry-After
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("AI_ADMISSION_MAX_IN_FLIGHT", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("AI_ADMISSION_MAX_QUEUE", "16"))
+ADMISSION_LATENCY_TARGET_MS = float(os.getenv("AI_ADMISSION_LATENCY_TARGET_MS", "30000"))
+ADMISSION_DEGRADE_AT = float(os.getenv("AI_ADMISSION_DEGRADE_AT", "0.75"))
+# Near-duplicate documents within a tender (MinHash of the page text): at the flag similarity they
+# are reported, at the reuse similarity only their text is read and the rest comes from the earlier one
+NEAR_DUPLICATE_FLAG = float(os.getenv("AI_NEAR_DUPLICATE_FLAG", "0.8"))
+NEAR_DUPLICATE_REUSE = float(os.getenv("AI_NEAR_DUPLICATE_REUSE", "0.95"))
+NEAR_DUPLICATE_MAX_TENDERS = int(os.getenv("AI_NEAR_DUPLICATE_MAX_TENDERS", "256"))
+NEAR_DUPLICATE_MAX_DOCUMENTS = int(os.getenv("AI_NEAR_DUPLICATE_MAX_DOCUMENTS", "500"))
+# Contractor profiles shared by the extraction workers (a JSON file; the upload store only manages its shards)
+CONTRACTOR_PROFILES_PATH = os.getenv("CONTRACTOR_PROFILES_PATH") or os.path.join(UPLOAD_DIR, "contractor_profiles.json")
+
+# Keep uploads up to the in-memory PDF limit in RAM while the form is parsed (starlette
+# spools anything over 1 MB to a temp file by default), so small documents are extracted
+# straight from memory and only persisted afterwards
+if getattr(MultiPartParser, "spool_max_size", 0) < IN_MEMORY_PDF_MAX_BYTES:
+    MultiPartParser.spool_max_size = IN_MEMORY_PDF_MAX_BYTES
+
+@asynccontextmanager
+async def lifespan(app):
+    # Watch for new artifacts in each worker (after any fork)
+    registry.start_watching()
+    extraction_scheduler.warm()
+    yield
+    registry.stop_watching()
+    extraction_scheduler.shutdown()
+
+app = FastAPI(title="Tender AI Prediction Microservice", lifespan=lifespan)
 
 # CORS setup
 app.add_middleware(
@@ -39,15 +117,110 @@ class TenderData(BaseModel):
     Agency_encoded: float
     Supplier_Name_encoded: float
 
+# Column order expected by the scaler / kmeans / XGBoost model
+TENDER_FEATURES = [
+    "Tender_Amount", "Awarded_Amount", "award_delay_days", "Award_Year",
+    "Award_Month", "Tender_to_Award_Ratio", "Agency_encoded", "Supplier_Name_encoded"
+]
+PREDICTION_LABELS = {1: "✅ Awarded", 0: "❌ Not Awarded"}
+
+def predict_matrix(input_array):
+    """Run scaler, kmeans and XGBoost once over an (n_rows, 8) matrix"""
+    artifacts = get_artifacts()
+    input_scaled = artifacts.scaler.transform(input_array)
+    clusters = artifacts.kmeans.predict(input_scaled)
+    predictions = artifacts.model.predict(input_scaled)
+    return predictions, clusters
+
+def _rows_from_columnar(payload):
+    """{"Tender_Amount": [...], "Awarded_Amount": [...], ...} -> (n_rows, 8) float matrix"""
+    if not isinstance(payload, dict):
+        raise ValueError("columnar payload must be a JSON object of equal-length arrays")
+    missing = [feature for feature in TENDER_FEATURES if feature not in payload]
+    if missing:
+        raise ValueError(f"missing columns: {missing}")
+    columns = [np.asarray(payload[feature], dtype=np.float64) for feature in TENDER_FEATURES]
+    if any(column.ndim != 1 for column in columns) or len({len(column) for column in columns}) != 1:
+        raise ValueError("every column must be a flat array of the same length")
+    return np.column_stack(columns)
+
+def _rows_from_ndjson(body):
+    """One TenderData JSON object per line -> (n_rows, 8) float matrix"""
+    rows = []
+    for line_num, line in enumerate(body.splitlines(), 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        try:
+            rows.append([record[feature] for feature in TENDER_FEATURES])
+        except KeyError as e:
+            raise ValueError(f"line {line_num} is missing {e}")
+    return np.asarray(rows, dtype=np.float64).reshape(-1, len(TENDER_FEATURES))
+
+def _stream_predictions(predictions, clusters):
+    """Yield NDJSON result lines in chunks"""
+    label_json = {value: json.dumps(label) for value, label in PREDICTION_LABELS.items()}
+    for start in range(0, len(predictions), STREAM_CHUNK_ROWS):
+        stop = min(start + STREAM_CHUNK_ROWS, len(predictions))
+        yield "".join(
+            f'{{"row": {i}, "prediction": {int(predictions[i])}, '
+            f'"prediction_label": {label_json[int(predictions[i])]}, "cluster": {int(clusters[i])}}}\n'
+            for i in range(start, stop)
+        )
+
+batcher = MicroBatcher(predict_matrix, max_wait_ms=BATCH_WINDOW_MS, max_batch_rows=BATCH_MAX_ROWS)
+upload_store = ContentAddressedStore(
+    UPLOAD_DIR,
+    quota_bytes=int(UPLOAD_QUOTA_MB * 1024 * 1024) if UPLOAD_QUOTA_MB > 0 else None,
+    max_age_seconds=UPLOAD_MAX_AGE_DAYS * 86400 if UPLOAD_MAX_AGE_DAYS > 0 else None
+)
+extraction_scheduler = ExtractionScheduler(
+    fast_workers=EXTRACTION_FAST_WORKERS,
+    heavy_workers=EXTRACTION_HEAVY_WORKERS,
+    time_budget=EXTRACTION_BUDGET_SECONDS,
+    fast_max_ms=EXTRACTION_FAST_MAX_MS,
+    profiles_path=CONTRACTOR_PROFILES_PATH
+)
+admission_controller = AdmissionController(
+    max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    max_queue=ADMISSION_MAX_QUEUE,
+    latency_target_ms=ADMISSION_LATENCY_TARGET_MS,
+    degrade_at=ADMISSION_DEGRADE_AT
+)
+# Identical documents extracted at the same time (a tender's bids opened by several users
+# at once) share one extraction, keyed by content hash and OCR mode
+extraction_flights = SingleFlight()
+duplicate_index = NearDuplicateIndex(
+    flag_similarity=NEAR_DUPLICATE_FLAG,
+    reuse_similarity=NEAR_DUPLICATE_REUSE,
+    max_tenders=NEAR_DUPLICATE_MAX_TENDERS,
+    max_documents=NEAR_DUPLICATE_MAX_DOCUMENTS
+)
+
 @app.get("/")
 def read_root():
-    return {"message": "🎯 AI Microservice for Tender Award Prediction is running."}
+    return {
+        "message": "🎯 AI Microservice for Tender Award Prediction is running.",
+        "model_version": get_artifacts().version,
+        "models": registry.info()
+    }
+
+@app.post("/models/reload")
+async def reload_model():
+    swapped = await run_in_threadpool(registry.reload)
+    return {"swapped": swapped, **registry.info()}
+
+@app.post("/models/rollback")
+def rollback_model():
+    if not registry.rollback():
+        raise HTTPException(status_code=409, detail="No previous model version to roll back to")
+    return registry.info()
 
 # Prediction endpoint - note path updated to /predict (no /api)
 @app.post("/predict")
-def predict(data: TenderData):
+async def predict(data: TenderData):
     try:
-        input_array = np.array([[ 
+        input_row = [
             data.Tender_Amount,
             data.Awarded_Amount,
             data.award_delay_days,
@@ -56,22 +229,123 @@ def predict(data: TenderData):
             data.Tender_to_Award_Ratio,
             data.Agency_encoded,
             data.Supplier_Name_encoded
-        ]])
-        input_scaled = scaler.transform(input_array)
-        cluster = kmeans.predict(input_scaled)[0]
-        prediction = model.predict(input_scaled)[0]
-        prediction_label = "✅ Awarded" if prediction == 1 else "❌ Not Awarded"
+        ]
+        if MICRO_BATCHING:
+            prediction, cluster = await batcher.submit(input_row)
+        else:
+            predictions, clusters = await run_in_threadpool(predict_matrix, np.array([input_row]))
+            prediction, cluster = predictions[0], clusters[0]
+        prediction = int(prediction)
 
         return {
-            "prediction": int(prediction),
-            "prediction_label": prediction_label,
+            "prediction": prediction,
+            "prediction_label": PREDICTION_LABELS[prediction],
             "cluster": int(cluster)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+async def read_limited_body(request, limit):
+    """The request body, refused with 413 as soon as Content-Length or the bytes received pass limit"""
+    too_large = HTTPException(status_code=413, detail=f"Batch body exceeds the limit of {limit} bytes")
+    try:
+        declared = int(request.headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if declared > limit:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+# Batch prediction - columnar JSON or NDJSON in, NDJSON stream out
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    body = await read_limited_body(request, MAX_BATCH_BYTES)
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            input_array = _rows_from_ndjson(body)
+        else:
+            input_array = _rows_from_columnar(json.loads(body))
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch payload: {str(e)}")
+
+    if len(input_array) == 0:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(input_array) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(input_array)} rows exceeds the limit of {MAX_BATCH_SIZE}"
+        )
+
+    try:
+        predictions, clusters = await run_in_threadpool(predict_matrix, input_array)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+    return StreamingResponse(
+        _stream_predictions(predictions, clusters),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Rows": str(len(input_array))}
+    )
+
+@app.get("/metrics/batching")
+def batching_metrics():
+    return {"enabled": MICRO_BATCHING, **batcher.metrics()}
+
+@app.get("/metrics/uploads")
+def upload_metrics():
+    return upload_store.stats()
+
+@app.get("/metrics/extraction")
+def extraction_metrics():
+    return {
+        **extraction_scheduler.stats(),
+        "single_flight": extraction_flights.stats(),
+        "near_duplicates": duplicate_index.stats(),
+    }
+
+@app.get("/metrics/admission")
+def admission_metrics():
+    return admission_controller.stats(extraction_scheduler.queue_depth())
+
+async def read_small_upload(upload, limit=IN_MEMORY_PDF_MAX_BYTES):
+    """The whole upload if it fits in limit bytes, otherwise (None, bytes read so far)"""
+    head = await upload.read(limit + 1)
+    if len(head) <= limit:
+        return head, None
+    return None, head
+
+async def apply_near_duplicates(tender_id, document, pdf_source, allow_ocr, data, info):
+    """
+    Flag the tender's earlier documents this one nearly duplicates, fill a short (text only)
+    extraction from the document it matched, and index this one for later submissions
+    """
+    # A coalesced caller gets here after the owner indexed the same document
+    matches = duplicate_index.check(tender_id, info['minhash'], document)
+    filled = []
+    reused_from = None
+    reused = info.get('near_duplicate')
+    if reused:
+        prior = duplicate_index.prior(tender_id, reused['document'])
+        if prior is None:
+            # Dropped from the index while this job ran: extract in full after all
+            data, info = await extraction_scheduler.extract(pdf_source, allow_ocr=allow_ocr)
+        else:
+            data, filled = fill_from_prior(data, info, *prior)
+            reused_from = {**reused, "fields": filled}
+    info = {**info, 'defaulted_fields': [field for field in info.get('defaulted_fields', []) if field not in filled]}
+    duplicate_index.add(tender_id, document, info['minhash'], data, info['defaulted_fields'])
+    return data, info, [match._asdict() for match in matches], reused_from
+
 @app.post("/tenders")
 async def create_tender(
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     description: str = Form(...),
     deadline: str = Form(...),
@@ -81,35 +355,82 @@ async def create_tender(
     projectDuration: str = Form(...),
     requirements: str = Form(...),
     documents: UploadFile = File(None),
-    drawings: UploadFile = File(None)
+    drawings: UploadFile = File(None),
+    tenderId: str = Form(None)
 ):
     saved_files = {}
-    upload_dir = "uploaded_files"
-    os.makedirs(upload_dir, exist_ok=True)
+    stored_files = {}
+    pinned_path = None
+
+    # Refuse extraction work before reading the upload when the service is saturated
+    admission = None
+    if documents:
+        admission = admission_controller.admit(extraction_scheduler.queue_depth())
+        if admission.action == 'reject':
+            raise HTTPException(
+                status_code=admission.status_code,
+                detail=f"Extraction service is overloaded ({admission.reason}), retry later",
+                headers={"Retry-After": str(admission.retry_after)}
+            )
+    started = time.perf_counter()
 
     try:
-        # Save uploaded documents with unique filenames
+        # Small documents are parsed from memory and written to the store after the response;
+        # large ones (and drawings) are streamed into the store first
+        document_bytes = None
         if documents:
-            unique_doc_filename = f"{uuid.uuid4()}_{documents.filename}"
-            doc_path = os.path.join(upload_dir, unique_doc_filename)
-            with open(doc_path, "wb") as buffer:
-                shutil.copyfileobj(documents.file, buffer)
-            saved_files['documents'] = doc_path
+            document_bytes, head = await read_small_upload(documents)
+            if document_bytes is not None:
+                sha256 = hashlib.sha256(document_bytes).hexdigest()
+                path = upload_store.path_for(sha256, documents.filename)
+                stored = StoredFile(path, sha256, len(document_bytes), os.path.exists(path), documents.filename)
+                background_tasks.add_task(upload_store.save_bytes, document_bytes, documents.filename, sha256)
+            else:
+                # Pinned so eviction can't remove the file while it is being extracted
+                stored = await upload_store.save_upload(documents, prefix=head, pin=True)
+                pinned_path = stored.path
+            saved_files['documents'] = stored.path
+            stored_files['documents'] = stored.info()
+            document_sha256 = stored.sha256
 
+        # Stream uploads into the content-addressed store (duplicates are stored once)
         if drawings:
-            unique_draw_filename = f"{uuid.uuid4()}_{drawings.filename}"
-            draw_path = os.path.join(upload_dir, unique_draw_filename)
-            with open(draw_path, "wb") as buffer:
-                shutil.copyfileobj(drawings.file, buffer)
-            saved_files['drawings'] = draw_path
+            stored = await upload_store.save_upload(drawings)
+            saved_files['drawings'] = stored.path
+            stored_files['drawings'] = stored.info()
 
         # Extract features from PDF document if uploaded
         extracted_features = None
+        extraction = None
         if 'documents' in saved_files:
-            predictor = TenderPredictor()
-            extracted_features = predictor.extract_data_from_pdf(saved_files['documents'])
+            pdf_source = document_bytes if document_bytes is not None else saved_files['documents']
+            # Documents submitted to an existing tender are checked against its earlier ones
+            duplicates = duplicate_index.snapshot(tenderId, document_sha256) if tenderId else None
+            (extracted_features, info), coalesced = await extraction_flights.do(
+                (document_sha256, admission.allow_ocr, tenderId),
+                lambda: extraction_scheduler.extract(pdf_source, allow_ocr=admission.allow_ocr, duplicates=duplicates)
+            )
+            near_duplicates, reused_from = [], None
+            if tenderId and extracted_features and info.get('minhash') is not None:
+                extracted_features, info, near_duplicates, reused_from = await apply_near_duplicates(
+                    tenderId, document_sha256, pdf_source, admission.allow_ocr, extracted_features, info
+                )
             if not extracted_features:
                 extracted_features = {"error": "Failed to extract features from PDF."}
+            extraction = {
+                "defaulted_fields": info.get('defaulted_fields', []),
+                "fields_source": info.get('fields_source', {}),
+                "time_defaulted_fields": info.get('time_defaulted_fields', []),
+                "tier_ms": info.get('tier_ms', {}),
+                "page_hashes": info.get('page_hashes', []),
+                "pages_reused": info.get('pages_reused', {}),
+                "contractor_profile": info.get('contractor_profile'),
+                "job": info.get('job'),
+                "mode": "full" if admission.allow_ocr else "text_only",
+                "coalesced": coalesced,
+                "near_duplicates": near_duplicates,
+                "reused_from": reused_from,
+            }
 
         # Dummy ID - you can replace this with real DB-generated ID later
         tender_id = 123
@@ -126,7 +447,9 @@ async def create_tender(
             "requirements": requirements,
             "documents": saved_files.get('documents'),
             "drawings": saved_files.get('drawings'),
+            "files": stored_files,
             "extracted_features": extracted_features,
+            "extraction": extraction,
             "status": "open",
             "bids": 0,
             "lastUpdated": deadline
@@ -136,6 +459,11 @@ async def create_tender(
         print("❌ Error in create_tender:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Failed to process tender and extract features.")
+    finally:
+        if pinned_path is not None:
+            upload_store.unpin(pinned_path)
+        if admission is not None:
+            admission_controller.release((time.perf_counter() - started) * 1000)
 
 if __name__ == "__main__":
     uvicorn.run("HamroAi.ai_microservice:app", host="0.0.0.0", port=5001, reload=True)
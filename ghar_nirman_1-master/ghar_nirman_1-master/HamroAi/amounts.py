@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Single-pass amount tokenizer for bid-amount detection
+Every currency/number token on a page is found once, together with its unit
+(lakh/crore/million, applied to the value) and the label text before it on the same
+line, and candidates are ranked by how strongly that label says "bid amount"
+"""
+
+import re
+from typing import List, NamedTuple, Optional
+
+MIN_BID_AMOUNT = 1000
+MAX_BID_AMOUNT = 1000000000
+
+UNIT_MULTIPLIERS = {
+    'thousand': 1e3,
+    'lakh': 1e5,
+    'lakhs': 1e5,
+    'lac': 1e5,
+    'lacs': 1e5,
+    'million': 1e6,
+    'crore': 1e7,
+    'crores': 1e7,
+}
+
+AMOUNT_TOKEN = re.compile(
+    r'(?<![\w.,])'
+    r'(?:(?P<currency>N?Rs\.?|NPR|INR|USD|[\$₹€])[ \t]*)?'
+    r'(?P<number>\d[\d,]*(?:\.\d+)?)'
+    r'(?:[ \t]*(?P<unit>thousand|lakhs?|lacs?|million|crores?)\b)?',
+    re.IGNORECASE
+)
+# A number followed by one of these is a duration, rate or count, never an amount
+# (only ever anchored with .match, so it is never rescanned from later positions)
+NON_AMOUNT_SUFFIX = re.compile(r'\s*(?:%|percent|months?|days?|years?|yrs?|weeks?)', re.IGNORECASE)
+
+# Label evidence, strongest first; the first label found in a token's context counts
+AMOUNT_LABELS = [
+    ('bid_amount', 10, re.compile(r'bid\s*(?:amount|price|value)|quoted\s*(?:amount|price)|offer\s*price', re.IGNORECASE)),
+    ('total_amount', 8, re.compile(r'total\s*(?:bid\s*|contract\s*)?(?:amount|price|value)|contract\s*(?:value|amount|price)|tender\s*value|grand\s*total', re.IGNORECASE)),
+    ('estimate', 2, re.compile(r'estimated\s*(?:cost|amount|value)', re.IGNORECASE)),
+    ('amount', 5, re.compile(r'amount', re.IGNORECASE)),
+    # Whole words only: no "sum" in "assumption", "value" in "evaluation" or "total" in "subtotal"
+    ('price', 3, re.compile(r'\b(?:price|cost|value|budget|total|sum)\b', re.IGNORECASE)),
+]
+CURRENCY_EVIDENCE = 2
+UNIT_EVIDENCE = 1
+# Score a candidate needs (a label, currency or unit) to count as a found bid amount; a bare
+# number such as a year or a postcode is only ever a last resort
+MIN_EVIDENCE = 1
+
+
+class AmountCandidate(NamedTuple):
+    value: float
+    raw: str
+    page: Optional[int]
+    label: Optional[str]
+    unit: Optional[str]
+    currency: Optional[str]
+    score: int
+
+
+def _label_for(context):
+    for label, weight, pattern in AMOUNT_LABELS:
+        if pattern.search(context):
+            return label, weight
+    return None, 0
+
+
+def find_amounts(text, page=None, min_value=MIN_BID_AMOUNT, max_value=MAX_BID_AMOUNT) -> List[AmountCandidate]:
+    """
+    Amount candidates in text, in document order. A token's label context is the text
+    between the previous token (or the start of its line) and the token itself.
+    """
+    candidates = []
+    if not text:
+        return candidates
+
+    previous_end = 0
+    for match in AMOUNT_TOKEN.finditer(text):
+        start, end = match.span()
+        context_start = max(previous_end, text.rfind('\n', 0, start) + 1)
+        previous_end = end
+        if NON_AMOUNT_SUFFIX.match(text, end):
+            continue
+
+        number = match.group('number').rstrip(',')
+        try:
+            value = float(number.replace(',', ''))
+        except ValueError:
+            continue
+        unit = match.group('unit')
+        if unit:
+            value *= UNIT_MULTIPLIERS[unit.lower()]
+        if not min_value <= value <= max_value:
+            continue
+
+        label, score = _label_for(text[context_start:start])
+        currency = match.group('currency')
+        if currency:
+            score += CURRENCY_EVIDENCE
+        if unit:
+            score += UNIT_EVIDENCE
+        candidates.append(AmountCandidate(
+            value=value, raw=match.group(0).strip(), page=page,
+            label=label, unit=unit.lower() if unit else None,
+            currency=currency, score=score
+        ))
+    return candidates
+
+
+def rank_amounts(candidates: List[AmountCandidate]) -> List[AmountCandidate]:
+    """Best first: strongest label evidence, then the larger amount, then the earlier page"""
+    return sorted(candidates, key=lambda c: (-c.score, -c.value, c.page if c.page is not None else 0))
+
+
+def best_amount(candidates: List[AmountCandidate], min_score=0) -> Optional[AmountCandidate]:
+    """Top-ranked candidate scoring at least min_score, or None"""
+    ranked = rank_amounts(candidates)
+    return ranked[0] if ranked and ranked[0].score >= min_score else None
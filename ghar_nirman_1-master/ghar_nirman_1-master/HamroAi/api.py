@@ -1,14 +1,56 @@
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from HamroAi.tender_predictor import TenderPredictor  # Make sure this path is correct
+from HamroAi.result_cache import ResultCache, bids_cache_key
+from HamroAi.chart_renderer import ChartRenderer
+from HamroAi.ranking import IncrementalTenderRanking, LiveRankings
+from HamroAi.scenarios import SCENARIO_SCHEMES, evaluate_scenarios
+from HamroAi.uncertainty import simulate_bids
 
-app = FastAPI()
+# Cached analysis results, keyed by bid list + model version (set ANALYZE_CACHE_DIR to keep them on disk too)
+ANALYZE_CACHE_TTL_SECONDS = float(os.getenv("ANALYZE_CACHE_TTL_SECONDS", "300"))
+ANALYZE_CACHE_MAX_ENTRIES = int(os.getenv("ANALYZE_CACHE_MAX_ENTRIES", "256"))
+ANALYZE_CACHE_DIR = os.getenv("ANALYZE_CACHE_DIR") or None
+# Oldest files in ANALYZE_CACHE_DIR are removed once it grows past this (0: no limit)
+ANALYZE_CACHE_DISK_MB = float(os.getenv("ANALYZE_CACHE_DISK_MB", "256"))
+STATIC_DIR = "HamroAi/static"
+# Comparison charts are rendered in a worker pool to static/comparison_<hash>.png
+PLOT_WORKERS = int(os.getenv("PLOT_WORKERS", "2"))
+PLOT_MAX_FILES = int(os.getenv("PLOT_MAX_FILES", "500"))
+# Live rankings are kept for this many tenders (least recently used dropped first) and dropped
+# after this long without a bid or query; DELETE /tenders/{id}/ranking drops a finished tender
+LIVE_RANKING_MAX_TENDERS = int(os.getenv("LIVE_RANKING_MAX_TENDERS", "1024"))
+LIVE_RANKING_IDLE_SECONDS = float(os.getenv("LIVE_RANKING_IDLE_SECONDS", str(24 * 3600)))
+# Largest number of weight scenarios evaluated per /scenarios request
+MAX_SCENARIOS = int(os.getenv("MAX_SCENARIOS", "1000"))
+# Largest number of Monte Carlo draws per bid for /analyze/uncertainty
+MAX_UNCERTAINTY_SAMPLES = int(os.getenv("MAX_UNCERTAINTY_SAMPLES", "10000"))
+# Largest bids x samples per /analyze/uncertainty request (every row is scored; 500k rows take ~3s)
+MAX_UNCERTAINTY_ROWS = int(os.getenv("MAX_UNCERTAINTY_ROWS", "200000"))
+# /analyze response layouts: one object per bid, {"columns": ..., "data": ...}, or streamed NDJSON
+RESULT_LAYOUTS = ("records", "columns", "ndjson")
+# Rows per chunk when streaming NDJSON results
+STREAM_CHUNK_ROWS = 1000
+# Significant digits in serialized floats (the most pandas' encoder supports)
+JSON_DOUBLE_PRECISION = 15
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    chart_renderer.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # Mount static folder (adjust path if needed)
-app.mount("/static", StaticFiles(directory="HamroAi/static"), name="static")
+os.makedirs(STATIC_DIR, exist_ok=True)
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 # Add CORS middleware
 app.add_middleware(
@@ -23,6 +65,18 @@ app.add_middleware(
 predictor = TenderPredictor()
 predictor.initialize_model()
 
+result_cache = ResultCache(
+    max_entries=ANALYZE_CACHE_MAX_ENTRIES,
+    ttl_seconds=ANALYZE_CACHE_TTL_SECONDS,
+    disk_dir=ANALYZE_CACHE_DIR,
+    max_disk_bytes=int(ANALYZE_CACHE_DISK_MB * 1024 * 1024) if ANALYZE_CACHE_DISK_MB > 0 else None,
+)
+chart_renderer = ChartRenderer(STATIC_DIR, url_prefix="/static", max_workers=PLOT_WORKERS, max_files=PLOT_MAX_FILES)
+# Live per-tender rankings, updated incrementally as bids arrive
+live_rankings = LiveRankings(LIVE_RANKING_MAX_TENDERS, LIVE_RANKING_IDLE_SECONDS)
+# Batched inference path for Monte Carlo runs, rebuilt when the model changes
+compiled_models: Dict[str, object] = {}
+
 # Request model
 class TenderBid(BaseModel):
     contract_name: str
@@ -35,16 +89,158 @@ class TenderBid(BaseModel):
     safety_certification: str
     bid_amount: float
 
-@app.post("/analyze")
-async def analyze_bids(bids: List[TenderBid]):
+def cached_results(bids: List[TenderBid]):
+    """Ranked results for a bid list, running the pipeline only on a cache miss"""
     bids_dict = [bid.dict() for bid in bids]
-    results_df = predictor.run_prediction_pipeline(bids_dict)
-    return results_df.to_dict(orient='records')
+    key = bids_cache_key(bids_dict, predictor.model_version())
+    results = result_cache.get(key)
+    if results is None:
+        results = result_cache.put(key, predictor.run_prediction_pipeline(bids_dict))
+    return key, results
+
+def _stream_ndjson(results_df):
+    """Results as newline-delimited JSON, serialized STREAM_CHUNK_ROWS rows at a time"""
+    for start in range(0, len(results_df), STREAM_CHUNK_ROWS):
+        chunk = results_df.iloc[start:start + STREAM_CHUNK_ROWS]
+        yield chunk.to_json(orient='records', lines=True, double_precision=JSON_DOUBLE_PRECISION)
+
+def compiled_predictor():
+    version = predictor.model_version()
+    compiled = compiled_models.get(version)
+    if compiled is None:
+        compiled_models.clear()
+        compiled = compiled_models[version] = predictor.compile_inference()
+    return compiled
+
+class UncertainTenderBid(TenderBid):
+    # Fields the extractor filled with defaults (resampled) or read with low confidence (perturbed)
+    defaulted_fields: List[str] = []
+    low_confidence_fields: List[str] = []
+
+class UncertaintyRequest(BaseModel):
+    bids: List[UncertainTenderBid]
+    samples: int = 2000
+    seed: Optional[int] = None
+
+class ScenarioRequest(BaseModel):
+    bids: List[TenderBid]
+    # Explicit weightings (feature -> weight); if omitted, `samples` are drawn around the baseline
+    weights: Optional[List[Dict[str, float]]] = None
+    samples: int = 100
+    scheme: str = "comprehensive"
+    seed: Optional[int] = None
+    top_k: int = 3
+
+@app.post("/analyze")
+async def analyze_bids(bids: List[TenderBid], layout: str = Query("records")):
+    if layout not in RESULT_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of {list(RESULT_LAYOUTS)}")
+    _, results_df = cached_results(bids)
+
+    # Serialize the frame straight to JSON bytes instead of building per-row dicts
+    # and running them through FastAPI's encoder
+    if layout == "ndjson":
+        return StreamingResponse(_stream_ndjson(results_df), media_type="application/x-ndjson")
+    if layout == "columns":
+        body = results_df.to_json(orient='split', index=False, double_precision=JSON_DOUBLE_PRECISION)
+    else:
+        body = results_df.to_json(orient='records', double_precision=JSON_DOUBLE_PRECISION)
+    return Response(content=body, media_type="application/json")
 
 @app.post("/plot")
 async def generate_plot(bids: List[TenderBid]):
-    bids_dict = [bid.dict() for bid in bids]
-    results = predictor.run_prediction_pipeline(bids_dict)
-    # Save plot image to static folder
-    predictor.plot_comparison(results, save_path="HamroAi/static/plot.png")
-    return {"message": "Plot generated", "plot_url": "/static/plot.png"}
+    _, results = cached_results(bids)
+    if results.empty:
+        raise HTTPException(status_code=400, detail="No results to plot")
+    # Charts are named by their content, so identical results reuse the existing image
+    plot_url, cached = await chart_renderer.render(results)
+    return {"message": "Plot generated", "plot_url": plot_url, "cached": cached}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "results": result_cache.stats(),
+        "plot": chart_renderer.stats(),
+        "live_rankings": live_rankings.stats(),
+    }
+
+def get_live_ranking(tender_id: str) -> IncrementalTenderRanking:
+    ranking = live_rankings.get(tender_id)
+    if ranking is None:
+        raise HTTPException(status_code=404, detail=f"No bids received for tender {tender_id}")
+    return ranking
+
+@app.post("/tenders/{tender_id}/bids")
+async def add_live_bid(tender_id: str, bid: TenderBid):
+    ranking = live_rankings.get_or_create(tender_id)
+    placement = ranking.add_bid(bid.dict())
+    return {**placement, "leader": ranking.leader(), "bids": len(ranking.bids)}
+
+@app.get("/tenders/{tender_id}/leader")
+async def live_leader(tender_id: str):
+    ranking = get_live_ranking(tender_id)
+    return {"leader": ranking.leader(), **ranking.stats()}
+
+@app.get("/tenders/{tender_id}/ranking")
+async def live_ranking(tender_id: str, top_k: Optional[int] = Query(None, ge=1)):
+    ranking = get_live_ranking(tender_id)
+    return {"ranking": ranking.top(top_k), **ranking.stats()}
+
+@app.delete("/tenders/{tender_id}/ranking")
+async def close_live_ranking(tender_id: str):
+    """Drop a finished tender's live ranking; returns its final standings"""
+    ranking = live_rankings.close(tender_id)
+    if ranking is None:
+        raise HTTPException(status_code=404, detail=f"No bids received for tender {tender_id}")
+    return {"ranking": ranking.top(), **ranking.stats()}
+
+@app.post("/scenarios")
+async def weight_scenarios(request: ScenarioRequest):
+    """Rankings of the bids under many scoring weightings, with rank-stability statistics"""
+    if request.scheme not in SCENARIO_SCHEMES:
+        raise HTTPException(status_code=400, detail=f"scheme must be one of {list(SCENARIO_SCHEMES)}")
+    scenario_count = len(request.weights) if request.weights is not None else request.samples
+    if not 1 <= scenario_count <= MAX_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_SCENARIOS} scenarios are supported")
+
+    tender_data = predictor.process_database_data([bid.dict() for bid in request.bids])
+    try:
+        result = evaluate_scenarios(
+            tender_data, weights=request.weights, scheme=request.scheme,
+            samples=request.samples, seed=request.seed, top_k=request.top_k
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=400, detail="No bids to evaluate")
+
+    body = '{"bids":%s,"scenarios":%s}' % (
+        result['bids'].to_json(orient='records', double_precision=JSON_DOUBLE_PRECISION),
+        result['scenarios'].to_json(orient='records', double_precision=JSON_DOUBLE_PRECISION),
+    )
+    return Response(content=body, media_type="application/json")
+
+@app.post("/analyze/uncertainty")
+async def analyze_uncertainty(request: UncertaintyRequest):
+    """Win-probability intervals and rank distributions when some bid fields were guessed"""
+    if not 1 <= request.samples <= MAX_UNCERTAINTY_SAMPLES:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_UNCERTAINTY_SAMPLES} samples are supported")
+    if len(request.bids) * request.samples > MAX_UNCERTAINTY_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"bids x samples must be at most {MAX_UNCERTAINTY_ROWS} "
+                   f"(at most {MAX_UNCERTAINTY_ROWS // max(len(request.bids), 1)} samples for {len(request.bids)} bids)"
+        )
+    fields = set(TenderBid.__fields__)
+    bids = [bid.dict(include=fields) for bid in request.bids]
+    # The simulation is CPU-bound; keep it off the event loop
+    result = await run_in_threadpool(
+        simulate_bids, compiled_predictor(), bids,
+        defaulted_fields=[bid.defaulted_fields for bid in request.bids],
+        low_confidence_fields=[bid.low_confidence_fields for bid in request.bids],
+        samples=request.samples, seed=request.seed
+    )
+    if result is None:
+        raise HTTPException(status_code=400, detail="No bids to simulate")
+    body = result.to_json(orient='records', double_precision=JSON_DOUBLE_PRECISION)
+    return Response(content=body, media_type="application/json")
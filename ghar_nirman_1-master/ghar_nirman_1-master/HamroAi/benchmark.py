@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Latency benchmarks for the AI Tender Predictor
+Usage: python benchmark.py inference [rows] [repeats]
+       python benchmark.py ranking [rows] [tenders] [top_k]
+       python benchmark.py regex [length] [seed]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ranking import rank_bids
+from tender_predictor import TenderPredictor
+
+
+def _percentiles(samples_ms):
+    """p50 / p99 of a list of latencies in milliseconds"""
+    return np.percentile(samples_ms, 50), np.percentile(samples_ms, 99)
+
+
+def _time_calls(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _trained_predictor():
+    """Train the compatibility model quietly so benchmark output stays readable"""
+    predictor = TenderPredictor()
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.initialize_model()
+    return predictor
+
+
+def bench_inference(rows=1, repeats=500):
+    """Compare the pandas pipeline with the compiled inference path"""
+    print(f"⏱️  Inference latency - {rows} bid(s) per call, {repeats} calls")
+    print("=" * 60)
+
+    predictor = _trained_predictor()
+    compiled = predictor.compile_inference()
+    bids = predictor.create_synthetic_data(num_samples=rows)
+
+    def pandas_path():
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = predictor.process_database_data(bids)
+            X, _ = predictor.preprocess_data(df)
+        X_scaled = predictor.scaler.transform(X)
+        return predictor.model.predict(X_scaled), predictor.model.predict_proba(X_scaled)[:, 1]
+
+    def compiled_path():
+        return compiled.predict_records(bids)
+
+    # Outputs must match before timings mean anything
+    expected_labels, expected_probas = pandas_path()
+    labels, probas = compiled_path()
+    matches = np.array_equal(expected_labels, labels) and np.array_equal(expected_probas, probas)
+    print(f"Output parity: {'✅ identical' if matches else '❌ MISMATCH'}")
+
+    for name, fn in [('pandas pipeline', pandas_path), ('compiled path', compiled_path)]:
+        fn()  # warm up
+        p50, p99 = _percentiles(_time_calls(fn, repeats))
+        print(f"  {name:<16} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+
+    return matches
+
+
+def _synthetic_bids(rows, tenders, seed=42):
+    """Bid rows spread over many tenders, with the columns the scorers use"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'tender_id': rng.integers(0, tenders, rows),
+        'contractor_name': [f'Contractor_{i}' for i in range(rows)],
+        'bid_amount': rng.uniform(1e5, 1e7, rows).round(2),
+        'project_duration': rng.integers(6, 48, rows),
+        'warranty_period': rng.integers(12, 60, rows),
+        'client_rating': rng.uniform(1, 5, rows).round(1),
+        'project_success_rate': rng.uniform(50, 100, rows).round(1),
+        'rejection_history': rng.integers(0, 4, rows),
+        'safety_certification': rng.choice(['Yes', 'No'], rows),
+    })
+
+
+def bench_ranking(rows=50000, tenders=1000, top_k=3):
+    """Per-tender Python loop vs the vectorized multi-tender ranking"""
+    print(f"⏱️  Ranking - {rows} bids over {tenders} tenders, top {top_k} per tender")
+    print("=" * 60)
+
+    predictor = TenderPredictor()
+    bids = _synthetic_bids(rows, tenders)
+
+    def loop_path():
+        ranked = []
+        for _, group in bids.groupby('tender_id', sort=False):
+            group = group.copy()
+            group['composite_score'] = predictor.calculate_composite_score(group)
+            group = group.sort_values('composite_score', ascending=False, kind='stable')
+            group['rank'] = range(1, len(group) + 1)
+            ranked.append(group.head(top_k))
+        return pd.concat(ranked)
+
+    def vectorized_path():
+        return rank_bids(bids, group_col='tender_id', top_k=top_k)
+
+    timings = {}
+    outputs = {}
+    for name, fn in [('per-tender loop', loop_path), ('vectorized', vectorized_path)]:
+        start = time.perf_counter()
+        outputs[name] = fn()
+        timings[name] = time.perf_counter() - start
+        print(f"  {name:<16} {timings[name]:8.3f} s")
+
+    expected = outputs['per-tender loop'].sort_index()
+    actual = outputs['vectorized'].sort_index()
+    matches = (
+        expected.index.equals(actual.index)
+        and np.array_equal(expected['rank'].to_numpy(), actual['rank'].to_numpy())
+        and np.allclose(expected['composite_score'], actual['composite_score'], equal_nan=True)
+    )
+    print(f"Output parity: {'✅ identical' if matches else '❌ MISMATCH'}")
+    print(f"Speed-up: {timings['per-tender loop'] / timings['vectorized']:.1f}x")
+    return matches
+
+
+def _hostile_texts(length, seed=42):
+    """Repetitive and random text shaped like the inputs that made the extraction regexes backtrack"""
+    rng = np.random.default_rng(seed)
+    alphabet = list('0123456789,.:- \t\nabcdefghijklmnopqrstuvwxyzRsNPR%•₹')
+    return {
+        'spaces': ' ' * length + 'x',
+        'commas': '1,' * (length // 2) + 'x',
+        'padded_label': 'Duration: ' + ' ' * length + 'x',
+        'long_number': 'Success ' + '9' * length,
+        'bullets': 'Name' + '• ' * (length // 2),
+        'repeated_labels': 'Duration: 5 ' * (length // 12),
+        'random': ''.join(rng.choice(alphabet, size=length)),
+    }
+
+
+def bench_regex(length=20000, seed=42):
+    """Time text, OCR-line and table parsing on hostile inputs of increasing length"""
+    from regex_guard import RegexBudget
+
+    predictor = TenderPredictor()
+    print(f"Regex fuzz: hostile inputs up to {length} characters")
+    ok = True
+    for name, text in _hostile_texts(length, seed).items():
+        timings = []
+        for size in (len(text) // 4, len(text) // 2, len(text)):
+            sample = text[:size]
+            budget = RegexBudget()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                predictor._parse_tender_text(sample, budget)
+                predictor._extract_tables_from_ocr_text(sample, budget)
+                predictor._parse_tender_tables([[[sample[:100], sample]]])
+            timings.append((time.perf_counter() - start) * 1000)
+        # Linear work roughly doubles per step; quadratic work quadruples
+        growth = timings[-1] / max(timings[-2], 1e-3)
+        linear = growth < 3 or timings[-1] < 50
+        ok = ok and linear
+        print(f"  {name:<16} {' '.join(f'{ms:9.1f}ms' for ms in timings)}   x{growth:4.1f} {'✅' if linear else '❌'}")
+    return ok
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "inference"
+    args = [int(arg) for arg in sys.argv[2:]]
+
+    if command == "inference":
+        ok = bench_inference(*args)
+    elif command == "ranking":
+        ok = bench_ranking(*args)
+    elif command == "regex":
+        ok = bench_regex(*args)
+    else:
+        print(f"Unknown benchmark: {command}")
+        print("Benchmarks: inference, ranking, regex")
+        sys.exit(1)
+
+    sys.exit(0 if ok else 1)
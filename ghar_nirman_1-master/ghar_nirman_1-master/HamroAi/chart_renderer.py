@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Off-request chart rendering for the bid comparison API
+Charts are drawn with the object-oriented Figure API (no pyplot global state, Agg canvas)
+in a small worker pool and written to content-addressed files, so identical results
+reuse the same image and concurrent requests never overwrite each other's charts
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+COMPARISON_METRICS = ['composite_score', 'technical_merit']
+
+
+def draw_comparison(fig, results):
+    """Radar chart of every bidder's normalized scores onto an existing figure"""
+    metrics = COMPARISON_METRICS
+    normalized = results[['contractor_name'] + metrics].copy()
+    normalized[metrics] = normalized[metrics].apply(lambda x: (x - x.min()) / (x.max() - x.min()) * 100)
+
+    angles = np.linspace(0, 2 * np.pi, len(metrics), endpoint=False).tolist()
+    angles += angles[:1]
+
+    ax = fig.add_subplot(polar=True)
+
+    for idx, row in normalized.iterrows():
+        values = row[metrics].tolist()
+        values += values[:1]
+        ax.plot(angles, values, 'o-', linewidth=2, label=row['contractor_name'])
+        ax.fill(angles, values, alpha=0.1)
+
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(metrics)
+    ax.set_title('Contractor Comparison (Normalized Scores)', size=14, pad=20)
+    ax.legend(bbox_to_anchor=(1.3, 1.1))
+    fig.tight_layout()
+    return ax
+
+
+def chart_key(results):
+    """Content hash of exactly the data the chart shows"""
+    plotted = results[['contractor_name'] + COMPARISON_METRICS].to_dict(orient='split')
+    payload = json.dumps([plotted['columns'], plotted['data']], separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChartRenderer:
+    """
+    Renders comparison charts to <static_dir>/comparison_<hash>.png and returns their URLs.
+    An existing file is reused as-is; concurrent requests for the same chart share one render.
+    Only the newest max_files charts are kept.
+    """
+
+    def __init__(self, static_dir, url_prefix='/static', max_workers=2, max_files=500):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix.rstrip('/')
+        self.max_files = max_files
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chart-render')
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> concurrent.futures.Future
+
+        self.renders = 0
+        self.reused = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def filename_for(self, key):
+        return f'comparison_{key[:24]}.png'
+
+    def url_for(self, key):
+        return f'{self.url_prefix}/{self.filename_for(key)}'
+
+    async def render(self, results):
+        """URL of the chart for these results and whether an existing image was reused"""
+        key = chart_key(results)
+        path = os.path.join(self.static_dir, self.filename_for(key))
+
+        with self._lock:
+            if os.path.exists(path):
+                self.reused += 1
+                return self.url_for(key), True
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._executor.submit(self._render_to_file, results.copy(), path)
+                self._in_flight[key] = future
+                future.add_done_callback(lambda _, key=key: self._finish(key))
+            else:
+                self.coalesced += 1
+
+        await asyncio.wrap_future(future)
+        return self.url_for(key), False
+
+    def _finish(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _render_to_file(self, results, path):
+        """Draw on a private Figure and publish it with an atomic rename (worker thread)"""
+        try:
+            fig = Figure(figsize=(8, 8))
+            FigureCanvasAgg(fig)
+            draw_comparison(fig, results)
+
+            os.makedirs(self.static_dir, exist_ok=True)
+            tmp = tempfile.NamedTemporaryFile(dir=self.static_dir, suffix='.png.tmp', delete=False)
+            try:
+                with tmp:
+                    fig.savefig(tmp, format='png')
+                os.replace(tmp.name, path)
+            finally:
+                # Gone after the rename; a failed render must not leave it in the static directory
+                if os.path.exists(tmp.name):
+                    os.remove(tmp.name)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+
+        with self._lock:
+            self.renders += 1
+        self._prune()
+        return path
+
+    def _prune(self):
+        """Drop the oldest charts beyond max_files"""
+        if not self.max_files:
+            return
+        charts = [
+            entry for entry in os.scandir(self.static_dir)
+            if entry.name.startswith('comparison_') and entry.name.endswith('.png')
+        ]
+        if len(charts) <= self.max_files:
+            return
+        charts.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in charts[:len(charts) - self.max_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'renders': self.renders,
+                'reused': self.reused,
+                'coalesced': self.coalesced,
+                'failed': self.failed,
+                'in_flight': len(self._in_flight),
+            }
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Contractor profiles for history-derived features
+client_rating, project_success_rate, rejection_history and safety_certification describe
+the contractor rather than the bid, so values read from earlier bids are kept per contractor
+(by registration number, or by normalised name). Once a value has been confirmed by enough
+distinct recent documents, later extractions take it from the profile instead of hunting for it.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+PROFILE_FIELDS = ('client_rating', 'project_success_rate', 'rejection_history', 'safety_certification')
+# A field is trusted after this many distinct documents agreed on its value...
+MIN_CONFIRMATIONS = 2
+# ...and only while the latest of them is this recent
+MAX_AGE_DAYS = 180
+# Documents remembered per field value (only needs to reach MIN_CONFIRMATIONS)
+MAX_DOCUMENTS = 16
+
+# Legal-form words and honorifics that vary between documents of the same firm
+_NAME_NOISE = {
+    'm', 's', 'ms', 'pvt', 'private', 'ltd', 'limited', 'plc', 'inc', 'llc', 'corp', 'co', 'company',
+    'the', 'and',
+}
+_NAME_WORD = re.compile(r'[a-z0-9]+')
+# Names made only of these words are placeholders or labels ('Unknown Contractor', 'N/A',
+# 'Name of Bidder'), not a contractor; keying on them would merge unrelated bidders
+_GENERIC_NAME_WORDS = {
+    'unknown', 'contractor', 'contractors', 'bidder', 'tenderer', 'firm', 'name', 'of', 'default',
+    'not', 'available', 'applicable', 'n', 'a', 'na', 'nil', 'none', 'null', 'undefined', 'tbd',
+} | _NAME_NOISE
+# Only values next to a contractor/bidder label belong to the contractor; a bare
+# 'PAN No:' or 'Name:' is as likely to be the employer's or the engineer's.
+# Every quantifier is anchored by a different character class, so matching stays linear
+_CONTRACTOR_LABEL = r"(?:contractor|bidder|tenderer|firm)(?:'s)?"
+REGISTRATION_PATTERN = re.compile(
+    r'(?i)\b' + _CONTRACTOR_LABEL + r'[ \t]+(?:registration|reg|pan|vat)\b[^\n\r:#]{0,12}[:#][ \t]*([A-Z0-9][A-Z0-9/-]{3,29})'
+)
+CONTRACTOR_NAME_PATTERN = re.compile(
+    r'(?i)\b' + _CONTRACTOR_LABEL + r'(?:[ \t]+name)?[ \t]*[:\-][ \t]*([^\n\r]{3,80})'
+)
+
+
+def normalize_name(name):
+    """'M/S Himalayan Builders Pvt. Ltd.' -> 'himalayan builders'"""
+    words = [w for w in _NAME_WORD.findall((name or '').lower()) if w not in _NAME_NOISE]
+    return ' '.join(words)
+
+
+def is_generic_name(normalized):
+    """True for a normalised name that is a placeholder or label rather than a contractor"""
+    return all(word in _GENERIC_NAME_WORDS or word.isdigit() for word in normalized.split())
+
+
+def find_contractor_name(texts):
+    """First name given next to a contractor/bidder label in the texts, or None"""
+    for text in texts:
+        for match in CONTRACTOR_NAME_PATTERN.finditer(text or ''):
+            name = match.group(1).strip()
+            if not is_generic_name(normalize_name(name)):
+                return name
+    return None
+
+
+def find_registration(texts):
+    """First registration/PAN/VAT number next to a contractor/bidder label (it must contain a digit), or None"""
+    for text in texts:
+        for match in REGISTRATION_PATTERN.finditer(text or ''):
+            number = match.group(1).upper()
+            if any(ch.isdigit() for ch in number):
+                return number
+    return None
+
+
+def profile_keys(name=None, registration=None):
+    """Store keys for a contractor, most specific first"""
+    keys = []
+    if registration:
+        keys.append(f"reg:{re.sub(r'[^A-Z0-9]', '', registration.upper())}")
+    normalized = normalize_name(name)
+    if len(normalized) >= 3 and not is_generic_name(normalized):
+        keys.append(f"name:{normalized}")
+    return keys
+
+
+@contextmanager
+def _locked(path):
+    """Exclusive lock on path + '.lock', held across processes"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + '.lock', 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after 10 seconds; keep waiting
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class ContractorProfileStore:
+    """
+    {key: profile} kept in memory and, with path set, in a JSON file shared by every
+    process (reloaded when another process has changed it, and updated under a file lock
+    so concurrent writers don't lose each other's changes). A profile is
+    {'name', 'registration', 'fields': {field: {'value', 'documents', 'updated_at'}}, 'updated_at'};
+    a contractor's registration and name keys point at the same profile.
+    Without a path the profiles live and die with the process.
+    """
+
+    def __init__(self, path=None, min_confirmations=MIN_CONFIRMATIONS, max_age_days=MAX_AGE_DAYS):
+        self.path = path
+        self.min_confirmations = min_confirmations
+        self.max_age_days = max_age_days
+        self.max_age_seconds = max_age_days * 86400
+        self._profiles = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.updates = 0
+
+    def _reload(self, force=False):
+        """Pick up changes written by other processes (lock held)"""
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp and not force:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self._profiles = json.load(f)
+            self._stamp = stamp
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read contractor profiles from {self.path}: {e}")
+
+    def _write(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False, encoding='utf-8') as tmp:
+                json.dump(self._profiles, tmp, indent=1, sort_keys=True)
+            os.replace(tmp.name, self.path)
+            stat = os.stat(self.path)
+            self._stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            print(f"⚠️ Could not save contractor profiles to {self.path}: {e}")
+
+    def _find(self, keys):
+        for key in keys:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                return key, profile
+        return None, None
+
+    def trusted_fields(self, name=None, registration=None, now=None):
+        """(profile key, {field: value}) of the confirmed, recent fields of a contractor"""
+        now = now or time.time()
+        with self._lock:
+            self._reload()
+            self.lookups += 1
+            key, profile = self._find(profile_keys(name, registration))
+            if profile is None:
+                return None, {}
+            fields = {
+                field: entry['value'] for field, entry in profile['fields'].items()
+                if len(entry['documents']) >= self.min_confirmations and now - entry['updated_at'] <= self.max_age_seconds
+            }
+            if fields:
+                self.hits += 1
+            return key, fields
+
+    def record(self, name, registration, values, document, now=None):
+        """
+        Fold values a document actually stated (never defaults or profile fills) into the
+        contractor's profile. document identifies the document's content: a value repeated by
+        another document gains a confirmation, the same document again adds nothing, and a
+        different value starts over.
+        """
+        keys = profile_keys(name, registration)
+        values = {field: value for field, value in values.items() if field in PROFILE_FIELDS and value is not None}
+        if not keys or not values or document is None:
+            return None
+        now = now or time.time()
+        with self._lock, (_locked(self.path) if self.path else nullcontext()):
+            # Read under the file lock, so an update another process just wrote isn't overwritten
+            self._reload(force=True)
+            _, profile = self._find(keys)
+            if profile is None:
+                profile = {'name': name, 'registration': registration, 'fields': {}}
+            profile = {**profile, 'fields': dict(profile['fields']), 'updated_at': now}
+            profile['registration'] = profile.get('registration') or registration
+            for field, value in values.items():
+                entry = profile['fields'].get(field)
+                documents = [doc for doc in entry['documents'] if doc != document] if entry and entry['value'] == value else []
+                documents = (documents + [document])[-MAX_DOCUMENTS:]
+                profile['fields'][field] = {'value': value, 'documents': documents, 'updated_at': now}
+            for key in profile_keys(profile['name'], profile['registration']) + keys:
+                self._profiles[key] = profile
+            self.updates += 1
+            self._write()
+            return keys[0]
+
+    def stats(self):
+        with self._lock:
+            self._reload()
+            return {
+                'profiles': len({(p.get('name'), p.get('registration')) for p in self._profiles.values()}),
+                'keys': len(self._profiles),
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'updates': self.updates,
+                'path': self.path,
+            }
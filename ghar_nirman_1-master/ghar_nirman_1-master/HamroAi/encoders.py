@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Fitted categorical encoders for the tender winner model
+Codes are learned once at training time and persisted with the model, so inference
+encodes categories exactly as the model saw them during training
+"""
+
+from typing import Dict
+
+import numpy as np
+
+CATEGORICAL_FEATURES = ['contract_name', 'license_category', 'safety_certification']
+
+
+class CategoricalEncoderRegistry:
+    """
+    Category -> code hash maps for every categorical feature.
+    Codes follow LabelEncoder ordering (sorted classes), so training matrices are unchanged.
+    Unseen values either map to UNKNOWN_CODE or raise, depending on handle_unknown.
+    """
+
+    UNKNOWN_CODE = -1
+
+    def __init__(self, features=None, handle_unknown='use_unknown'):
+        if handle_unknown not in ('use_unknown', 'error'):
+            raise ValueError(f"handle_unknown must be 'use_unknown' or 'error', got {handle_unknown!r}")
+        self.features = list(features or CATEGORICAL_FEATURES)
+        self.handle_unknown = handle_unknown
+        self.mappings = {}
+        self.last_unknown_counts = {}
+
+    @property
+    def fitted(self):
+        return all(feature in self.mappings for feature in self.features)
+
+    @staticmethod
+    def _as_strings(values):
+        """Same string coercion as df[feature].astype(str)"""
+        return np.asarray(values).astype(str).astype(object)
+
+    def fit(self, data):
+        """Learn the code map for each feature from a DataFrame or a dict of columns"""
+        for feature in self.features:
+            if feature in data:
+                classes = np.unique(self._as_strings(data[feature]))
+                self.mappings[feature] = {value: code for code, value in enumerate(classes)}
+        return self
+
+    def transform(self, data) -> Dict[str, np.ndarray]:
+        """
+        Encode a whole batch: each distinct value is looked up once in the hash map
+        and the codes are broadcast back to the rows in one vectorized gather
+        """
+        if not self.fitted:
+            raise ValueError("Encoders are not fitted. Train or load the model first.")
+
+        codes = {}
+        self.last_unknown_counts = {}
+        for feature in self.features:
+            if feature not in data:
+                continue
+            mapping = self.mappings[feature]
+            uniques, inverse = np.unique(self._as_strings(data[feature]), return_inverse=True)
+            lookup = np.fromiter(
+                (mapping.get(value, self.UNKNOWN_CODE) for value in uniques),
+                dtype=np.int64, count=len(uniques)
+            )
+
+            unknown = lookup == self.UNKNOWN_CODE
+            if unknown.any():
+                if self.handle_unknown == 'error':
+                    raise ValueError(f"Unseen {feature} values: {list(uniques[unknown][:5])}")
+                self.last_unknown_counts[feature] = int(np.bincount(inverse.reshape(-1), minlength=len(uniques))[unknown].sum())
+
+            codes[feature] = lookup[inverse.reshape(-1)]
+        return codes
+
+    def fit_transform(self, data) -> Dict[str, np.ndarray]:
+        return self.fit(data).transform(data)
+
+    def classes(self, feature):
+        """Known categories of a feature in code order"""
+        mapping = self.mappings.get(feature, {})
+        return sorted(mapping, key=mapping.get)
+
+    def to_dict(self):
+        """Plain-data representation for persisting next to the model"""
+        return {
+            'features': self.features,
+            'handle_unknown': self.handle_unknown,
+            'classes': {feature: self.classes(feature) for feature in self.mappings},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        registry = cls(state.get('features'), state.get('handle_unknown', 'use_unknown'))
+        for feature, classes in state.get('classes', {}).items():
+            registry.mappings[feature] = {value: code for code, value in enumerate(classes)}
+        return registry
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Cost-aware scheduling of PDF extraction jobs
+Each job's cost is estimated before it is queued, from its page count and how many of a
+few sampled pages are scans (images but no fonts). Cheap jobs go to the 'fast' pool and
+expensive ones to the 'heavy' pool, so a long scanned bid never holds up a short digital one.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+from pdfminer.pdftypes import resolve1
+
+try:
+    from . import tender_predictor
+    from .contractor_profiles import ContractorProfileStore
+    from .extraction_tiers import TierCostModel
+    from .tender_predictor import TESSERACT_WORKING, TenderPredictor, _open_pdf
+except ImportError:
+    import tender_predictor
+    from contractor_profiles import ContractorProfileStore
+    from extraction_tiers import TierCostModel
+    from tender_predictor import TESSERACT_WORKING, TenderPredictor, _open_pdf
+
+JOB_CLASSES = ('fast', 'heavy')
+# Pages inspected (evenly spread) to estimate the share of scanned pages
+SAMPLE_PAGES = 5
+# Jobs estimated to take longer than this go to the heavy pool
+FAST_JOB_MAX_MS = 5000
+# Recent jobs kept per class for the wait/run percentiles
+METRICS_WINDOW = 500
+
+
+class JobEstimate(NamedTuple):
+    pages: int
+    sampled: int
+    scanned: int
+    scanned_ratio: float
+    estimated_ms: float
+    job_class: str
+
+
+def _is_scanned(page):
+    """A page that draws images but has no fonts has no text layer to read"""
+    resources = resolve1(page.page_obj.resources) or {}
+    if resolve1(resources.get('Font')):
+        return False
+    xobjects = resolve1(resources.get('XObject')) or {}
+    return any(getattr(resolve1(x).get('Subtype'), 'name', None) == 'Image' for x in xobjects.values())
+
+
+def estimate_job(pdf_source, cost_model=None, sample_pages=SAMPLE_PAGES, fast_max_ms=FAST_JOB_MAX_MS, time_budget=None,
+                 allow_ocr=True):
+    """
+    Expected extraction time without extracting anything: page count times the per-page
+    cost of the text tiers, plus quick OCR for the share of sampled pages that are scans
+    """
+    cost_model = cost_model or TierCostModel()
+    try:
+        with _open_pdf(pdf_source) as pdf:
+            pages = len(pdf.pages)
+            count = min(sample_pages, pages)
+            sample = sorted({round(i * (pages - 1) / max(count - 1, 1)) for i in range(count)})
+            scanned = sum(1 for index in sample if _is_scanned(pdf.pages[index]))
+    except Exception as e:
+        # Unreadable files fail fast in extraction too
+        print(f"⚠️ Could not estimate extraction cost: {e}")
+        return JobEstimate(0, 0, 0, 0.0, 0.0, 'fast')
+
+    ratio = scanned / len(sample) if sample else 0.0
+    page_ms = cost_model.page_ms('text') + cost_model.page_ms('tables')
+    if TESSERACT_WORKING and allow_ocr:
+        page_ms += ratio * cost_model.page_ms('quick_ocr')
+    estimated_ms = pages * page_ms
+    if time_budget is not None:
+        estimated_ms = min(estimated_ms, time_budget * 1000)
+    job_class = 'fast' if estimated_ms <= fast_max_ms else 'heavy'
+    return JobEstimate(pages, len(sample), scanned, round(ratio, 3), round(estimated_ms, 1), job_class)
+
+
+# One predictor per worker process, created on its first job
+_worker_predictor = None
+
+
+def _init_worker(profiles_path):
+    """
+    Contractor profiles of a worker: the shared file, or none at all - a private in-memory
+    store would differ between workers and be lost whenever one is replaced
+    """
+    tender_predictor.CONTRACTOR_PROFILES = ContractorProfileStore(
+        profiles_path, tender_predictor.CONTRACTOR_PROFILE_MIN_CONFIRMATIONS,
+        tender_predictor.CONTRACTOR_PROFILE_MAX_AGE_DAYS
+    ) if profiles_path else None
+
+
+def _warm_worker():
+    global _worker_predictor
+    if _worker_predictor is None:
+        _worker_predictor = TenderPredictor()
+    return True
+
+
+def _extract_job(pdf_source, time_budget, allow_ocr=True, duplicates=None):
+    """Worker-process side of a job: (data, extraction info, start time, finish time)"""
+    started_at = time.time()
+    _warm_worker()
+    data = _worker_predictor.extract_data_from_pdf(pdf_source, time_budget, allow_ocr, duplicates)
+    return data, _worker_predictor.last_extraction_info, started_at, time.time()
+
+
+class ExtractionScheduler:
+    """
+    Runs extract_data_from_pdf in two process pools, routing each job by its estimated
+    cost. Pools are started on first use, so the scheduler can be created before a
+    pre-forking server forks. pdf_source must be a path or bytes (it is sent to a worker).
+    Workers share contractor profiles through profiles_path (default CONTRACTOR_PROFILES_PATH);
+    without one they extract without profiles.
+    """
+
+    def __init__(self, fast_workers=2, heavy_workers=1, time_budget=None,
+                 fast_max_ms=FAST_JOB_MAX_MS, sample_pages=SAMPLE_PAGES, profiles_path=None):
+        self.workers = {'fast': fast_workers, 'heavy': heavy_workers}
+        self.time_budget = time_budget
+        self.profiles_path = profiles_path or tender_predictor.CONTRACTOR_PROFILES_PATH
+        if not self.profiles_path:
+            print("⚠️ No CONTRACTOR_PROFILES_PATH - extraction workers run without contractor profiles")
+        self.fast_max_ms = fast_max_ms
+        self.sample_pages = sample_pages
+        # Refined from the tier timings workers report back
+        self.cost_model = TierCostModel()
+        self._pools = {}
+        self._lock = threading.Lock()
+
+        self.jobs = {job_class: 0 for job_class in JOB_CLASSES}
+        self.in_flight = {job_class: 0 for job_class in JOB_CLASSES}
+        self.failed = {job_class: 0 for job_class in JOB_CLASSES}
+        self._wait_ms = {job_class: deque(maxlen=METRICS_WINDOW) for job_class in JOB_CLASSES}
+        self._run_ms = {job_class: deque(maxlen=METRICS_WINDOW) for job_class in JOB_CLASSES}
+
+    def _pool(self, job_class):
+        with self._lock:
+            pool = self._pools.get(job_class)
+            if pool is None:
+                # spawn: workers never inherit the server's threads or sockets
+                pool = self._pools[job_class] = ProcessPoolExecutor(
+                    max_workers=self.workers[job_class], mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker, initargs=(self.profiles_path,)
+                )
+            return pool
+
+    def warm(self):
+        """Start every worker and load the extractor in it ahead of the first job"""
+        for job_class in JOB_CLASSES:
+            pool = self._pool(job_class)
+            for _ in range(self.workers[job_class]):
+                pool.submit(_warm_worker)
+
+    def estimate(self, pdf_source, allow_ocr=True):
+        return estimate_job(pdf_source, self.cost_model, self.sample_pages, self.fast_max_ms, self.time_budget, allow_ocr)
+
+    def queue_depth(self):
+        """Jobs submitted but not yet picked up by a worker"""
+        with self._lock:
+            return sum(max(self.in_flight[c] - self.workers[c], 0) for c in JOB_CLASSES)
+
+    async def extract(self, pdf_source, allow_ocr=True, duplicates=None):
+        """
+        (extracted data, extraction info with a 'job' entry) for one PDF; allow_ocr=False reads
+        text only, and duplicates (a near_duplicates.TenderIndex) lets near-duplicates stop after the text
+        """
+        estimate = await asyncio.to_thread(self.estimate, pdf_source, allow_ocr)
+        job_class = estimate.job_class
+        with self._lock:
+            self.jobs[job_class] += 1
+            self.in_flight[job_class] += 1
+
+        submitted_at = time.time()
+        try:
+            future = self._pool(job_class).submit(_extract_job, pdf_source, self.time_budget, allow_ocr, duplicates)
+            data, info, started_at, finished_at = await asyncio.wrap_future(future)
+        except Exception:
+            with self._lock:
+                self.failed[job_class] += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight[job_class] -= 1
+
+        wait_ms = max(started_at - submitted_at, 0.0) * 1000
+        run_ms = (finished_at - started_at) * 1000
+        with self._lock:
+            self._wait_ms[job_class].append(wait_ms)
+            self._run_ms[job_class].append(run_ms)
+            for tier, tier_info in info.get('tiers', {}).items():
+                self.cost_model.observe(tier, tier_info['pages'], tier_info['ms'], tier_info['fields_found'])
+
+        info = dict(info)
+        info['job'] = {
+            **estimate._asdict(),
+            'queue_wait_ms': round(wait_ms, 1),
+            'run_ms': round(run_ms, 1),
+        }
+        return data, info
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            report = {}
+            for job_class in JOB_CLASSES:
+                waits = np.asarray(self._wait_ms[job_class])
+                runs = np.asarray(self._run_ms[job_class])
+                report[job_class] = {
+                    'workers': self.workers[job_class],
+                    'jobs': self.jobs[job_class],
+                    'in_flight': self.in_flight[job_class],
+                    'failed': self.failed[job_class],
+                    'queue_wait_ms_p50': round(float(np.percentile(waits, 50)), 1) if waits.size else None,
+                    'queue_wait_ms_p95': round(float(np.percentile(waits, 95)), 1) if waits.size else None,
+                    'queue_wait_ms_max': round(float(waits.max()), 1) if waits.size else None,
+                    'run_ms_p50': round(float(np.percentile(runs, 50)), 1) if runs.size else None,
+                }
+            report['fast_max_ms'] = self.fast_max_ms
+            return report
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Deadline-aware scheduling of the PDF extraction tiers
+Page text is always read first; the other tiers (tables, quick OCR, enhanced patterns,
+multi-config OCR) run in order of expected fields per millisecond, using running
+(EWMA) estimates of what each tier costs and finds per page, until the time budget is spent
+"""
+
+import math
+import time
+
+TEXT_TIER = 'text'
+TIERS = ('text', 'tables', 'quick_ocr', 'enhanced', 'deep_ocr')
+
+# Fields a tier can produce (None: any field)
+TIER_FIELDS = {
+    'text': None,
+    'tables': None,
+    'quick_ocr': None,
+    'enhanced': ('contract_name', 'project_duration', 'warranty_period', 'project_success_rate', 'bid_amount'),
+    'deep_ocr': ('bid_amount',),
+}
+# Starting estimates per page: (milliseconds, fields found); refined as documents are processed
+TIER_PRIORS = {
+    'text': (100.0, 2.0),
+    'tables': (10.0, 0.5),
+    'quick_ocr': (1500.0, 2.0),
+    'enhanced': (1.0, 0.05),
+    'deep_ocr': (8000.0, 0.3),
+}
+# Fallback tiers only look for what the page tiers left missing, so they wait for these
+# to run (or be ruled out) first
+TIER_AFTER = {
+    'enhanced': ('tables', 'quick_ocr'),
+    'deep_ocr': ('tables', 'quick_ocr', 'enhanced'),
+}
+# Table values take precedence over page text, so tables are still worth something
+# for fields the text already gave; counted as this fraction of a missing field
+OVERRIDE_VALUE = 0.25
+EWMA_ALPHA = 0.2
+
+
+class ExtractionDeadline:
+    """Wall-clock budget for one document; seconds=None never expires"""
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.started = time.perf_counter()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def remaining_ms(self):
+        if self.seconds is None:
+            return math.inf
+        return self.seconds * 1000 - self.elapsed_ms()
+
+    @property
+    def expired(self):
+        return self.remaining_ms() <= 0
+
+    def allows(self, estimated_ms):
+        """Whether work expected to take estimated_ms still fits"""
+        return self.seconds is None or estimated_ms <= self.remaining_ms()
+
+
+class TierCostModel:
+    """Running per-page cost and yield of each tier, shared by every document a process extracts"""
+
+    def __init__(self, priors=None, alpha=EWMA_ALPHA):
+        priors = priors or TIER_PRIORS
+        self.alpha = alpha
+        self.ms_per_page = {tier: ms for tier, (ms, _) in priors.items()}
+        self.fields_per_page = {tier: found for tier, (_, found) in priors.items()}
+
+    def observe(self, tier, pages, elapsed_ms, fields_found):
+        if pages <= 0:
+            return
+        a = self.alpha
+        self.ms_per_page[tier] = (1 - a) * self.ms_per_page[tier] + a * (elapsed_ms / pages)
+        self.fields_per_page[tier] = (1 - a) * self.fields_per_page[tier] + a * (fields_found / pages)
+
+    def page_ms(self, tier):
+        return self.ms_per_page[tier]
+
+    def value_per_ms(self, tier, pages, missing, found):
+        """Expected fields gained per millisecond if tier runs over `pages` pages"""
+        if pages <= 0:
+            return 0.0
+        fields = TIER_FIELDS[tier]
+        wanted = sum(1 for f in missing if fields is None or f in fields)
+        if tier == 'tables':
+            wanted += OVERRIDE_VALUE * sum(1 for f in found if fields is None or f in fields)
+        if not wanted:
+            return 0.0
+        expected = min(self.fields_per_page[tier] * pages, wanted)
+        return expected / max(self.ms_per_page[tier] * pages, 1e-3)
+
+    def stats(self):
+        return {
+            tier: {'ms_per_page': round(self.ms_per_page[tier], 3),
+                   'fields_per_page': round(self.fields_per_page[tier], 3)}
+            for tier in self.ms_per_page
+        }
+
+
+def next_tier(model, candidates, missing, found):
+    """
+    Highest value-per-ms tier among candidates ({tier: eligible page count}) whose
+    prerequisites are settled, or None when no remaining tier can add anything
+    """
+    values = {tier: model.value_per_ms(tier, pages, missing, found) for tier, pages in candidates.items()}
+    ready = [
+        tier for tier, value in values.items()
+        if value > 0 and not any(values.get(before, 0) > 0 for before in TIER_AFTER.get(tier, ()))
+    ]
+    return max(ready, key=values.get, default=None)
+
+
+class TierReport:
+    """What each tier did for one document: time spent, pages covered and how it ended"""
+
+    def __init__(self):
+        self.tiers = {}
+
+    def record(self, tier, status, elapsed_ms=0.0, pages=0, fields_found=0, reused=0):
+        self.tiers[tier] = {
+            'status': status,  # done / partial (deadline hit) / skipped_deadline / not_needed / near_duplicate / unavailable / disabled
+            'ms': round(elapsed_ms, 1),
+            'pages': pages,
+            'reused': reused,  # pages whose result came from the page cache (not in pages or fields_found)
+            'fields_found': fields_found,
+        }
+
+    def cut_by_deadline(self):
+        return [tier for tier, info in self.tiers.items() if info['status'] in ('partial', 'skipped_deadline')]
+
+    def tier_ms(self):
+        return {tier: info['ms'] for tier, info in self.tiers.items()}
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Pandas-free inference path for the tender winner model
+Maps bid dicts straight into a preallocated float32 matrix in the training feature order
+"""
+
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    from .encoders import CATEGORICAL_FEATURES
+except ImportError:
+    from encoders import CATEGORICAL_FEATURES
+
+# Feature order used by TenderPredictor.preprocess_data - the model depends on it
+NUMERIC_FEATURES = [
+    'project_duration', 'warranty_period', 'client_rating',
+    'project_success_rate', 'rejection_history', 'bid_amount'
+]
+RATIO_FEATURES = ['bid_per_duration', 'success_to_rating_ratio', 'warranty_to_duration_ratio']
+FEATURE_COLUMNS = NUMERIC_FEATURES + RATIO_FEATURES + [f'{feature}_encoded' for feature in CATEGORICAL_FEATURES]
+
+FLOAT_FIELDS = ['bid_amount', 'project_success_rate', 'client_rating']
+INT_FIELDS = ['project_duration', 'warranty_period', 'rejection_history']
+MISSING_MARKERS = {'none', 'unknown', 'nan', ''}
+
+
+class CompiledPredictor:
+    """
+    Low-latency replacement for process_database_data -> preprocess_data -> scaler -> predict/predict_proba.
+    The intermediate scaling is done in float64 (like StandardScaler) and written into the
+    float32 buffer the booster consumes, so outputs match the pandas pipeline exactly.
+    """
+
+    def __init__(self, model, scaler, encoders=None, initial_rows=64):
+        self.model = model
+        self.encoders = encoders if encoders is not None and encoders.fitted else None
+        self.booster = model.get_booster()
+        n_features = len(FEATURE_COLUMNS)
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler.with_mean else np.zeros(n_features)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler.with_std else np.ones(n_features)
+        if self.mean.shape[0] != n_features:
+            raise ValueError(f"Scaler expects {self.mean.shape[0]} features, compiled path builds {n_features}")
+
+        try:
+            self.iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+
+        self._raw = np.empty((initial_rows, n_features), dtype=np.float64)
+        self._matrix = np.empty((initial_rows, n_features), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def _ensure_capacity(self, n_rows):
+        """Grow the preallocated buffers (doubling) when a larger batch arrives"""
+        capacity = self._matrix.shape[0]
+        if n_rows <= capacity:
+            return
+        while capacity < n_rows:
+            capacity *= 2
+        self._raw = np.empty((capacity, self._raw.shape[1]), dtype=np.float64)
+        self._matrix = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+
+    @staticmethod
+    def records_to_columns(records: List[Dict]) -> Dict[str, np.ndarray]:
+        """
+        Gather bid dicts into typed columns, applying the same conversions and
+        missing-value fills as process_database_data. Returns None if a required
+        parameter is missing for every bid.
+        """
+        n_rows = len(records)
+        columns = {}
+
+        for field in FLOAT_FIELDS + INT_FIELDS:
+            cast = float if field in FLOAT_FIELDS else int
+            values = np.array(
+                [np.nan if record.get(field) is None else cast(record.get(field)) for record in records],
+                dtype=np.float64
+            )
+            missing = np.isnan(values)
+            if missing.all():
+                print(f"❌ Missing required parameters: ['{field}']")
+                return None
+            if missing.any():
+                values[missing] = np.median(values[~missing])
+            columns[field] = values
+
+        contract_names = [record.get('contract_name') for record in records]
+        columns['contract_name'] = np.array(
+            [name if name else f"Contract_{i+1}" for i, name in enumerate(contract_names)],
+            dtype=object
+        )
+        columns['license_category'] = np.array(
+            ['C3' if record.get('license_category') is None else record.get('license_category') for record in records],
+            dtype=object
+        )
+        columns['safety_certification'] = np.array(
+            ['No' if record.get('safety_certification') is None else str(record.get('safety_certification'))
+             for record in records],
+            dtype=object
+        )
+
+        for field in CATEGORICAL_FEATURES:
+            as_text = columns[field].astype(str)
+            columns[field] = as_text.astype(object)
+            if n_rows and all(value.lower() in MISSING_MARKERS for value in as_text):
+                print(f"❌ Missing required parameters: ['{field}']")
+                return None
+
+        return columns
+
+    def encode_categories(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Codes from the fitted encoder registry, or per-batch codes for models saved without one"""
+        if self.encoders is not None:
+            return self.encoders.transform(columns)
+        return {
+            field: np.unique(columns[field], return_inverse=True)[1].reshape(-1)
+            for field in CATEGORICAL_FEATURES
+        }
+
+    def transform_columns(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """Fill the preallocated float32 matrix with scaled features in FEATURE_COLUMNS order"""
+        n_rows = len(columns['bid_amount'])
+        self._ensure_capacity(n_rows)
+        raw = self._raw[:n_rows]
+        matrix = self._matrix[:n_rows]
+
+        for j, field in enumerate(NUMERIC_FEATURES):
+            raw[:, j] = columns[field]
+
+        duration = raw[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(raw[:, 5], duration, out=raw[:, 6])                 # bid_per_duration
+            np.divide(raw[:, 3], raw[:, 2], out=raw[:, 7])                # success_to_rating_ratio
+            np.divide(raw[:, 1], duration, out=raw[:, 8])                 # warranty_to_duration_ratio
+
+        codes = self.encode_categories(columns)
+        offset = len(NUMERIC_FEATURES) + len(RATIO_FEATURES)
+        for j, field in enumerate(CATEGORICAL_FEATURES):
+            raw[:, offset + j] = codes[field]
+
+        np.subtract(raw, self.mean, out=raw)
+        np.divide(raw, self.scale, out=matrix, casting='same_kind')
+        return matrix
+
+    def predict_columns(self, columns: Dict[str, np.ndarray]):
+        """Labels and win probabilities from a single booster call"""
+        with self._lock:
+            matrix = self.transform_columns(columns)
+            probabilities = self.booster.inplace_predict(matrix, iteration_range=self.iteration_range)
+
+        probabilities = np.asarray(probabilities)
+        if probabilities.ndim == 2:
+            labels = np.argmax(probabilities, axis=1)
+            probabilities = probabilities[:, 1]
+        else:
+            labels = (probabilities > 0.5).astype(np.int64)
+        return labels, probabilities
+
+    def predict_records(self, records: List[Dict]):
+        """Predict winners for raw bid dicts (API / database records)"""
+        if not records:
+            print("No data to predict")
+            return None, None
+        columns = self.records_to_columns(records)
+        if columns is None:
+            return None, None
+        return self.predict_columns(columns)
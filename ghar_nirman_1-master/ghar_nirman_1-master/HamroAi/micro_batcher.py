@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Micro-batching request coalescer
+Gathers single-row requests that arrive within a short window (or up to N rows)
+and runs them as one vectorized inference call, then fans results back to callers
+"""
+
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    predict_fn takes an (n_rows, n_features) array and returns a tuple of length-n arrays.
+    Each caller gets back a tuple with its own row of every output array.
+    While one batch is running, new requests queue up, so batches grow with load.
+    """
+
+    def __init__(self, predict_fn, max_wait_ms=2.0, max_batch_rows=64, history=1000):
+        self.predict_fn = predict_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_rows = max(1, int(max_batch_rows))
+
+        self._loop = None
+        self._queue = None
+        self._batch_full = None
+        self._worker = None
+
+        self.batches = 0
+        self.rows = 0
+        self.failed_batches = 0
+        self._batch_sizes = deque(maxlen=history)
+        self._queue_waits_ms = deque(maxlen=history)
+
+    def _ensure_worker(self):
+        """Start the collector task on the running event loop (restarted if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._batch_full = asyncio.Event()
+            self._worker = loop.create_task(self._collect())
+
+    async def submit(self, row):
+        """Queue one feature row and wait for its share of the batch result"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((row, future, time.perf_counter()))
+        if self._queue.qsize() >= self.max_batch_rows:
+            self._batch_full.set()
+        return await future
+
+    async def _collect(self):
+        while True:
+            first = await self._queue.get()
+
+            # Wait out the window unless enough rows are already queued
+            if self._queue.qsize() + 1 < self.max_batch_rows:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+
+            batch = [first]
+            while len(batch) < self.max_batch_rows and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if self._queue.qsize() >= self.max_batch_rows:
+                self._batch_full.set()
+
+            await self._execute(batch)
+
+    async def _execute(self, batch):
+        started = time.perf_counter()
+        rows = np.asarray([item[0] for item in batch])
+
+        try:
+            results = await self._loop.run_in_executor(None, self.predict_fn, rows)
+        except Exception as e:
+            self.failed_batches += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, (_, future, _) in enumerate(batch):
+            if not future.done():
+                future.set_result(tuple(output[i] for output in results))
+
+        self.batches += 1
+        self.rows += len(batch)
+        self._batch_sizes.append(len(batch))
+        self._queue_waits_ms.extend((started - enqueued) * 1000 for _, _, enqueued in batch)
+
+    def metrics(self):
+        """Batch-size and queue-wait statistics over the recent history"""
+        sizes = np.asarray(self._batch_sizes, dtype=np.float64)
+        waits = np.asarray(self._queue_waits_ms, dtype=np.float64)
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "failed_batches": self.failed_batches,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "config": {"max_wait_ms": self.max_wait * 1000, "max_batch_rows": self.max_batch_rows},
+            "batch_size": {
+                "mean": float(sizes.mean()) if sizes.size else 0.0,
+                "p50": float(np.percentile(sizes, 50)) if sizes.size else 0.0,
+                "max": int(sizes.max()) if sizes.size else 0,
+            },
+            "queue_wait_ms": {
+                "p50": float(np.percentile(waits, 50)) if waits.size else 0.0,
+                "p95": float(np.percentile(waits, 95)) if waits.size else 0.0,
+                "max": float(waits.max()) if waits.size else 0.0,
+            },
+        }
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Model artifact loading for the AI microservice
+Artifacts are re-exported uncompressed next to the pickles so their NumPy arrays can be
+memory-mapped read-only and shared through the page cache by every worker process
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+import joblib
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ARTIFACT_FILES = {
+    'model': 'xgboost_model.pkl',
+    'scaler': 'scaler.pkl',
+    'kmeans': 'kmeans.pkl',
+}
+MMAP_CACHE_DIR = '.model_cache'
+# Exported versions kept on disk (current + previous, for rollback)
+MMAP_CACHE_KEEP = 2
+
+
+def resident_memory_mb():
+    """Current resident set size of this process in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+    return None
+
+
+def artifact_version(artifact_dir):
+    """Short content hash of the artifact files - changes whenever any of them is replaced"""
+    digest = hashlib.sha256()
+    for name in sorted(ARTIFACT_FILES):
+        with open(os.path.join(artifact_dir, ARTIFACT_FILES[name]), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def export_mmap_artifacts(artifact_dir, version):
+    """
+    Write uncompressed joblib copies that support mmap_mode='r'.
+    Files are named by version and written via rename, so concurrent workers never see partial files.
+    """
+    cache_dir = os.path.join(artifact_dir, MMAP_CACHE_DIR, version)
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = {}
+    for name, filename in ARTIFACT_FILES.items():
+        target = os.path.join(cache_dir, f'{name}.joblib')
+        if not os.path.exists(target):
+            obj = joblib.load(os.path.join(artifact_dir, filename))
+            tmp_path = f'{target}.{os.getpid()}.tmp'
+            joblib.dump(obj, tmp_path)
+            os.replace(tmp_path, target)
+        paths[name] = target
+    _prune_mmap_cache(os.path.join(artifact_dir, MMAP_CACHE_DIR))
+    return paths
+
+
+def _prune_mmap_cache(cache_root):
+    """Drop exported versions beyond the newest MMAP_CACHE_KEEP (already-mapped files stay valid)"""
+    versions = sorted(
+        (entry for entry in os.scandir(cache_root) if entry.is_dir()),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in versions[MMAP_CACHE_KEEP:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+class ModelArtifacts:
+    """One loaded version of the model, scaler and kmeans"""
+
+    def __init__(self, model, scaler, kmeans, version, load_seconds=0.0, rss_mb=None, mmap=False):
+        self.model = model
+        self.scaler = scaler
+        self.kmeans = kmeans
+        self.version = version
+        self.load_seconds = load_seconds
+        self.rss_mb = rss_mb
+        self.mmap = mmap
+        self.loaded_at = time.time()
+
+    def info(self):
+        return {
+            'version': self.version,
+            'load_seconds': round(self.load_seconds, 4),
+            'rss_mb': round(self.rss_mb, 1) if self.rss_mb is not None else None,
+            'mmap': self.mmap,
+            'loaded_at': self.loaded_at,
+        }
+
+
+def load_artifacts(artifact_dir, mmap=True):
+    """
+    Load model, scaler and kmeans from artifact_dir.
+    With mmap=True the arrays are memory-mapped read-only from the uncompressed cache;
+    if the cache cannot be written, the pickles are loaded as before.
+    """
+    start = time.perf_counter()
+    version = artifact_version(artifact_dir)
+    loaded = {}
+
+    mapped = False
+    if mmap:
+        try:
+            paths = export_mmap_artifacts(artifact_dir, version)
+            loaded = {name: joblib.load(path, mmap_mode='r') for name, path in paths.items()}
+            mapped = True
+        except OSError as e:
+            print(f"⚠️  Memory-mapped artifacts unavailable ({e}), loading pickles instead")
+
+    if not mapped:
+        loaded = {
+            name: joblib.load(os.path.join(artifact_dir, filename))
+            for name, filename in ARTIFACT_FILES.items()
+        }
+
+    artifacts = ModelArtifacts(
+        loaded['model'], loaded['scaler'], loaded['kmeans'], version,
+        load_seconds=time.perf_counter() - start,
+        rss_mb=resident_memory_mb(),
+        mmap=mapped,
+    )
+    rss = f"{artifacts.rss_mb:.1f} MB" if artifacts.rss_mb is not None else "n/a"
+    print(f"📦 Loaded model artifacts {version} in {artifacts.load_seconds:.3f}s "
+          f"(pid {os.getpid()}, mmap={mapped}, RSS {rss})")
+    return artifacts
+
+
+def validate_artifacts(artifacts):
+    """Smoke prediction on the scaler's mean row - raises if the artifacts don't work together"""
+    row = np.asarray(artifacts.scaler.mean_, dtype=np.float64).reshape(1, -1)
+    scaled = artifacts.scaler.transform(row)
+    clusters = artifacts.kmeans.predict(scaled)
+    probabilities = artifacts.model.predict_proba(scaled)
+    if clusters.shape != (1,) or probabilities.shape[0] != 1 or not np.isfinite(probabilities).all():
+        raise ValueError(f"smoke prediction returned clusters {clusters!r}, probabilities {probabilities!r}")
+
+
+class ModelRegistry:
+    """
+    Holds the active artifact version and the previous one for instant rollback.
+    A watcher thread polls the artifact files; when they change, the new version is
+    loaded and validated in the background and then swapped in with a single assignment,
+    so each request keeps using whichever version it picked up at its start.
+    """
+
+    def __init__(self, artifact_dir, mmap=True, poll_seconds=5.0):
+        self.artifact_dir = artifact_dir
+        self.mmap = mmap
+        self.poll_seconds = poll_seconds
+        self.active = None
+        self.previous = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._seen_signature = None
+
+    def _signature(self):
+        """Cheap change detector: size and mtime of every artifact file"""
+        signature = []
+        for filename in sorted(ARTIFACT_FILES.values()):
+            stat = os.stat(os.path.join(self.artifact_dir, filename))
+            signature.append((filename, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def get(self):
+        """Active artifacts, loading them on first use"""
+        active = self.active
+        if active is None:
+            with self._lock:
+                if self.active is None:
+                    self._seen_signature = self._signature()
+                    candidate = load_artifacts(self.artifact_dir, mmap=self.mmap)
+                    validate_artifacts(candidate)
+                    self.active = candidate
+                active = self.active
+        return active
+
+    def reload(self):
+        """Load, validate and swap in the artifacts on disk if their version differs. Returns True on swap."""
+        self._seen_signature = self._signature()
+        version = artifact_version(self.artifact_dir)
+        if self.active is not None and version == self.active.version:
+            return False
+
+        try:
+            candidate = load_artifacts(self.artifact_dir, mmap=self.mmap)
+            validate_artifacts(candidate)
+        except Exception as e:
+            self.failed_reloads += 1
+            self.last_error = f"{version}: {e}"
+            print(f"❌ Model version {version} rejected, keeping {self.active.version if self.active else None}: {e}")
+            return False
+
+        with self._lock:
+            self.previous, self.active = self.active, candidate
+            self.reloads += 1
+            self.last_error = None
+        print(f"🔄 Swapped in model version {candidate.version}"
+              f" (previous {self.previous.version if self.previous else None})")
+        return True
+
+    def rollback(self):
+        """Swap the previous version back in. Returns False if there is none."""
+        with self._lock:
+            if self.previous is None:
+                return False
+            self.active, self.previous = self.previous, self.active
+        print(f"⏪ Rolled back to model version {self.active.version}")
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                if self._signature() != self._seen_signature:
+                    self.reload()
+            except Exception as e:
+                self.failed_reloads += 1
+                self.last_error = str(e)
+                print(f"⚠️  Model watcher error: {e}")
+
+    def start_watching(self):
+        if self.poll_seconds <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_seconds + 1)
+            self._watcher = None
+
+    def info(self):
+        return {
+            'active': self.active.info() if self.active else None,
+            'previous': self.previous.version if self.previous else None,
+            'reloads': self.reloads,
+            'failed_reloads': self.failed_reloads,
+            'last_error': self.last_error,
+            'watching': self._watcher is not None and self._watcher.is_alive(),
+        }
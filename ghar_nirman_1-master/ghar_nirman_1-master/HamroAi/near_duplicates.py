@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate detection for documents submitted to the same tender
+Extracted page text is cut into word shingles and summarised as a MinHash signature;
+an LSH index (banded signatures) per tender finds earlier submissions with similar text
+without comparing against every one, so copy-paste bids are flagged at upload time and
+a close enough match can stand in for the expensive extraction tiers.
+"""
+
+import copy
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+BANDS = 32
+ROWS = 4  # BANDS * ROWS == NUM_PERM; documents sharing any band are compared
+# Submissions at least this similar (estimated Jaccard of their shingles) are reported
+FLAG_SIMILARITY = 0.8
+# At this similarity only the page text is read; the other fields come from the earlier extraction
+REUSE_SIMILARITY = 0.95
+
+_WORD = re.compile(r'[a-z0-9]+')
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+# Shingles hashed per numpy step, to bound the (chunk x NUM_PERM) working array
+_CHUNK = 4096
+
+
+def shingle_hashes(texts, k=SHINGLE_WORDS):
+    """crc32 of every distinct k-word shingle across the texts (lower-cased words only)"""
+    words = _WORD.findall(' '.join(text for text in texts if text).lower())
+    shingles = {' '.join(words[i:i + k]) for i in range(max(len(words) - k + 1, 1))} if words else set()
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+class MinHasher:
+    """NUM_PERM universal hash functions (a*x + b mod 2^61-1), fixed by seed so signatures are comparable"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        """Minimum hash per permutation as uint32, or None for a document without words"""
+        if not len(hashes):
+            return None
+        signature = np.full(len(self.a), _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), _CHUNK):
+            chunk = hashes[start:start + _CHUNK]
+            # uint64 products wrap around; the mix stays a good hash, as in the usual MinHash implementations
+            values = ((np.outer(chunk, self.a) + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, values.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+
+_DEFAULT_HASHER = MinHasher()
+
+
+def document_signature(texts, hasher=None):
+    """MinHash signature of a document's page texts (None when there is no text to compare)"""
+    return (hasher or _DEFAULT_HASHER).signature(shingle_hashes(texts))
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity: the share of permutations whose minimum agrees"""
+    return float(np.mean(np.asarray(signature) == np.asarray(other)))
+
+
+class DuplicateMatch(NamedTuple):
+    document: str
+    similarity: float
+
+
+class TenderIndex:
+    """
+    LSH buckets over the signatures of one tender's documents. Small and picklable, so a
+    copy can travel with an extraction job. Holds at most max_documents, oldest dropped first.
+    """
+
+    def __init__(self, bands=BANDS, rows=ROWS, reuse_similarity=REUSE_SIMILARITY, max_documents=500):
+        self.bands = bands
+        self.rows = rows
+        self.reuse_similarity = reuse_similarity
+        self.max_documents = max_documents
+        self.signatures = OrderedDict()  # document -> signature
+        self._buckets = [{} for _ in range(bands)]  # per band: band bytes -> set of documents
+
+    def _band_keys(self, signature):
+        signature = np.asarray(signature, dtype=np.uint32)
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, document, signature):
+        self.remove(document)
+        self.signatures[document] = np.asarray(signature, dtype=np.uint32)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, set()).add(document)
+        while len(self.signatures) > self.max_documents:
+            self.remove(next(iter(self.signatures)))
+
+    def remove(self, document):
+        signature = self.signatures.pop(document, None)
+        if signature is None:
+            return
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            members = bucket.get(key)
+            if members is not None:
+                members.discard(document)
+                if not members:
+                    del bucket[key]
+
+    def query(self, signature, min_similarity=FLAG_SIMILARITY, document=None):
+        """Other indexed documents (not document itself) at least min_similarity alike, most similar first"""
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        candidates.discard(document)
+        matches = [DuplicateMatch(doc, round(similarity(signature, self.signatures[doc]), 3)) for doc in candidates]
+        return sorted((m for m in matches if m.similarity >= min_similarity), key=lambda m: (-m.similarity, m.document))
+
+    def reusable(self, signature, document=None):
+        """Best match (other than document) similar enough to reuse its extraction, or None"""
+        matches = self.query(signature, self.reuse_similarity, document)
+        return matches[0] if matches else None
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+def fill_from_prior(data, info, prior_data, prior_defaulted):
+    """
+    Fields the short extraction had to default (or couldn't set), taken from an earlier
+    extraction that read them. Whatever the page text gave is kept, so a changed price
+    page still wins. Returns (data, filled field names).
+    """
+    data = dict(data)
+    guessed = set(info.get('defaulted_fields', [])) | set(info.get('missing_fields', []))
+    filled = [
+        field for field in sorted(guessed)
+        if prior_data.get(field) is not None and field not in prior_defaulted
+    ]
+    for field in filled:
+        data[field] = prior_data[field]
+    return data, filled
+
+
+class NearDuplicateIndex:
+    """
+    Per-tender indexes plus the extraction each indexed document produced. Kept for the
+    max_tenders most recently used tenders.
+    """
+
+    def __init__(self, flag_similarity=FLAG_SIMILARITY, reuse_similarity=REUSE_SIMILARITY,
+                 max_tenders=256, max_documents=500):
+        self.flag_similarity = flag_similarity
+        self.reuse_similarity = reuse_similarity
+        self.max_tenders = max_tenders
+        self.max_documents = max_documents
+        self._tenders = OrderedDict()  # tender_id -> TenderIndex
+        self._results = {}  # tender_id -> {document: (data, defaulted fields)}
+        self._lock = threading.Lock()
+
+        self.checked = 0
+        self.flagged = 0
+        self.reused = 0
+
+    def snapshot(self, tender_id, document=None):
+        """
+        Copy of a tender's index to send with an extraction job of document (left out of the
+        copy, so a resubmission isn't matched against itself), or None if there's nothing to match
+        """
+        with self._lock:
+            index = self._tenders.get(tender_id)
+            if not index:
+                return None
+            index = copy.deepcopy(index)
+            index.remove(document)
+            return index if index else None
+
+    def check(self, tender_id, signature, document=None):
+        """Earlier documents of the tender, other than document itself, that this signature nearly duplicates"""
+        with self._lock:
+            self.checked += 1
+            index = self._tenders.get(tender_id)
+            matches = index.query(signature, self.flag_similarity, document) if index else []
+            if matches:
+                self.flagged += 1
+            return matches
+
+    def prior(self, tender_id, document):
+        """(data, defaulted fields) extracted from an indexed document, or None once it's dropped"""
+        with self._lock:
+            result = self._results.get(tender_id, {}).get(document)
+            if result is not None:
+                self.reused += 1
+            return result
+
+    def add(self, tender_id, document, signature, data, defaulted_fields):
+        with self._lock:
+            index = self._tenders.get(tender_id)
+            if index is None:
+                index = self._tenders[tender_id] = TenderIndex(
+                    reuse_similarity=self.reuse_similarity, max_documents=self.max_documents
+                )
+            self._tenders.move_to_end(tender_id)
+            index.add(document, signature)
+            results = self._results.setdefault(tender_id, {})
+            results[document] = (dict(data), list(defaulted_fields))
+            # Results of documents the index dropped are no use any more
+            for dropped in [doc for doc in results if doc not in index.signatures]:
+                del results[dropped]
+            while len(self._tenders) > self.max_tenders:
+                dropped, _ = self._tenders.popitem(last=False)
+                self._results.pop(dropped, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tenders': len(self._tenders),
+                'documents': sum(len(index) for index in self._tenders.values()),
+                'checked': self.checked,
+                'flagged': self.flagged,
+                'reused': self.reused,
+                'flag_similarity': self.flag_similarity,
+                'reuse_similarity': self.reuse_similarity,
+            }
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Keyword-indexed key/value parser for OCR text
+The field patterns are compiled once at import. A single multi-keyword scan over the
+whole text finds the lines that mention a field's trigger words, and only those
+fields' patterns run on those lines, so cost follows the candidate lines instead of
+lines x patterns
+"""
+
+import bisect
+import re
+from typing import Dict, List, Set
+
+# Patterns per field, tried in order; the first line (then pattern) that yields a
+# convertible value wins for that field. Captures that must convert to a number are
+# written so the value and the separator around it can't compete for the same
+# characters (regex_guard.find_superlinear_risks)
+OCR_FIELD_PATTERNS = {
+    'contract_name': [
+        r'(?i)Contract Name:\s*([^\n\r]+)',
+        r'(?i)Project Name:\s*([^\n\r]+)',
+        r'(?i)Tender Name:\s*([^\n\r]+)',
+        r'(?i)Work Description:\s*([^\n\r]+)',
+        r'(?i)Contract Title:\s*([^\n\r]+)',
+        r'(?i)Project Title:\s*([^\n\r]+)',
+        r'(?i)Name of Work:\s*([^\n\r]+)',
+        r'(?i)Description of Work:\s*([^\n\r]+)',
+        r'(?i)Name\s*of\s*Work:\s*([^\n\r]+)',
+        r'(?i)Description\s*of\s*Work:\s*([^\n\r]+)'
+    ],
+    'license_category': [
+        r'(?i)Contractor License Category:\s*([^\n\r]+)',
+        r'(?i)License Category:\s*([^\n\r]+)',
+        r'(?i)Category:\s*([^\n\r]+)',
+        r'(?i)Class:\s*([^\n\r]+)',
+        r'(?i)Grade:\s*([^\n\r]+)',
+        r'(?i)C\d+\s*[–\-]\s*([^\n\r]+)',
+        r'(?i)([A-C]\d*)\s*[–\-]\s*([^\n\r]+)'
+    ],
+    'project_duration': [
+        r'(?i)Project Duration:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Duration:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Contract Period:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Time Period:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Completion Time:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Period:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Duration:\s*([+\-]?\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Time\s*Period:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Completion\s*Time:\s*(\d+)\s*(?:months?|days?|years?)'
+    ],
+    'warranty_period': [
+        r'(?i)Warranty Period:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Warranty:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Guarantee:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Maintenance Period:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Defect Liability:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Warranty:\s*([+\-]?\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Period:\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Duration:\s*(\d+)\s*(?:months?|days?|years?)'
+    ],
+    'client_rating': [
+        r'(?i)Average Client Rating:\s*(\d+(?:\.\d+)?)',
+        r'(?i)Client Rating:\s*(\d+(?:\.\d+)?)',
+        r'(?i)Rating:\s*(\d+(?:\.\d+)?)',
+        r'(?i)Performance Rating:\s*(\d+(?:\.\d+)?)',
+        r'(?i)Quality Rating:\s*(\d+(?:\.\d+)?)',
+        r'(?i)Rating:\s*([^\n\r]+)',
+        r'(?i)Score:\s*(\d+(?:\.\d+)?)'
+    ],
+    'project_success_rate': [
+        r'(?i)Project Success Rate:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Success Rate:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Success:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Completion Rate:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Performance Rate:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Track Record:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Success Rate:\s*([^\s%]+)\s*%',
+        r'(?i)Success\s*Rate:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Success\s*([^\s%]+)\s*%',
+        r'(?i)Completion\s*Rate:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Performance\s*Rate:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Track\s*Record:\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Success\s*Rate:\s*([^\s%]+)\s*%'
+    ],
+    'rejection_history': [
+        r'(?i)Rejection History:\s*(\d+)',
+        r'(?i)Rejections:\s*(\d+)',
+        r'(?i)Failed Bids:\s*(\d+)',
+        r'(?i)Rejected Tenders:\s*(\d+)',
+        r'(?i)Rejection:\s*([^\n\r]+)',
+        r'(?i)History:\s*(\d+)'
+    ],
+    'safety_certification': [
+        r'(?i)Safety Certification:\s*([^\n\r]+)',
+        r'(?i)Safety:\s*([^\n\r]+)',
+        r'(?i)Certification:\s*([^\n\r]+)',
+        r'(?i)Safety Record:\s*([^\n\r]+)',
+        r'(?i)ISO:\s*([^\n\r]+)',
+        r'(?i)Quality Certification:\s*([^\n\r]+)'
+    ],
+    'bid_amount': [
+        r'(?i)Bid Amount:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Total Amount:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Contract Value:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Project Cost:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Tender Value:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Estimated Cost:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Budget:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Price:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Cost:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Value:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Amount:\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Rs\.?\s*([\d,]+(?:\.\d+)?)',
+        r'(?i)₹\s*([\d,]+(?:\.\d+)?)',
+        r'(?i)\$\s*([\d,]+(?:\.\d+)?)',
+        r'(?i)(?:Total|Bid|Contract)\s*(?:Amount|Value|Price):\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)(?<![\d,])([\d,]{6,}(?:\.\d+)?)\s*(?:lakhs?|crores?|million)',
+        r'(?i)(?<![\d,])([\d,]+(?:\.\d+)?)\s*(?:lakhs?|crores?|million)\s*(?:rupees?|USD)',
+        r'(?i)Bid Amount:\s*([^\n\r]+)',
+        r'(?i)Bid Amount:\s*(\d+(?:\.\d+)?)',
+        r'(?i)Amount:\s*(\d+(?:\.\d+)?)',
+        r'(?i)Bid\s*Amount:\s*([^\n\r]+)',
+        r'(?i)Bid\s*Amount:\s*(\d+(?:\.\d+)?)'
+    ]
+}
+
+# Words of which every pattern of the field contains at least one (case-insensitive),
+# so a line without any of them can never match that field
+OCR_FIELD_TRIGGERS = {
+    'contract_name': ['name', 'description', 'title'],
+    'license_category': ['category', 'class', 'grade', '-', '–'],
+    'project_duration': ['duration', 'period', 'time'],
+    'warranty_period': ['warranty', 'guarantee', 'period', 'liability', 'duration'],
+    'client_rating': ['rating', 'score'],
+    'project_success_rate': ['success', 'rate', 'record'],
+    'rejection_history': ['reject', 'failed', 'history'],
+    'safety_certification': ['safety', 'certification', 'iso'],
+    'bid_amount': ['amount', 'value', 'cost', 'budget', 'price', 'rs', '₹', '$', 'lakh', 'crore', 'million'],
+}
+
+FLOAT_OCR_FIELDS = {'client_rating', 'project_success_rate'}
+INT_OCR_FIELDS = {'project_duration', 'warranty_period', 'rejection_history'}
+
+
+def _build_keyword_index(triggers):
+    """Lookahead scanner reporting every trigger position, and keyword -> fields"""
+    keyword_fields = {}
+    for field, words in triggers.items():
+        for word in words:
+            keyword_fields.setdefault(word.lower(), set()).add(field)
+    # The scan reports one keyword per position, so a keyword also stands for the
+    # fields of any shorter keyword it starts with
+    for word in keyword_fields:
+        for other, fields in keyword_fields.items():
+            if other != word and word.startswith(other):
+                keyword_fields[word] = keyword_fields[word] | fields
+    ordered = sorted(keyword_fields, key=len, reverse=True)
+    scanner = re.compile('(?=(%s))' % '|'.join(re.escape(word) for word in ordered), re.IGNORECASE)
+    return scanner, keyword_fields
+
+
+COMPILED_OCR_PATTERNS = {
+    field: [re.compile(pattern) for pattern in patterns]
+    for field, patterns in OCR_FIELD_PATTERNS.items()
+}
+KEYWORD_SCANNER, KEYWORD_FIELDS = _build_keyword_index(OCR_FIELD_TRIGGERS)
+
+
+def candidate_lines(text) -> Dict[int, Set[str]]:
+    """line index -> fields whose trigger words appear on that line, from one scan of the text"""
+    line_starts = [0] + [match.end() for match in re.finditer('\n', text)]
+    candidates = {}
+    for match in KEYWORD_SCANNER.finditer(text):
+        line = bisect.bisect_right(line_starts, match.start()) - 1
+        candidates.setdefault(line, set()).update(KEYWORD_FIELDS[match.group(1).lower()])
+    return candidates
+
+
+def convert_ocr_value(field, value):
+    """Typed value for a raw capture, or None if it doesn't convert"""
+    if field == 'bid_amount':
+        try:
+            return float(value.replace(',', ''))
+        except ValueError:
+            return None
+    if field in FLOAT_OCR_FIELDS:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    if field in INT_OCR_FIELDS:
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    if field == 'safety_certification':
+        # Standardize safety certification
+        value = value.strip().lower()
+        if any(word in value for word in ['yes', 'true', '1', 'certified', 'approved']):
+            return 'Yes'
+        if any(word in value for word in ['no', 'false', '0', 'not']):
+            return 'No'
+        return 'Yes'  # Default to Yes if unclear
+    # license_category / contract_name: only strip whitespace, do not map or force to A/B/C
+    return value.strip()
+
+
+def parse_ocr_fields(ocr_text, fields: List[str] = None, budget=None) -> Dict:
+    """
+    Key/value fields from OCR text: for each field, the first line (top to bottom)
+    where one of its patterns yields a convertible value, patterns tried in order.
+    Searches go through budget (a regex_guard.RegexBudget) when one is given.
+    """
+    wanted = [field for field in COMPILED_OCR_PATTERNS if fields is None or field in fields]
+    table_data = {}
+    lines = ocr_text.split('\n')
+
+    for index, triggered in sorted(candidate_lines(ocr_text).items()):
+        line = lines[index].strip()
+        for field in wanted:
+            if field not in triggered or field in table_data:
+                continue
+            for pattern in COMPILED_OCR_PATTERNS[field]:
+                match = budget.search(pattern, line) if budget is not None else pattern.search(line)
+                if match:
+                    value = convert_ocr_value(field, match.group(1).strip())
+                    if value is not None:
+                        table_data[field] = value
+                        break
+        if len(table_data) == len(wanted):
+            break
+
+    return table_data
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Per-page extraction results, reused when a document is submitted again
+Each page is fingerprinted by everything it draws from (content streams, fonts, images,
+size and rotation), so a revised bid with a corrected price page only has that page
+re-read or re-OCRed; the other pages' tier results come from the cache.
+"""
+
+import hashlib
+
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+# Bump when page-level extraction changes, so results from older code are not reused
+PAGE_CACHE_VERSION = 1
+# Page attributes that decide what is drawn (inherited ones are already merged in by pdfminer)
+PAGE_ATTRS = ('Contents', 'Resources', 'MediaBox', 'CropBox', 'Rotate', 'UserUnit')
+
+
+class _ObjectHasher:
+    """Feeds PDF objects into a digest; indirect objects are hashed once per document"""
+
+    def __init__(self):
+        self._refs = {}  # objid -> digest of the resolved object
+
+    def feed(self, digest, obj):
+        if isinstance(obj, PDFObjRef):
+            digest.update(self._ref(obj))
+        elif isinstance(obj, PDFStream):
+            # Undecoded bytes: hashing needs no decompression, and a fresh document is never decoded yet
+            data = obj.rawdata if obj.rawdata is not None else obj.get_data()
+            digest.update(b'stream')
+            self.feed(digest, obj.attrs)
+            digest.update(b'%d:' % len(data))
+            digest.update(data)
+        elif isinstance(obj, dict):
+            digest.update(b'<<')
+            for key in sorted(obj, key=str):
+                digest.update(f'/{key} '.encode('utf-8'))
+                self.feed(digest, obj[key])
+            digest.update(b'>>')
+        elif isinstance(obj, (list, tuple)):
+            digest.update(b'[')
+            for item in obj:
+                self.feed(digest, item)
+            digest.update(b']')
+        else:
+            digest.update(repr(obj).encode('utf-8') + b' ')
+
+    def _ref(self, ref):
+        cached = self._refs.get(ref.objid)
+        if cached is None:
+            # Placeholder while this object is hashed, in case it refers back to itself
+            self._refs[ref.objid] = b'ref'
+            digest = hashlib.sha256()
+            self.feed(digest, ref.resolve())
+            cached = self._refs[ref.objid] = digest.digest()
+        return cached
+
+
+def page_fingerprints(pages):
+    """sha256 hex digest per pdfplumber page, in page order"""
+    hasher = _ObjectHasher()
+    fingerprints = []
+    for page in pages:
+        digest = hashlib.sha256(f'page-v{PAGE_CACHE_VERSION}'.encode('utf-8'))
+        attrs = page.page_obj.attrs
+        for name in PAGE_ATTRS:
+            digest.update(name.encode('utf-8'))
+            hasher.feed(digest, attrs.get(name))
+        fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+
+class DocumentPages:
+    """
+    Cached tier results for the pages of one document, looked up by page fingerprint.
+    An entry is {'tiers': {tier: data}, 'text': page text, 'amounts': amount tokens};
+    a tier missing from 'tiers' never ran on that page. New results are written by save().
+    """
+
+    def __init__(self, cache, fingerprints, budget=None):
+        self.cache = cache
+        self.fingerprints = fingerprints
+        # Results found after the regex budget ran out may be incomplete, so they aren't kept
+        self.budget = budget
+        self._entries = {}
+        self._changed = set()
+        self.reused = {}  # tier -> pages taken from the cache
+        if cache is not None:
+            for page_num, fingerprint in enumerate(fingerprints, 1):
+                entry = cache.get(fingerprint)
+                if entry is not None:
+                    self._entries[page_num] = entry
+
+    def get(self, page_num, tier):
+        """Cached data of tier for a page, or None if the tier hasn't run on it before"""
+        entry = self._entries.get(page_num)
+        data = entry['tiers'].get(tier) if entry is not None else None
+        if data is not None:
+            self.reused[tier] = self.reused.get(tier, 0) + 1
+        return data
+
+    def text(self, page_num):
+        """(page text, amount tokens) cached with a page's text tier result"""
+        entry = self._entries[page_num]
+        return entry['text'], [amount._replace(page=page_num) for amount in entry['amounts']]
+
+    def put(self, page_num, tier, data):
+        self._update(page_num, tiers={tier: data})
+
+    def keep_text(self, page_num, text, amounts):
+        """Page text and amount tokens, kept with the page's text tier result"""
+        self._update(page_num, text=text, amounts=list(amounts))
+
+    def _update(self, page_num, tiers=None, **page_state):
+        if self.cache is None or (self.budget is not None and self.budget.exhausted):
+            return
+        entry = self._entries.get(page_num) or {'tiers': {}, 'text': None, 'amounts': []}
+        # Entries may be shared with other readers of the cache, so they are replaced, not changed
+        self._entries[page_num] = {**entry, **page_state, 'tiers': {**entry['tiers'], **(tiers or {})}}
+        self._changed.add(page_num)
+
+    def save(self):
+        if self.cache is None:
+            return
+        for page_num in sorted(self._changed):
+            self.cache.put(self.fingerprints[page_num - 1], self._entries[page_num])
+        self._changed.clear()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Vectorized multi-tender ranking
+Scores bids for any number of tenders in one pass: every normalization uses the
+min / max of the bid's own tender (group), so ranking many tenders at once gives the
+same scores as ranking each tender's bids on its own
+"""
+
+import bisect
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Parameter -> whether a higher value is better (TenderPredictor.calculate_composite_score)
+COMPOSITE_PARAMS = {
+    'bid_amount': False,
+    'project_duration': False,
+    'warranty_period': True,
+    'client_rating': True,
+    'project_success_rate': True,
+    'rejection_history': False,
+    'safety_certification': True,
+}
+# Score used when every bid in a tender has the same value for a parameter
+TIED_PARAM_SCORE = 50
+
+SCORE_FUNCTIONS = ('composite', 'comprehensive')
+
+# Weighted scores - feature name -> weight, in summation order
+# create_target_variable: rejection_headroom = 5 - rejection_history,
+# warranty_to_duration = warranty_period / project_duration, inverse_bid = 1 / bid_amount
+TARGET_SCORE_WEIGHTS = {
+    'client_rating': 0.25,
+    'project_success_rate': 0.25,
+    'rejection_headroom': 0.15,
+    'warranty_to_duration': 0.15,
+    'inverse_bid': 0.20,
+}
+# analyze_multiple_pdfs: rating_score = client_rating / 5 * 100, success_score = project_success_rate,
+# bid_score = % below the tender's highest bid
+COMPREHENSIVE_SCORE_WEIGHTS = {
+    'rating_score': 0.3,
+    'success_score': 0.3,
+    'bid_score': 0.4,
+}
+
+
+def group_codes(df: pd.DataFrame, group_col: Optional[str] = None) -> np.ndarray:
+    """Integer tender code per row (all zeros when the frame holds a single tender)"""
+    if group_col is None or group_col not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    codes, _ = pd.factorize(df[group_col], use_na_sentinel=False)
+    return codes
+
+
+def _param_values(df: pd.DataFrame, param: str) -> pd.Series:
+    """Numeric view of a scoring parameter; safety certification 'Yes' counts as 1"""
+    column = df[param]
+    if param == 'safety_certification' and not pd.api.types.is_numeric_dtype(column):
+        return (column == 'Yes').astype(int)
+    return pd.to_numeric(column, errors='coerce')
+
+
+def _param_score(x, min_val, max_val, higher_better):
+    """0-100 min-max score; TIED_PARAM_SCORE when min == max, NaN when there is no min/max"""
+    value_range = max_val - min_val
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if higher_better:
+            score = 100 * (x - min_val) / value_range
+        else:
+            score = 100 * (max_val - x) / value_range
+    score = np.array(score, dtype=np.float64, ndmin=1)
+    score[np.broadcast_to(value_range == 0, score.shape)] = TIED_PARAM_SCORE
+    # min is NaN only when the tender has no values at all for this parameter
+    score[np.broadcast_to(np.isnan(min_val), score.shape)] = np.nan
+    return score
+
+
+def _mean_scores(param_scores: np.ndarray) -> np.ndarray:
+    """Row means skipping NaN (same result as DataFrame.mean(axis=1))"""
+    present = ~np.isnan(param_scores)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(present, param_scores, 0).sum(axis=1) / present.sum(axis=1)
+
+
+def _group_extrema(values: pd.DataFrame, codes: np.ndarray):
+    """Per-row min and max of every column over the row's tender (one grouped pass, then a gather)"""
+    grouped = values.groupby(codes)
+    return grouped.min().to_numpy(dtype=np.float64)[codes], grouped.max().to_numpy(dtype=np.float64)[codes]
+
+
+def composite_scores(df: pd.DataFrame, group_col: Optional[str] = None) -> np.ndarray:
+    """
+    Equal-weight mean of the 0-100 min-max scores of COMPOSITE_PARAMS, per tender.
+    A parameter with no values in a tender is left out of that tender's mean.
+    """
+    params = [param for param in COMPOSITE_PARAMS if param in df.columns]
+    if not params:
+        return np.full(len(df), np.nan)
+
+    codes = group_codes(df, group_col)
+    values = pd.DataFrame({
+        param: _param_values(df, param).to_numpy(dtype=np.float64) for param in params
+    })
+    all_min, all_max = _group_extrema(values, codes)
+
+    param_scores = np.column_stack([
+        _param_score(values[param].to_numpy(), all_min[:, j], all_max[:, j], COMPOSITE_PARAMS[param])
+        for j, param in enumerate(params)
+    ])
+    return _mean_scores(param_scores)
+
+
+def target_features(df: pd.DataFrame) -> np.ndarray:
+    """Feature matrix (bids x TARGET_SCORE_WEIGHTS) behind create_target_variable's score"""
+    return np.column_stack([
+        df['client_rating'].to_numpy(dtype=np.float64),
+        df['project_success_rate'].to_numpy(dtype=np.float64),
+        5 - df['rejection_history'].to_numpy(dtype=np.float64),
+        df['warranty_period'].to_numpy(dtype=np.float64) / df['project_duration'].to_numpy(dtype=np.float64),
+        1 / df['bid_amount'].to_numpy(dtype=np.float64),
+    ])
+
+
+def comprehensive_features(df: pd.DataFrame, group_col: Optional[str] = None) -> np.ndarray:
+    """Feature matrix (bids x COMPREHENSIVE_SCORE_WEIGHTS), bid discount taken per tender"""
+    codes = group_codes(df, group_col)
+    bid_amount = df['bid_amount'].to_numpy(dtype=np.float64)
+    _, max_bid = _group_extrema(pd.DataFrame({'bid_amount': bid_amount}), codes)
+    max_bid = max_bid[:, 0]
+
+    return np.column_stack([
+        df['client_rating'].to_numpy(dtype=np.float64) / 5.0 * 100,
+        df['project_success_rate'].to_numpy(dtype=np.float64),
+        ((max_bid - bid_amount) / max_bid) * 100,
+    ])
+
+
+def weighted_scores(features: np.ndarray, weights) -> np.ndarray:
+    """
+    Weighted sum of feature columns, added left to right like the original
+    pandas expressions (so single-scenario scores match them bit for bit)
+    """
+    weights = list(weights.values()) if isinstance(weights, dict) else list(weights)
+    total = features[:, 0] * weights[0]
+    for j in range(1, len(weights)):
+        total = total + features[:, j] * weights[j]
+    return total
+
+
+def target_scores(df: pd.DataFrame) -> np.ndarray:
+    """Score used to label winners in the synthetic training data"""
+    return weighted_scores(target_features(df), TARGET_SCORE_WEIGHTS)
+
+
+def comprehensive_scores(df: pd.DataFrame, group_col: Optional[str] = None) -> np.ndarray:
+    """
+    analyze_multiple_pdfs scoring: 30% client rating, 30% success rate and 40% bid
+    discount relative to the tender's highest bid
+    """
+    return weighted_scores(comprehensive_features(df, group_col), COMPREHENSIVE_SCORE_WEIGHTS)
+
+
+def column_ranks(scores: np.ndarray) -> np.ndarray:
+    """1-based ranks down each column of a (bids x scenarios) score matrix (best = 1, ties in bid order)"""
+    order = np.argsort(-scores, axis=0, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, scores.shape[0] + 1)[:, None], axis=0)
+    return ranks
+
+
+def rank_bids(df: pd.DataFrame, group_col: Optional[str] = 'tender_id', score: str = 'composite',
+              top_k: Optional[int] = None, score_col: Optional[str] = None) -> pd.DataFrame:
+    """
+    Score and rank the bids of every tender in df.
+    Returns the bids with <score>_score and rank columns (1 = best within its tender),
+    ordered by tender then rank. With top_k only each tender's best
+    top_k bids are returned; rows are gathered (and copied) only after the selection.
+    The selection is a full stable sort rather than a per-tender partial one: grouping the rows
+    by tender costs most of the sort anyway (2M bids top-5: 1.0s sort vs 0.7s with argpartition,
+    out of ~3s with scoring), and argpartition would need an extra pass to keep tied bids in input order.
+    """
+    if score not in SCORE_FUNCTIONS:
+        raise ValueError(f"score must be one of {SCORE_FUNCTIONS}, got {score!r}")
+    score_col = score_col or f'{score}_score'
+
+    scorer = composite_scores if score == 'composite' else comprehensive_scores
+    scores = scorer(df, group_col)
+    codes = group_codes(df, group_col)
+
+    # One stable sort by (tender, score desc): ties keep their input order, NaN scores go last.
+    # A bid's rank is its offset from the start of its tender's run.
+    order = np.lexsort((-scores, codes))
+    sorted_codes = codes[order]
+    run_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    run_lengths = np.diff(np.r_[run_starts, len(order)])
+    ranks = np.arange(1, len(order) + 1) - np.repeat(run_starts, run_lengths)
+
+    if top_k is not None:
+        keep = ranks <= top_k
+        order, ranks = order[keep], ranks[keep]
+
+    results = df.iloc[order].copy()
+    results[score_col] = scores[order]
+    results['rank'] = ranks
+    return results
+
+
+def _bid_value(bid: Dict, param: str) -> float:
+    """Single-bid version of _param_values"""
+    value = bid.get(param)
+    if param == 'safety_certification' and isinstance(value, str):
+        return 1.0 if value == 'Yes' else 0.0
+    if param == 'safety_certification' and value is None:
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class IncrementalTenderRanking:
+    """
+    Live composite ranking of one tender's bids.
+    Keeps the running min / max of every COMPOSITE_PARAMS parameter and the bids in
+    score order. A new bid inside the current extrema is scored on its own and inserted
+    with bisect; only a bid that moves an extremum triggers a (vectorized) re-score of the
+    whole tender. Scores always equal composite_scores over the same bids.
+    """
+
+    def __init__(self, tender_id=None, initial_bids=64):
+        self.tender_id = tender_id
+        self.bids: List[Dict] = []
+        # Parameter values and scores live in preallocated buffers grown by doubling
+        self._values = np.empty((initial_bids, len(COMPOSITE_PARAMS)), dtype=np.float64)
+        self._scores = np.empty(initial_bids, dtype=np.float64)
+        self._higher_better = np.array(list(COMPOSITE_PARAMS.values()))
+        self._min = np.full(len(COMPOSITE_PARAMS), np.nan)
+        self._max = np.full(len(COMPOSITE_PARAMS), np.nan)
+        # Plain-float copies for the per-bid fast path
+        self._min_list = self._min.tolist()
+        self._max_list = self._max.tolist()
+        self._higher_list = list(COMPOSITE_PARAMS.values())
+        self._order = []  # sorted (sort_key, seq)
+        self._lock = threading.Lock()
+
+        self.inserts = 0
+        self.rescores = 0
+
+    @staticmethod
+    def _sort_key(score):
+        # Best first; NaN scores sort last
+        return math.inf if math.isnan(score) else -score
+
+    def _append(self, row):
+        n_bids = len(self.bids)
+        if n_bids == self._values.shape[0]:
+            capacity = max(1, 2 * n_bids)
+            self._values = np.resize(self._values, (capacity, self._values.shape[1]))
+            self._scores = np.resize(self._scores, capacity)
+        self._values[n_bids] = row
+
+    def _score(self, values):
+        """Composite score of rows of parameter values against the current extrema"""
+        param_scores = np.column_stack([
+            _param_score(values[:, j], self._min[j], self._max[j], self._higher_better[j])
+            for j in range(values.shape[1])
+        ])
+        return _mean_scores(param_scores)
+
+    def _score_one(self, row):
+        """Scalar version of _score for a single bid inside the current extrema"""
+        total = 0.0
+        present = 0
+        for x, min_val, max_val, higher_better in zip(row, self._min_list, self._max_list, self._higher_list):
+            if math.isnan(min_val):
+                continue
+            if max_val == min_val:
+                score = TIED_PARAM_SCORE
+            elif higher_better:
+                score = 100 * (x - min_val) / (max_val - min_val)
+            else:
+                score = 100 * (max_val - x) / (max_val - min_val)
+            if not math.isnan(score):
+                total += score
+                present += 1
+        return total / present if present else math.nan
+
+    def _moves_extremum(self, row):
+        for x, min_val, max_val in zip(row, self._min_list, self._max_list):
+            if not math.isnan(x) and (math.isnan(min_val) or x < min_val or x > max_val):
+                return True
+        return False
+
+    def add_bid(self, bid: Dict) -> Dict:
+        """Insert a bid; returns its rank, score and whether the tender was re-scored"""
+        row = [_bid_value(bid, param) for param in COMPOSITE_PARAMS]
+
+        with self._lock:
+            seq = len(self.bids)
+            self._append(row)
+            self.bids.append(dict(bid))
+            self.inserts += 1
+
+            extremum_moved = self._moves_extremum(row)
+            if extremum_moved:
+                self._min = np.fmin(self._min, row)
+                self._max = np.fmax(self._max, row)
+                self._min_list, self._max_list = self._min.tolist(), self._max.tolist()
+                n_bids = len(self.bids)
+                self._scores[:n_bids] = self._score(self._values[:n_bids])
+                keys = [self._sort_key(score) for score in self._scores[:n_bids].tolist()]
+                self._order = sorted(zip(keys, range(n_bids)))
+                self.rescores += 1
+            else:
+                score = self._score_one(row)
+                self._scores[seq] = score
+                bisect.insort(self._order, (self._sort_key(score), seq))
+
+            return {
+                'bid_index': seq,
+                'rank': self._rank_of(seq),
+                'composite_score': float(self._scores[seq]),
+                'rescored': extremum_moved,
+            }
+
+    def _rank_of(self, seq):
+        key = (self._sort_key(self._scores[seq]), seq)
+        return bisect.bisect_left(self._order, key) + 1
+
+    def _entry(self, position):
+        _, seq = self._order[position]
+        return {
+            **self.bids[seq],
+            'bid_index': seq,
+            'composite_score': float(self._scores[seq]),
+            'rank': position + 1,
+        }
+
+    def leader(self) -> Optional[Dict]:
+        """Current best bid, or None before the first bid"""
+        with self._lock:
+            return self._entry(0) if self._order else None
+
+    def top(self, k: Optional[int] = None) -> List[Dict]:
+        """The best k bids (all bids when k is None) in rank order"""
+        with self._lock:
+            count = len(self._order) if k is None else min(k, len(self._order))
+            return [self._entry(position) for position in range(count)]
+
+    def stats(self):
+        return {
+            'tender_id': self.tender_id,
+            'bids': len(self.bids),
+            'inserts': self.inserts,
+            'rescores': self.rescores,
+        }
+
+
+class LiveRankings:
+    """
+    IncrementalTenderRanking per tender id, for the tenders still taking bids. Kept for the
+    max_tenders most recently used tenders, and dropped after idle_seconds without use;
+    close() drops a finished tender straight away.
+    """
+
+    def __init__(self, max_tenders=1024, idle_seconds=86400.0):
+        self.max_tenders = max(1, int(max_tenders))
+        self.idle_seconds = idle_seconds
+        self._rankings = OrderedDict()  # tender_id -> (last_used, IncrementalTenderRanking)
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.closed = 0
+        self.evictions = 0
+
+    def _expired(self, last_used, now):
+        return bool(self.idle_seconds) and now - last_used > self.idle_seconds
+
+    def get(self, tender_id) -> Optional[IncrementalTenderRanking]:
+        """The tender's ranking, or None if it has no bids (or was dropped)"""
+        now = time.time()
+        with self._lock:
+            entry = self._rankings.get(tender_id)
+            if entry is None:
+                return None
+            last_used, ranking = entry
+            if self._expired(last_used, now):
+                del self._rankings[tender_id]
+                self.evictions += 1
+                return None
+            self._rankings[tender_id] = (now, ranking)
+            self._rankings.move_to_end(tender_id)
+            return ranking
+
+    def get_or_create(self, tender_id) -> IncrementalTenderRanking:
+        ranking = self.get(tender_id)
+        if ranking is not None:
+            return ranking
+        now = time.time()
+        with self._lock:
+            entry = self._rankings.get(tender_id)
+            if entry is not None:
+                return entry[1]
+            ranking = IncrementalTenderRanking(tender_id)
+            self._rankings[tender_id] = (now, ranking)
+            self.created += 1
+            self._evict(now)
+            return ranking
+
+    def close(self, tender_id) -> Optional[IncrementalTenderRanking]:
+        """Drop a tender's ranking (e.g. once bidding has closed); returns it, or None"""
+        with self._lock:
+            entry = self._rankings.pop(tender_id, None)
+            if entry is None:
+                return None
+            self.closed += 1
+            return entry[1]
+
+    def _evict(self, now):
+        """Drop idle tenders, then least recently used ones over max_tenders (lock held)"""
+        for tender_id in [t for t, (last_used, _) in self._rankings.items() if self._expired(last_used, now)]:
+            del self._rankings[tender_id]
+            self.evictions += 1
+        while len(self._rankings) > self.max_tenders:
+            self._rankings.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._rankings)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tenders': len(self._rankings),
+                'max_tenders': self.max_tenders,
+                'idle_seconds': self.idle_seconds,
+                'created': self.created,
+                'closed': self.closed,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Guards for the extraction regexes that run over untrusted PDF/OCR text
+- find_superlinear_risks: static check (on the parsed pattern) for the constructs that
+  make Python's backtracking engine super-linear: nested quantifiers, adjacent
+  unbounded quantifiers that can consume the same characters, and a leading unbounded
+  quantifier that re.search retries from every start position
+- RegexBudget: per-document time budget; once spent, further searches are skipped
+"""
+
+import re
+import string
+import time
+
+try:
+    from re import _parser as sre_parse           # Python 3.11+
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+# Characters used to decide whether two character classes overlap
+ALPHABET = frozenset(string.printable + ' ₹€•–—…')
+
+_CATEGORY_PATTERNS = {
+    sre_constants.CATEGORY_DIGIT: r'\d',
+    sre_constants.CATEGORY_NOT_DIGIT: r'\D',
+    sre_constants.CATEGORY_SPACE: r'\s',
+    sre_constants.CATEGORY_NOT_SPACE: r'\S',
+    sre_constants.CATEGORY_WORD: r'\w',
+    sre_constants.CATEGORY_NOT_WORD: r'\W',
+}
+_CATEGORY_SETS = {
+    category: frozenset(c for c in ALPHABET if re.match(pattern, c))
+    for category, pattern in _CATEGORY_PATTERNS.items()
+}
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+_ZERO_WIDTH = (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+
+
+def _with_case(chars, ignorecase):
+    if not ignorecase:
+        return frozenset(chars)
+    return frozenset(c for char in chars for c in (char, char.lower(), char.upper()) if c in ALPHABET)
+
+
+def _char_set(op, av, ignorecase):
+    """Characters a single-character item matches, or None for anything longer"""
+    if op == sre_constants.LITERAL:
+        return _with_case({chr(av)} & ALPHABET, ignorecase)
+    if op == sre_constants.NOT_LITERAL:
+        return ALPHABET - _with_case({chr(av)}, ignorecase)
+    if op == sre_constants.ANY:
+        return ALPHABET - {'\n'}
+    if op == sre_constants.IN:
+        chars, negate = set(), False
+        for item_op, item_av in av:
+            if item_op == sre_constants.NEGATE:
+                negate = True
+            elif item_op == sre_constants.LITERAL:
+                chars.add(chr(item_av))
+            elif item_op == sre_constants.RANGE:
+                chars.update(c for c in ALPHABET if item_av[0] <= ord(c) <= item_av[1])
+            elif item_op == sre_constants.CATEGORY:
+                chars.update(_CATEGORY_SETS.get(item_av, ALPHABET))
+            else:
+                chars.update(ALPHABET)
+        chars = _with_case(chars & ALPHABET, ignorecase)
+        return ALPHABET - chars if negate else chars
+    return None
+
+
+class _Node:
+    """What the checker needs to know about one parsed item"""
+    __slots__ = ('first', 'alphabet', 'tail', 'nullable', 'unbounded', 'pending')
+
+    def __init__(self, first, alphabet, tail, nullable, unbounded, pending=None):
+        self.first = first          # characters the item can start with
+        self.alphabet = alphabet    # characters it can consume anywhere
+        self.tail = tail            # characters of unbounded runs that can end the item
+        self.nullable = nullable    # can match the empty string
+        self.unbounded = unbounded  # contains an unbounded quantifier
+        self.pending = pending      # (kind, detail) of an ambiguity that costs time once something after it fails
+
+
+class _Checker:
+    def __init__(self, ignorecase):
+        self.ignorecase = ignorecase
+        self.risks = []
+
+    def flag(self, kind, detail):
+        if (kind, detail) not in self.risks:
+            self.risks.append((kind, detail))
+
+    def sequence(self, items):
+        """
+        Analyse a sequence. Two unbounded runs that can both consume the characters
+        between them only cost time when a later mandatory item fails, so such an
+        ambiguity is held as pending until one follows.
+        """
+        first, alphabet, tail = frozenset(), frozenset(), frozenset()
+        nullable, unbounded = True, False
+        open_runs = []  # tails of unbounded runs that can still give characters back
+        pending = None
+
+        for op, av in items:
+            node = self.item(op, av)
+            if pending and not node.nullable:
+                self.flag(*pending)
+                pending = None
+
+            if nullable:
+                first |= node.first
+            alphabet |= node.alphabet
+
+            if node.unbounded:
+                for run in open_runs:
+                    if run & node.first:
+                        pending = ('overlapping_quantifiers',
+                                   f"adjacent unbounded runs can both consume {_sample(run & node.first)}")
+                        break
+            pending = node.pending or pending
+            if not node.nullable:
+                # A mandatory item an open run can't match pins where that run ends
+                open_runs = [run for run in open_runs if run & node.first]
+                tail = frozenset()
+            if node.unbounded:
+                open_runs.append(node.tail)
+                tail |= node.tail
+
+            nullable = nullable and node.nullable
+            unbounded = unbounded or node.unbounded
+        return _Node(first, alphabet, tail, nullable, unbounded, pending)
+
+    def item(self, op, av):
+        chars = _char_set(op, av, self.ignorecase)
+        if chars is not None:
+            return _Node(chars, chars, frozenset(), False, False)
+
+        if op in _REPEATS:
+            low, high, body = av
+            inner = self.sequence(body)
+            pending = inner.pending
+            is_unbounded = high == sre_constants.MAXREPEAT
+            if is_unbounded and inner.unbounded and (inner.nullable or inner.tail & inner.first):
+                pending = ('nested_quantifiers', "a repeated group can split the same run several ways")
+            if is_unbounded and not inner.unbounded:
+                tail = inner.alphabet
+            else:
+                tail = inner.tail
+            return _Node(inner.first, inner.alphabet, tail, low == 0 or inner.nullable,
+                         is_unbounded or inner.unbounded, pending)
+
+        if op in (sre_constants.SUBPATTERN, getattr(sre_constants, 'ATOMIC_GROUP', None)):
+            body = av[-1]
+            previous = self.ignorecase
+            add_flags, del_flags = (av[1], av[2]) if op == sre_constants.SUBPATTERN else (0, 0)
+            if add_flags & re.IGNORECASE:
+                self.ignorecase = True
+            if del_flags & re.IGNORECASE:
+                self.ignorecase = False
+            node = self.sequence(body)
+            self.ignorecase = previous
+            return node
+
+        if op == sre_constants.BRANCH:
+            branches = [self.sequence(branch) for branch in av[1]]
+            return _Node(
+                frozenset().union(*(b.first for b in branches)),
+                frozenset().union(*(b.alphabet for b in branches)),
+                frozenset().union(*(b.tail for b in branches)),
+                any(b.nullable for b in branches),
+                any(b.unbounded for b in branches),
+                next((b.pending for b in branches if b.pending), None),
+            )
+
+        if op in _ZERO_WIDTH:
+            return _Node(frozenset(), frozenset(), frozenset(), True, False)
+
+        # Anything else (back-references, conditionals) is treated as "could be anything"
+        return _Node(ALPHABET, ALPHABET, ALPHABET, True, True)
+
+
+def _sample(chars):
+    shown = ''.join(sorted(chars)[:6])
+    return repr(shown + ('…' if len(chars) > 6 else ''))
+
+
+def _flatten(items):
+    """Top-level items with plain (non-repeated) groups opened up"""
+    for op, av in items:
+        if op == sre_constants.SUBPATTERN and not (av[1] | av[2]):
+            yield from _flatten(av[-1])
+        else:
+            yield op, av
+
+
+def _leading_run_rescanned(items, ignorecase):
+    """
+    re.search retries from every position. If everything in front of the first unbounded
+    run can itself occur inside that run, each position inside a long run is a new start
+    that rescans the rest of it, and when the items after the run fail that is quadratic.
+    A start anchor, or a \\b / negative lookbehind that excludes the run's characters,
+    only lets matches start where a run begins.
+    """
+    return _rescanned_from(list(_flatten(items)), ignorecase, frozenset(), frozenset())
+
+
+def _rescanned_from(items, ignorecase, prefix, guard):
+    for index, (op, av) in enumerate(items):
+        if op == sre_constants.AT:
+            if av in (sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING):
+                return False
+            if av == sre_constants.AT_BOUNDARY:
+                guard |= _CATEGORY_SETS[sre_constants.CATEGORY_WORD]
+            continue
+        if op == sre_constants.ASSERT_NOT and av[0] < 0:
+            body = list(av[1])
+            if len(body) == 1:
+                guard |= _char_set(*body[0], ignorecase) or frozenset()
+            continue
+
+        node = _Checker(ignorecase).item(op, av)
+        if op in _REPEATS and av[1] == 1 and node.unbounded:
+            # Optional group holding a run: a match may enter it or skip it
+            rest = items[index + 1:]
+            return (_rescanned_from(list(_flatten(av[2])) + rest, ignorecase, prefix, guard)
+                    or _rescanned_from(rest, ignorecase, prefix, guard))
+        if node.unbounded:
+            if not prefix <= node.alphabet or node.alphabet <= guard:
+                return False
+            rest = _Checker(ignorecase).sequence(items[index + 1:])
+            return not rest.nullable
+        if not node.nullable:
+            prefix |= node.alphabet
+    return False
+
+
+def find_superlinear_risks(pattern, flags=0):
+    """
+    [(kind, detail)] for constructs in pattern that can backtrack super-linearly,
+    empty when the pattern is safe to run over arbitrary text
+    """
+    if isinstance(pattern, re.Pattern):
+        pattern, flags = pattern.pattern, pattern.flags
+    parsed = sre_parse.parse(pattern, flags)
+    checker = _Checker(bool(parsed.state.flags & re.IGNORECASE))
+    checker.sequence(parsed)
+
+    if _leading_run_rescanned(list(parsed), checker.ignorecase):
+        checker.flag('leading_quantifier', "re.search restarts inside an unbounded run and rescans it")
+    return checker.risks
+
+
+def audit_patterns(patterns, flags=0):
+    """{pattern: risks} for every risky pattern in an iterable (or dict of lists) of patterns"""
+    if isinstance(patterns, dict):
+        patterns = [p for values in patterns.values() for p in (values if isinstance(values, (list, tuple)) else [values])]
+    report = {}
+    for pattern in patterns:
+        risks = find_superlinear_risks(pattern, flags)
+        if risks:
+            report[pattern.pattern if isinstance(pattern, re.Pattern) else pattern] = risks
+    return report
+
+
+class RegexBudget:
+    """
+    Wall-clock allowance for all regex work on one document. Searches made through the
+    budget after it is spent return None (and are counted), so a hostile document
+    degrades to fewer extracted fields instead of pinning a worker.
+    A single search can't be interrupted, which is why the patterns must also be linear.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.spent = 0.0
+        self.searches = 0
+        self.skipped = 0
+
+    @property
+    def exhausted(self):
+        return self.seconds is not None and self.spent >= self.seconds
+
+    def _run(self, method, pattern, text, *args):
+        if self.exhausted:
+            self.skipped += 1
+            return None
+        started = time.perf_counter()
+        try:
+            return method(pattern, text, *args)
+        finally:
+            self.spent += time.perf_counter() - started
+            self.searches += 1
+
+    def search(self, pattern, text, flags=0):
+        if isinstance(pattern, re.Pattern):
+            return self._run(lambda p, t: p.search(t), pattern, text)
+        return self._run(re.search, pattern, text, flags)
+
+    def findall(self, pattern, text, flags=0):
+        if isinstance(pattern, re.Pattern):
+            result = self._run(lambda p, t: p.findall(t), pattern, text)
+        else:
+            result = self._run(re.findall, pattern, text, flags)
+        return [] if result is None else result
+
+    def stats(self):
+        return {
+            'seconds': self.seconds,
+            'spent': round(self.spent, 6),
+            'searches': self.searches,
+            'skipped': self.skipped,
+            'exhausted': self.exhausted,
+        }
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Response cache for the bid analysis API
+Results are keyed by a canonical hash of the bid list plus the model version and kept
+in an in-process LRU with a TTL, optionally backed by pickles on disk so they survive
+restarts and can be shared by several workers
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# The disk index is rebuilt from a directory scan at most this often, so entries written
+# by other processes sharing disk_dir count towards the limits too
+DISK_RESCAN_SECONDS = 60.0
+
+
+def bids_cache_key(bids, model_version):
+    """
+    Canonical key for a bid list: key order and whitespace don't matter,
+    bid order does (it decides the Contract_<n> fallback names and tie order)
+    """
+    payload = json.dumps(bids, sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.sha256(payload.encode('utf-8'))
+    digest.update(f"|model={model_version}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache with per-entry expiry. Entries are treated as read-only by callers.
+    With disk_dir set, every put is also written to <disk_dir>/<key>.pkl, and memory
+    misses fall back to disk (entries older than the TTL are ignored and removed). Each
+    write also removes expired files, then the oldest ones until the directory is back
+    under max_disk_bytes.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=300.0, disk_dir=None, max_disk_bytes=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._disk_index = None  # path -> [size, stored_at]
+        self._disk_scanned_at = 0.0
+        self._disk_lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    def _expired(self, stored_at, now):
+        return bool(self.ttl_seconds) and now - stored_at > self.ttl_seconds
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._expired(stored_at, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, value, now)
+        return value
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+        self._write_disk(key, value)
+        return value
+
+    def _store(self, key, value, now):
+        """Insert into the memory tier and trim it to max_entries (lock held)"""
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key, now):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if self._expired(os.path.getmtime(path), now):
+                os.remove(path)
+                with self._disk_lock:
+                    if self._disk_index is not None:
+                        self._disk_index.pop(path, None)
+                return None
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.disk_dir, suffix='.tmp', delete=False) as tmp:
+                pickle.dump(value, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+            path = self._disk_path(key)
+            os.replace(tmp.name, path)
+            with self._disk_lock:
+                now = time.time()
+                if self._disk_index is None or now - self._disk_scanned_at > DISK_RESCAN_SECONDS:
+                    self._scan_disk(now)
+                self._disk_index[path] = [os.path.getsize(path), now]
+                self._prune_disk(keep=path, now=now)
+        except Exception as e:
+            print(f"⚠️  Could not write cache entry {key[:12]}: {e}")
+
+    def _scan_disk(self, now):
+        """Rebuild the disk index from disk_dir (disk lock held)"""
+        index = {}
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file() and entry.name.endswith('.pkl'):
+                stat = entry.stat()
+                index[entry.path] = [stat.st_size, stat.st_mtime]
+        self._disk_index = index
+        self._disk_scanned_at = now
+
+    def _prune_disk(self, keep, now):
+        """Drop expired files, then the oldest ones until under max_disk_bytes (disk lock held)"""
+        doomed = []
+        if self.ttl_seconds:
+            doomed = [path for path, (_, stored_at) in self._disk_index.items()
+                      if path != keep and self._expired(stored_at, now)]
+
+        if self.max_disk_bytes:
+            doomed_set = set(doomed)
+            total = sum(size for path, (size, _) in self._disk_index.items() if path not in doomed_set)
+            if total > self.max_disk_bytes:
+                for path, (size, _) in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+                    if total <= self.max_disk_bytes:
+                        break
+                    if path == keep or path in doomed_set:
+                        continue
+                    doomed.append(path)
+                    total -= size
+
+        for path in doomed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️  Could not evict cache entry {path}: {e}")
+                continue
+            self._disk_index.pop(path, None)
+            self.disk_evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'disk_dir': self.disk_dir,
+                'max_disk_bytes': self.max_disk_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_evictions': self.disk_evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
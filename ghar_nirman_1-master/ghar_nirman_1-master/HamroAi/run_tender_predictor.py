@@ -31,16 +31,34 @@ except ImportError as e:
 
 def main():
     """Main function to handle command line arguments"""
-    if len(sys.argv) < 3:
+    args = sys.argv[1:]
+    # Optional per-document time budget in seconds (defaults to EXTRACTION_TIME_BUDGET_SECONDS)
+    time_budget = None
+    if '--budget' in args:
+        index = args.index('--budget')
+        try:
+            time_budget = float(args[index + 1])
+        except (IndexError, ValueError):
+            print(json.dumps({
+                "success": False,
+                "error": "--budget needs a number of seconds"
+            }))
+            sys.exit(1)
+        del args[index:index + 2]
+    # --no-ocr: text layer only (the degraded mode callers use under load)
+    allow_ocr = '--no-ocr' not in args
+    args = [arg for arg in args if arg != '--no-ocr']
+    
+    if len(args) < 2:
         print(json.dumps({
             "success": False,
-            "error": "Usage: python run_tender_predictor.py <command> <pdf_path>",
+            "error": "Usage: python run_tender_predictor.py <command> <pdf_path> [--budget seconds] [--no-ocr]",
             "usage": "Commands: analyze"
         }))
         sys.exit(1)
     
-    command = sys.argv[1]
-    pdf_path = sys.argv[2]
+    command = args[0]
+    pdf_path = args[1]
     
     if command == "analyze":
         try:
@@ -66,12 +84,15 @@ def main():
                 sys.stdout = DebugRedirect()
                 
                 predictor = TenderPredictor()
-                result = predictor.extract_data_from_pdf(pdf_path)
+                result = predictor.extract_data_from_pdf(pdf_path, time_budget=time_budget, allow_ocr=allow_ocr)
                 
             finally:
                 # Restore original stdout
                 sys.stdout = original_stdout
             
+            # Fields the extractor estimated, plus the ones defaulted below
+            defaulted_fields = list(predictor.last_extraction_info.get('defaulted_fields', []))
+            
             # Fill in missing required parameters with default values
             required_params = [
                 'contract_name', 'license_category', 'project_duration', 
@@ -81,6 +102,7 @@ def main():
             
             for param in required_params:
                 if param not in result or result[param] is None:
+                    defaulted_fields.append(param)
                     if param == 'contract_name':
                         result[param] = 'Default Contract'
                     elif param == 'license_category':
@@ -101,7 +123,21 @@ def main():
                         result[param] = 1000000.0
             
             # Output results as JSON to stdout (clean output)
-            print(json.dumps({"success": True, "data": result}))
+            info = predictor.last_extraction_info
+            print(json.dumps({
+                "success": True,
+                "data": result,
+                "defaulted_fields": defaulted_fields,
+                # Which tier found each field, what the time budget cut off, and where the time went
+                "fields_source": info.get('fields_source', {}),
+                "time_defaulted_fields": info.get('time_defaulted_fields', []),
+                "tier_ms": info.get('tier_ms', {}),
+                # Per-page content hashes; pages matching an earlier extraction reuse its results
+                "page_hashes": info.get('page_hashes', []),
+                "pages_reused": info.get('pages_reused', {}),
+                # Contractor profile used for the history-derived fields, and the fields it filled
+                "contractor_profile": info.get('contractor_profile'),
+            }))
             
         except Exception as e:
             print(json.dumps({
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Scoring-weight scenario evaluation
+Scores one tender's N bids under K alternative weightings with a single (N x F) @ (F x K)
+product, ranks all K columns at once and summarizes how stable each bid's rank is
+"""
+
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .ranking import (
+        COMPREHENSIVE_SCORE_WEIGHTS, TARGET_SCORE_WEIGHTS,
+        column_ranks, comprehensive_features, target_features
+    )
+except ImportError:
+    from ranking import (
+        COMPREHENSIVE_SCORE_WEIGHTS, TARGET_SCORE_WEIGHTS,
+        column_ranks, comprehensive_features, target_features
+    )
+
+# scheme -> (feature builder, baseline weights)
+SCENARIO_SCHEMES = {
+    'comprehensive': (comprehensive_features, COMPREHENSIVE_SCORE_WEIGHTS),
+    'target': (target_features, TARGET_SCORE_WEIGHTS),
+}
+
+
+def weight_matrix(weights: Union[List[Dict[str, float]], np.ndarray], scheme='comprehensive') -> np.ndarray:
+    """
+    K x F weight matrix in the scheme's feature order.
+    Accepts an array, or dicts keyed by feature name (missing features weigh 0).
+    """
+    feature_names = list(SCENARIO_SCHEMES[scheme][1])
+    if isinstance(weights, np.ndarray):
+        matrix = np.atleast_2d(weights).astype(np.float64)
+    else:
+        unknown = {name for scenario in weights for name in scenario} - set(feature_names)
+        if unknown:
+            raise ValueError(f"Unknown {scheme} features: {sorted(unknown)} (expected {feature_names})")
+        matrix = np.array(
+            [[float(scenario.get(name, 0.0)) for name in feature_names] for scenario in weights],
+            dtype=np.float64
+        ).reshape(-1, len(feature_names))
+    if matrix.shape[1] != len(feature_names):
+        raise ValueError(f"Expected {len(feature_names)} weights per scenario ({feature_names}), got {matrix.shape[1]}")
+    return matrix
+
+
+def sample_weight_scenarios(count, scheme='comprehensive', concentration=20.0, seed=None) -> np.ndarray:
+    """
+    count weightings drawn around the baseline (Dirichlet, each summing to 1).
+    Lower concentration spreads the scenarios further from the baseline.
+    """
+    baseline = np.array(list(SCENARIO_SCHEMES[scheme][1].values()), dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(baseline / baseline.sum() * concentration, size=count)
+
+
+def evaluate_scenarios(df: pd.DataFrame, weights=None, scheme='comprehensive', samples=None,
+                       seed=None, top_k=3) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Rank one tender's bids under every weight scenario.
+    weights: K weightings (see weight_matrix); if omitted, `samples` scenarios are
+    drawn around the baseline weights. Returns a per-bid rank-stability table and a
+    per-scenario table (winner and Spearman correlation with the baseline ranking).
+    """
+    if scheme not in SCENARIO_SCHEMES:
+        raise ValueError(f"scheme must be one of {list(SCENARIO_SCHEMES)}, got {scheme!r}")
+    if df.empty:
+        print("No data to evaluate")
+        return None
+
+    build_features, baseline_weights = SCENARIO_SCHEMES[scheme]
+    if weights is None:
+        W = sample_weight_scenarios(samples or 100, scheme, seed=seed)
+    else:
+        W = weight_matrix(weights, scheme)
+
+    features = build_features(df)                                        # N x F
+    baseline = np.array(list(baseline_weights.values()), dtype=np.float64)
+    scores = features @ np.vstack([baseline, W]).T                      # N x (1 + K)
+    ranks = column_ranks(scores)
+    baseline_ranks, ranks = ranks[:, 0], ranks[:, 1:]
+
+    n_bids, n_scenarios = ranks.shape
+    name_column = 'contractor_name' if 'contractor_name' in df.columns else 'contract_name'
+    names = df[name_column].to_numpy() if name_column in df.columns else np.arange(n_bids)
+    bids = pd.DataFrame({
+        'contractor_name': names,
+        'baseline_rank': baseline_ranks,
+        'mean_rank': ranks.mean(axis=1),
+        'std_rank': ranks.std(axis=1),
+        'best_rank': ranks.min(axis=1),
+        'worst_rank': ranks.max(axis=1),
+        'win_share': (ranks == 1).mean(axis=1),
+        f'top{top_k}_share': (ranks <= top_k).mean(axis=1),
+    }, index=df.index).sort_values(['mean_rank', 'baseline_rank'])
+
+    # Ranks are a permutation in every column, so Spearman's rho has the closed form
+    d_squared = ((ranks - baseline_ranks[:, None]) ** 2).sum(axis=0)
+    spearman = 1 - 6 * d_squared / (n_bids * (n_bids ** 2 - 1)) if n_bids > 1 else np.ones(n_scenarios)
+    winners = np.argmin(ranks, axis=0)
+    scenarios = pd.DataFrame(W, columns=list(baseline_weights))
+    scenarios['winner'] = names[winners]
+    scenarios['winner_changed'] = winners != np.argmin(baseline_ranks)
+    scenarios['spearman_vs_baseline'] = spearman
+
+    return {'bids': bids, 'scenarios': scenarios}
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Single-flight execution for async callers
+Concurrent calls with the same key share one in-progress computation: the first caller
+starts it and later callers await the same task. Nothing is kept once it finishes, so a
+later call computes afresh.
+"""
+
+import asyncio
+import copy
+
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight = {}  # key -> asyncio.Task
+        self.started = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    async def do(self, key, fn):
+        """
+        (result, shared) of fn(), a coroutine function. shared is True when this call
+        joined a computation another caller started; it then gets its own copy of the result.
+        A cancelled caller doesn't cancel the computation for the others.
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+
+        result = await asyncio.shield(task)
+        return (copy.deepcopy(result) if shared else result), shared
+
+    def _finish(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            self.failed += 1
+
+    def stats(self):
+        return {
+            'in_flight': len(self._in_flight),
+            'started': self.started,
+            'coalesced': self.coalesced,
+            'failed': self.failed,
+        }
@@ -9,7 +9,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_auc_score
 import xgboost as xgb
 from xgboost import XGBClassifier
@@ -22,6 +22,14 @@ from PIL import Image
 import cv2
 import re
 import os
+import io
+import mmap
+import json
+import hashlib
+import tempfile
+import time
+import joblib
+from contextlib import contextmanager
 from typing import Dict, List
 
 # Tesseract OCR with fallback
@@ -53,11 +61,248 @@ import sys
 if hasattr(sys.stdout, 'reconfigure'):
     sys.stdout.reconfigure(encoding='utf-8')
 
+# Sibling modules - importable both as part of the HamroAi package and as plain scripts
+try:
+    from .encoders import CategoricalEncoderRegistry
+    from .fast_inference import CompiledPredictor, FEATURE_COLUMNS
+    from .chart_renderer import draw_comparison
+    from .ocr_line_parser import parse_ocr_fields
+    from .regex_guard import RegexBudget
+    from .extraction_tiers import TEXT_TIER, TIERS, TIER_FIELDS, ExtractionDeadline, TierCostModel, TierReport, next_tier
+    from .amounts import MIN_BID_AMOUNT, MIN_EVIDENCE, best_amount, find_amounts, rank_amounts
+    from .page_cache import DocumentPages, page_fingerprints
+    from .near_duplicates import document_signature
+    from .contractor_profiles import PROFILE_FIELDS, ContractorProfileStore, find_contractor_name, find_registration
+    from .result_cache import ResultCache
+    from .ranking import composite_scores, comprehensive_scores, rank_bids, target_scores
+except ImportError:
+    from encoders import CategoricalEncoderRegistry
+    from fast_inference import CompiledPredictor, FEATURE_COLUMNS
+    from chart_renderer import draw_comparison
+    from ocr_line_parser import parse_ocr_fields
+    from regex_guard import RegexBudget
+    from extraction_tiers import TEXT_TIER, TIERS, TIER_FIELDS, ExtractionDeadline, TierCostModel, TierReport, next_tier
+    from amounts import MIN_BID_AMOUNT, MIN_EVIDENCE, best_amount, find_amounts, rank_amounts
+    from page_cache import DocumentPages, page_fingerprints
+    from near_duplicates import document_signature
+    from contractor_profiles import PROFILE_FIELDS, ContractorProfileStore, find_contractor_name, find_registration
+    from result_cache import ResultCache
+    from ranking import composite_scores, comprehensive_scores, rank_bids, target_scores
+
+# PDFs up to this size are parsed straight from memory; larger buffers are spilled
+# to an anonymous temp file and memory-mapped so they don't sit on the heap
+IN_MEMORY_PDF_MAX_BYTES = 16 * 1024 * 1024
+# Wall-clock seconds of pattern matching allowed per document before remaining searches are skipped
+REGEX_BUDGET_SECONDS = float(os.getenv('REGEX_BUDGET_SECONDS', '5'))
+# Default wall-clock budget for a whole extract_data_from_pdf call (unset: no limit)
+EXTRACTION_TIME_BUDGET_SECONDS = float(os.getenv('EXTRACTION_TIME_BUDGET_SECONDS')) if os.getenv('EXTRACTION_TIME_BUDGET_SECONDS') else None
+
+# Running cost/yield estimates of the extraction tiers, shared by every document this process extracts
+TIER_COST_MODEL = TierCostModel()
+
+# Tier results per page, keyed by page fingerprint, so a resubmitted document only has its changed
+# pages extracted again. Set PAGE_CACHE_DIR to keep them on disk too (shared by worker processes
+# and command-line runs), where the oldest are removed once PAGE_CACHE_DISK_MB is exceeded
+# (0: no limit); PAGE_CACHE_PAGES=0 turns the cache off.
+PAGE_CACHE_PAGES = int(os.getenv('PAGE_CACHE_PAGES', '2048'))
+PAGE_CACHE_TTL_SECONDS = float(os.getenv('PAGE_CACHE_TTL_SECONDS', str(7 * 86400)))
+PAGE_CACHE_DIR = os.getenv('PAGE_CACHE_DIR') or None
+PAGE_CACHE_DISK_MB = float(os.getenv('PAGE_CACHE_DISK_MB', '512'))
+PAGE_CACHE = ResultCache(
+    PAGE_CACHE_PAGES, PAGE_CACHE_TTL_SECONDS, PAGE_CACHE_DIR,
+    max_disk_bytes=int(PAGE_CACHE_DISK_MB * 1024 * 1024) if PAGE_CACHE_DISK_MB > 0 else None
+) if PAGE_CACHE_PAGES > 0 else None
+
+# Contractor-level fields (rating, success rate, rejections, safety) confirmed by earlier bids,
+# used instead of hunting for them again. Set CONTRACTOR_PROFILES_PATH to keep them in a JSON
+# file (shared by worker processes and CLI runs, and kept across restarts); without it they only
+# last as long as the process. ExtractionScheduler workers need the path to use profiles at all.
+CONTRACTOR_PROFILES_PATH = os.getenv('CONTRACTOR_PROFILES_PATH') or None
+CONTRACTOR_PROFILE_MIN_CONFIRMATIONS = int(os.getenv('CONTRACTOR_PROFILE_MIN_CONFIRMATIONS', '2'))
+CONTRACTOR_PROFILE_MAX_AGE_DAYS = float(os.getenv('CONTRACTOR_PROFILE_MAX_AGE_DAYS', '180'))
+CONTRACTOR_PROFILES = ContractorProfileStore(
+    CONTRACTOR_PROFILES_PATH, CONTRACTOR_PROFILE_MIN_CONFIRMATIONS, CONTRACTOR_PROFILE_MAX_AGE_DAYS
+)
+
+# Trained model bundle (model, scaler and fitted encoders). With TENDER_MODEL_PATH set,
+# initialize_model loads it instead of retraining, and saves a freshly trained model there,
+# so restarts and every process sharing the path score with the same category codes.
+TENDER_MODEL_PATH = os.getenv('TENDER_MODEL_PATH') or None
+
+# Key/value patterns for page text, per field in priority order. Every pattern passes
+# regex_guard.find_superlinear_risks: label, separator and value parts can't compete for
+# the same characters, so matching stays linear on hostile PDF text
+TENDER_TEXT_PATTERNS = {
+    'contractor_name': [
+        r'(?i)Contractor\s*Name\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Contractor\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Company\s*Name\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Firm\s*Name\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Name\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Contractor\s*Name[•\s]*([^\n\r]+)',
+        r'(?i)Contractor[•\s]*([^\n\r]+)',
+        r'(?i)Company[•\s]*([^\n\r]+)',
+        r'(?i)Firm[•\s]*([^\n\r]+)',
+        r'(?i)Name[•\s]*([^\n\r]+)',
+        r'(?i)Contractor\s*Name\s*=\s*([^\n\r]+)',
+        r'(?i)Contractor\s*=\s*([^\n\r]+)',
+        r'(?i)Company\s*=\s*([^\n\r]+)',
+        r'(?i)Firm\s*=\s*([^\n\r]+)',
+        r'(?i)Name\s*=\s*([^\n\r]+)',
+        # More flexible patterns
+        r'(?i)Contractor\s*Name\s*([^\n\r]+)',
+        r'(?i)Contractor\s*([^\n\r]+)',
+        r'(?i)Company\s*([^\n\r]+)',
+        r'(?i)Firm\s*([^\n\r]+)',
+        r'(?i)Name\s*([^\n\r]+)'
+    ],
+    'contract_name': [
+        r'(?i)Contract\s*Name\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Project\s*Name\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Tender\s*Name\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Work\s*Description\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Contract\s*Title\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Project\s*Title\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Contract\s*Name[•\s]*([^\n\r]+)',
+        r'(?i)Name\s*of\s*Work\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Description\s*of\s*Work\s*[:\-]\s*([^\n\r]+)'
+    ],
+    'license_category': [
+        r'(?i)Contractor\s*License\s*Category\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)License\s*Category\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Category\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Class\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Grade\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Category[•\s]*([^\n\r]+)',
+        r'(?i)C\d+\s*[–\-]\s*([^\n\r]+)',
+        r'(?i)([A-C]\d*)\s*[–\-]\s*([^\n\r]+)'
+    ],
+    'project_duration': [
+        r'(?i)Project\s*Duration\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Duration\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Contract\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Time\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Completion\s*Time\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Duration[•\s]*(\d+)\s*(?:months?|days?|years?)'
+    ],
+    'warranty_period': [
+        r'(?i)Warranty\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Warranty\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Guarantee\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Maintenance\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Defect\s*Liability\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+        r'(?i)Warranty[•\s]*(\d+)\s*(?:months?|days?|years?)'
+    ],
+    'client_rating': [
+        r'(?i)Average\s*Client\s*Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
+        r'(?i)Client\s*Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
+        r'(?i)Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
+        r'(?i)Performance\s*Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
+        r'(?i)Quality\s*Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
+        r'(?i)Rating[•\s]*(\d+(?:\.\d+)?)',
+        r'(?i)Score\s*[:\-]\s*(\d+(?:\.\d+)?)'
+    ],
+    'project_success_rate': [
+        r'(?i)Project\s*Success\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Success\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Success\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Completion\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Performance\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Track\s*Record\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
+        r'(?i)Success\s*Rate[•\s]*(\d+(?:\.\d+)?)\s*%'
+    ],
+    'rejection_history': [
+        r'(?i)Rejection\s*History\s*[:\-]\s*(\d+)',
+        r'(?i)Rejections\s*[:\-]\s*(\d+)',
+        r'(?i)Failed\s*Bids\s*[:\-]\s*(\d+)',
+        r'(?i)Rejected\s*Tenders\s*[:\-]\s*(\d+)',
+        r'(?i)Rejection[•\s]*(\d+)',
+        r'(?i)History\s*[:\-]\s*(\d+)'
+    ],
+    'safety_certification': [
+        r'(?i)Safety\s*Certification\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Safety\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Certification\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Safety\s*Record\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Safety[•\s]*([^\n\r]+)',
+        r'(?i)ISO\s*[:\-]\s*([^\n\r]+)',
+        r'(?i)Quality\s*Certification\s*[:\-]\s*([^\n\r]+)'
+    ],
+    'bid_amount': [
+        r'(?i)Bid\s*Amount\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Total\s*Amount\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Contract\s*Value\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Project\s*Cost\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Tender\s*Value\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Estimated\s*Cost\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Budget\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Price\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Cost\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Value\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Amount\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Rs\.?\s*([\d,]+(?:\.\d+)?)',
+        r'(?i)₹\s*([\d,]+(?:\.\d+)?)',
+        r'(?i)\$\s*([\d,]+(?:\.\d+)?)',
+        r'(?i)(?:Total|Bid|Contract)\s*(?:Amount|Value|Price)\s*[:\-]\s*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)(?<![\d,])([\d,]{6,}(?:\.\d+)?)\s*(?:lakhs?|crores?|million)',
+        r'(?i)(?<![\d,])([\d,]+(?:\.\d+)?)\s*(?:lakhs?|crores?|million)\s*(?:rupees?|USD)',
+        r'(?i)Bid\s*Amount[•\s]*(?:[\$₹€]\s*)?([\d,]+(?:\.\d+)?)',
+        r'(?i)Bid\s*Amount\s*([\d,]+(?:\.\d+)?)',
+        r'(?i)Amount\s*([\d,]+(?:\.\d+)?)'
+    ]
+}
+
+# Fallback company-name shapes; a name may only start at a word start and is capped at 7 words,
+# so a long run of capitalised words can't be rescanned from every letter
+COMPANY_NAME_PATTERNS = [
+    r'(?i)(?<![A-Za-z])([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,6}\s+(?:Construction|Builders|Developers|Ltd|LLC|Inc|Corp|Company|Firm))',
+    r'(?i)(?<![A-Za-z])([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,6}\s+(?:&|and)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,6})',
+    r'(?i)(?<![A-Za-z])([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,6}\s+[A-Z][a-z]+)'
+]
+
+@contextmanager
+def _open_pdf(pdf_source):
+    """
+    Open a PDF given a path, raw bytes or a binary file object.
+    Bytes and uploads never touch a named file on disk.
+    """
+    if isinstance(pdf_source, (str, os.PathLike)):
+        with pdfplumber.open(pdf_source) as pdf:
+            yield pdf
+        return
+
+    if hasattr(pdf_source, 'read') and hasattr(pdf_source, 'seek'):
+        try:
+            pdf_source.seek(0)
+            seekable = True
+        except (OSError, ValueError):
+            seekable = False
+        if seekable:
+            with pdfplumber.open(pdf_source) as pdf:
+                yield pdf
+            return
+    if hasattr(pdf_source, 'read'):
+        pdf_source = pdf_source.read()
+
+    data = memoryview(pdf_source)
+    if data.nbytes <= IN_MEMORY_PDF_MAX_BYTES:
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            yield pdf
+        return
+
+    with tempfile.TemporaryFile() as spill:
+        spill.write(data)
+        spill.flush()
+        with mmap.mmap(spill.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with pdfplumber.open(mapped) as pdf:
+                yield pdf
+
 class TenderPredictor:
     def __init__(self):
         self.model = None
         self.scaler = StandardScaler()
-        self.label_encoders = {}
+        self.encoders = CategoricalEncoderRegistry()
         self.feature_names = [
             'contractor_name', 'contract_name', 'license_category', 
             'project_duration', 'warranty_period', 'client_rating',
@@ -85,109 +330,220 @@ class TenderPredictor:
         }
         
         self.feature_importance = None
+        self._model_version = None
+        # Details of the most recent extract_data_from_pdf call (e.g. which fields were guessed)
+        self.last_extraction_info = {'defaulted_fields': [], 'missing_fields': []}
 
-    def extract_data_from_pdf(self, pdf_path):
+    def extract_data_from_pdf(self, pdf_path, time_budget=None, allow_ocr=True, duplicates=None):
         """
-        Extract tender data from PDF using optimized OCR and text extraction
+        Extract tender data from PDF using optimized OCR and text extraction.
+        pdf_path may also be the PDF's bytes or a binary file object (e.g. an upload).
+        time_budget (seconds, default EXTRACTION_TIME_BUDGET_SECONDS, None for no limit)
+        bounds the whole extraction: after the page text, the other tiers run in order of
+        expected fields per millisecond while they fit, and whatever is still missing is defaulted.
+        allow_ocr=False reads only the text layer (the degraded mode used under load).
+        Pages unchanged since an earlier extraction (same fingerprint) reuse its per-page results.
+        duplicates (a near_duplicates.TenderIndex of the tender's earlier documents): when the
+        page text nearly duplicates one of them, the other tiers are skipped and
+        last_extraction_info['near_duplicate'] names the document to take the remaining fields from.
+        Contractor fields with a trusted profile (CONTRACTOR_PROFILES) aren't searched for, and
+        fields the document states are added to the contractor's profile.
         """
-        print(f"\nExtracting data from: {pdf_path}")
+        source_label = pdf_path if isinstance(pdf_path, (str, os.PathLike)) else f"<in-memory {type(pdf_path).__name__}>"
+        print(f"\nExtracting data from: {source_label}")
         print("-" * 60)
         
+        if time_budget is None:
+            time_budget = EXTRACTION_TIME_BUDGET_SECONDS
+        deadline = ExtractionDeadline(time_budget)
+        report = TierReport()
         extracted_data = {}
+        fields_source = {}
+        budget = RegexBudget(REGEX_BUDGET_SECONDS)
+        self.last_extraction_info = {
+            'defaulted_fields': [], 'missing_fields': [], 'bid_amount_source': None,
+            'fields_source': fields_source, 'time_defaulted_fields': [], 'time_budget': time_budget,
+            'allow_ocr': allow_ocr, 'near_duplicate': None, 'contractor_profile': None,
+        }
+        contractor = registration = document_id = None
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
+            with _open_pdf(pdf_path) as pdf:
                 # Process ALL pages for complete data extraction
                 total_pages = len(pdf.pages)
                 print(f"📄 Processing ALL {total_pages} pages for complete data extraction...")
                 
-                for page_num, page in enumerate(pdf.pages, 1):
-                    print(f"Processing page {page_num}...")
-                    # Method 1: Try text extraction first
-                    text = page.extract_text()
-                    print(f"[DEBUG] Page {page_num} text: {text[:500]}")
-                    
-                    # Debug: Look for contractor-related text
-                    contractor_debug = re.findall(r'(?i)(contractor|company|firm|name)[\s\-\:]*([^\n\r]+)', text)
-                    if contractor_debug:
-                        print(f"[DEBUG] Found contractor-related text on page {page_num}:")
-                        for match in contractor_debug[:5]:  # Show first 5 matches
-                            print(f"    '{match[0]}': '{match[1].strip()}'")
-                    
-                    tables = page.extract_tables()
-                    
-                    # Process text for tender information
-                    tender_info = self._parse_tender_text(text)
-                    table_data = self._parse_tender_tables(tables)
-                    combined_data = {**tender_info, **table_data}
+                # Per-tier results by page number; merged in page order once the tiers are done
+                page_texts = {}
+                amount_candidates = []
+                results = {tier: {} for tier in TIERS}
+                page_cache = self._document_pages(pdf, budget)
+                self.last_extraction_info['page_hashes'] = page_cache.fingerprints
+                
+                # Method 1: text extraction on every page (everything else builds on it)
+                results[TEXT_TIER] = self._run_extraction_tier(
+                    TEXT_TIER, enumerate(pdf.pages, 1), deadline, report,
+                    lambda page_num, page: self._text_tier_page(page, page_num, page_texts, amount_candidates, budget, page_cache),
+                    page_cache=page_cache,
+                    on_reuse=lambda page_num: self._reuse_text_page(page_num, page_texts, amount_candidates, page_cache)
+                )
+                
+                # Shingle signature of the text, for near-duplicate checks within a tender
+                signature = document_signature([page_texts[n] for n in sorted(page_texts)])
+                self.last_extraction_info['minhash'] = signature.tolist() if signature is not None else None
+                
+                # Content identity, so extracting the same document again doesn't confirm its own values
+                document_id = hashlib.sha256(''.join(
+                    page_cache.fingerprints or [page_texts[n] or '' for n in sorted(page_texts)]
+                ).encode('utf-8')).hexdigest()
+                
+                # Contractor fields confirmed by earlier bids count as found, so no tier hunts for them.
+                # Profiles are keyed only on a contractor-labelled name/registration, never on the
+                # loosely matched or defaulted contractor_name
+                contractor = find_contractor_name(page_texts[n] for n in sorted(page_texts))
+                registration = find_registration(page_texts[n] for n in sorted(page_texts))
+                profile_key, profile_fields = None, {}
+                if CONTRACTOR_PROFILES is not None and (contractor or registration):
+                    profile_key, profile_fields = CONTRACTOR_PROFILES.trusted_fields(contractor, registration)
+                    if profile_fields:
+                        print(f"👷 Trusted profile {profile_key} covers {sorted(profile_fields)}")
+                
+                # Remaining tiers, best expected fields per millisecond first
+                pending = [tier for tier in TIERS if tier != TEXT_TIER]
+                if not TESSERACT_WORKING or not allow_ocr:
+                    for tier in ('quick_ocr', 'deep_ocr'):
+                        pending.remove(tier)
+                        report.record(tier, 'unavailable' if allow_ocr else 'disabled')
+                match = duplicates.reusable(signature) if duplicates is not None and signature is not None else None
+                if match is not None:
+                    print(f"♻️  Near-duplicate of {match.document[:12]} (similarity {match.similarity}) - reusing its extraction")
+                    self.last_extraction_info['near_duplicate'] = match._asdict()
+                    for tier in pending:
+                        report.record(tier, 'near_duplicate')
+                    pending = []
+                while pending:
+                    # Tiers that can't fit even one more page are out of the running
+                    for tier in [t for t in pending if not deadline.allows(TIER_COST_MODEL.page_ms(t))]:
+                        print(f"  ⏱️ Skipping {tier} - {max(deadline.remaining_ms(), 0):.0f} ms left of the time budget")
+                        pending.remove(tier)
+                        report.record(tier, 'skipped_deadline')
+                    if not pending:
+                        break
+                    found = self._fields_found(results, amount_candidates, profile_fields)
+                    missing = [param for param in self.feature_names if param not in found]
+                    eligible = {tier: self._tier_pages(tier, pdf.pages, page_texts, results, missing) for tier in pending}
+                    tier = next_tier(TIER_COST_MODEL, {t: len(pages) for t, pages in eligible.items()}, missing, found)
+                    if tier is None:
+                        for tier in pending:
+                            report.record(tier, 'not_needed')
+                        break
+                    pending.remove(tier)
                     
-                    # Method 2: Quick OCR only if text extraction fails
-                    if not combined_data and len(text.strip()) < 50:
-                        print(f"  🔍 Quick OCR for page {page_num}")
-                        ocr_data = self._quick_ocr_extraction(page, page_num)
-                        combined_data = {**combined_data, **ocr_data}
+                    if tier == 'tables':
+                        results[tier] = self._run_extraction_tier(
+                            tier, eligible[tier], deadline, report,
+                            lambda page_num, page: self._parse_tender_tables(page.extract_tables()),
+                            page_cache=page_cache
+                        )
+                    elif tier == 'quick_ocr':
+                        # Method 2: Quick OCR for pages whose text layer gave nothing
+                        results[tier] = self._run_extraction_tier(
+                            tier, eligible[tier], deadline, report,
+                            lambda page_num, page: self._quick_ocr_extraction(page, page_num, budget),
+                            page_cache=page_cache
+                        )
+                    elif tier == 'deep_ocr':
+                        # Multi-config OCR, page by page until a bid amount turns up
+                        results[tier] = self._run_extraction_tier(
+                            tier, eligible[tier], deadline, report,
+                            lambda page_num, page: self._extract_bid_amount_with_ocr(page, page_num),
+                            stop_when_found=True, page_cache=page_cache
+                        )
+                    elif tier == 'enhanced':
+                        # Enhanced patterns over the text already read (no second pass over the PDF)
+                        print(f"🔍 Enhanced extraction for missing parameters: {missing}")
+                        started = time.perf_counter()
+                        enhanced_data = self._enhanced_extraction([page_texts[n] for n in sorted(page_texts)], missing, budget)
+                        elapsed_ms = (time.perf_counter() - started) * 1000
+                        TIER_COST_MODEL.observe(tier, len(page_texts), elapsed_ms, len(enhanced_data))
+                        report.record(tier, 'done', elapsed_ms, len(page_texts), len(enhanced_data))
+                        results[tier] = {None: enhanced_data} if enhanced_data else {}
+                
+                # Merge page by page: the earliest page wins, and on a page tables beat text, which beats OCR
+                for page_num in sorted(set(results['text']) | set(results['tables']) | set(results['quick_ocr'])):
+                    combined = {}
+                    for tier in ('quick_ocr', 'text', 'tables'):
+                        for key, value in results[tier].get(page_num, {}).items():
+                            combined[key] = (value, tier)
                     
-                    if combined_data:
-                        # Merge with existing data for this PDF
-                        for key, value in combined_data.items():
-                            # Only set license_category if not already set, or if the new value is more specific (contains C1/C2)
-                            if key == 'license_category':
-                                if ('license_category' not in extracted_data or extracted_data['license_category'] is None):
-                                    extracted_data['license_category'] = value
-                                    print(f"  🏷️ Set license_category: {value}")
-                                elif re.search(r'C\d+\s*[–\-]', value) and not re.search(r'C\d+\s*[–\-]', extracted_data['license_category']):
-                                    # Overwrite only if new value is more specific
-                                    extracted_data['license_category'] = value
-                                    print(f"  🏷️ Overwrote license_category with more specific value: {value}")
-                            else:
-                                if key not in extracted_data or extracted_data[key] is None:
-                                    extracted_data[key] = value
-                        
-                        print(f"Page {page_num} - Data extracted:")
-                        for key, value in combined_data.items():
-                            if key in self.feature_names:
-                                print(f"  ✅ {key}: {value}")
+                    for key, (value, tier) in combined.items():
+                        # Only set license_category if not already set, or if the new value is more specific (contains C1/C2)
+                        if key == 'license_category':
+                            if ('license_category' not in extracted_data or extracted_data['license_category'] is None):
+                                extracted_data['license_category'] = value
+                                fields_source[key] = {'tier': tier, 'page': page_num}
+                                print(f"  🏷️ Set license_category: {value}")
+                            elif re.search(r'C\d+\s*[–\-]', value) and not re.search(r'C\d+\s*[–\-]', extracted_data['license_category']):
+                                # Overwrite only if new value is more specific
+                                extracted_data['license_category'] = value
+                                fields_source[key] = {'tier': tier, 'page': page_num}
+                                print(f"  🏷️ Overwrote license_category with more specific value: {value}")
+                        else:
+                            if key not in extracted_data or extracted_data[key] is None:
+                                extracted_data[key] = value
+                                fields_source[key] = {'tier': tier, 'page': page_num}
                     
-                    # Quick bid amount extraction from any page (not just page 38)
-                    if 'bid_amount' not in extracted_data or extracted_data['bid_amount'] is None:
-                        print(f"  Looking for bid amount on page {page_num}...")
-                        
-                        # Simple bid amount patterns
-                        bid_patterns = [
-                            r'Bid Amount\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'Amount\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'Total\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'Price\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'Cost\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'[\$₹€]?\s*([\d,]{5,}(?:\.\d+)?)'  # Large amounts
-                        ]
-                        
-                        for pattern in bid_patterns:
-                            matches = re.findall(pattern, text, re.IGNORECASE)
-                            if matches:
-                                # Convert to float and find the largest amount
-                                amounts = [float(match.replace(',', '')) for match in matches if match.replace(',', '').replace('.', '').isdigit()]
-                                if amounts:
-                                    largest_amount = max(amounts)
-                                    if largest_amount > 1000:  # Only consider substantial amounts
-                                        extracted_data['bid_amount'] = largest_amount
-                                        print(f"  🎯 Found bid amount on page {page_num}: {largest_amount}")
-                                        break
-                # --- NEW: Always check page 38 for bid amount ---
-                if total_pages >= 38:
-                    page_38 = pdf.pages[37]
-                    text_38 = page_38.extract_text()
-                    if text_38:
-                        match = re.search(r'Bid Amount\s*[:\-]*\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)', text_38)
-                        if match:
-                            value = match.group(1).replace(',', '')
-                            try:
-                                value = float(value)
-                                if value > 1000:
-                                    extracted_data['bid_amount'] = value
-                                    print(f"  🏆 Overriding bid_amount with value from page 38: {value}")
-                            except Exception as e:
-                                print(f"  ⚠️  Error parsing bid_amount from page 38: {e}")
+                    print(f"Page {page_num} - Data extracted:")
+                    for key, (value, tier) in combined.items():
+                        if key in self.feature_names:
+                            print(f"  ✅ {key}: {value} ({tier})")
+                
+                # Pick the bid amount by label evidence across all pages; a value labelled
+                # "Bid Amount" overrides whatever the generic parsers found, and so does
+                # any labelled candidate when the parsers only produced an implausibly small number
+                best = best_amount(amount_candidates, MIN_EVIDENCE)
+                if best is not None:
+                    current = extracted_data.get('bid_amount')
+                    if current is None:
+                        extracted_data['bid_amount'] = best.value
+                        print(f"  🎯 Found bid amount on page {best.page}: {best.value} ({best.label or 'unlabelled'} '{best.raw}')")
+                    elif (best.label == 'bid_amount' or current < MIN_BID_AMOUNT) and best.value != current:
+                        extracted_data['bid_amount'] = best.value
+                        print(f"  🏆 Overriding bid_amount with value from page {best.page}: {best.value}")
+                    if extracted_data['bid_amount'] == best.value:
+                        self.last_extraction_info['bid_amount_source'] = best._asdict()
+                        fields_source['bid_amount'] = {'tier': TEXT_TIER, 'page': best.page}
+                
+                # Fallback tiers only fill what the page tiers left empty
+                for tier in ('enhanced', 'deep_ocr'):
+                    for page_num, data in results[tier].items():
+                        for key, value in data.items():
+                            if key in self.feature_names and extracted_data.get(key) is None:
+                                extracted_data[key] = value
+                                fields_source[key] = {'tier': tier, 'page': page_num}
+                                print(f"  ✅ {tier} found {key}: {value}")
+                
+                # Last resort: a bare number (no label, currency or unit) once every tier came up empty
+                current = extracted_data.get('bid_amount')
+                best = best_amount(amount_candidates) if current is None or current < MIN_BID_AMOUNT else None
+                if best is not None and best.score < MIN_EVIDENCE:
+                    extracted_data['bid_amount'] = best.value
+                    self.last_extraction_info['bid_amount_source'] = best._asdict()
+                    fields_source['bid_amount'] = {'tier': TEXT_TIER, 'page': best.page}
+                    print(f"  ⚠️  Using unlabelled number from page {best.page} as bid amount: {best.value}")
+                
+                # The profile only stands in for what the document itself doesn't state
+                profile_filled = [field for field in profile_fields if extracted_data.get(field) is None]
+                for field in profile_filled:
+                    extracted_data[field] = profile_fields[field]
+                    fields_source[field] = {'tier': 'profile', 'page': None}
+                    print(f"  👷 {field} from contractor profile: {profile_fields[field]}")
+                self.last_extraction_info['contractor_profile'] = {
+                    'key': profile_key, 'trusted': sorted(profile_fields), 'filled': profile_filled, 'recorded_as': None,
+                }
+                
+                page_cache.save()
+                self.last_extraction_info['pages_reused'] = dict(page_cache.reused)
             
             # Check if all required parameters were extracted
             missing_params = []
@@ -195,21 +551,18 @@ class TenderPredictor:
                 if param not in extracted_data or extracted_data[param] is None:
                     missing_params.append(param)
             
-            # Enhanced extraction for missing parameters
-            if missing_params:
-                print(f"🔍 Enhanced extraction for missing parameters: {missing_params}")
-                
-                # Try to extract more data from all pages with enhanced patterns
-                enhanced_data = self._enhanced_extraction(pdf_path, missing_params)
-                for key, value in enhanced_data.items():
-                    if key in missing_params and (key not in extracted_data or extracted_data[key] is None):
-                        extracted_data[key] = value
-                        print(f"  ✅ Enhanced extraction found {key}: {value}")
-                        missing_params.remove(key)
-            
             # Final check for remaining missing parameters
             if missing_params:
                 print(f"⚠️  Still missing parameters after enhanced extraction: {missing_params}")
+                
+                # Fields a tier cut short by the time budget might have found
+                cut_tiers = report.cut_by_deadline()
+                self.last_extraction_info['time_defaulted_fields'] = [
+                    param for param in missing_params
+                    if any(TIER_FIELDS[tier] is None or param in TIER_FIELDS[tier] for tier in cut_tiers)
+                ]
+                if self.last_extraction_info['time_defaulted_fields']:
+                    print(f"⏱️  Time budget ran out before {cut_tiers} could look for: {self.last_extraction_info['time_defaulted_fields']}")
                 print("Setting reasonable defaults for missing parameters...")
                 
                 # Set more realistic defaults based on extracted data
@@ -240,158 +593,258 @@ class TenderPredictor:
                     print(f"  ⚠️  No bid amount found - this is critical for analysis")
                     extracted_data['bid_amount'] = 1000000  # Default value
                 
+                # Remember which values are guesses so callers can treat them as uncertain
+                self.last_extraction_info['defaulted_fields'] = [
+                    param for param in missing_params if extracted_data.get(param) is not None
+                ]
+                self.last_extraction_info['missing_fields'] = [
+                    param for param in missing_params if extracted_data.get(param) is None
+                ]
+                
                 print("✅ All parameters now have values (extracted or estimated)")
             else:
                 print("✅ All required parameters extracted successfully!")
+            
+            # Values this document stated (not defaults or profile fills) update the contractor's profile
+            if CONTRACTOR_PROFILES is not None:
+                stated = {
+                    field: extracted_data[field] for field in PROFILE_FIELDS
+                    if fields_source.get(field, {}).get('tier') not in (None, 'profile')
+                }
+                recorded_as = CONTRACTOR_PROFILES.record(contractor, registration, stated, document_id)
+                if recorded_as and self.last_extraction_info['contractor_profile'] is not None:
+                    self.last_extraction_info['contractor_profile']['recorded_as'] = recorded_as
                         
         except Exception as e:
             print(f"❌ Error processing PDF: {e}")
+        
+        self.last_extraction_info['tiers'] = report.tiers
+        self.last_extraction_info['tier_ms'] = report.tier_ms()
+        self.last_extraction_info['elapsed_ms'] = round(deadline.elapsed_ms(), 1)
+        self.last_extraction_info['regex_budget'] = budget.stats()
+        if budget.exhausted:
+            print(f"⚠️  Regex time budget ({budget.seconds}s) exhausted - skipped {budget.skipped} pattern searches")
             
         return extracted_data
 
-    def _enhanced_extraction(self, pdf_path, missing_params):
+    def _run_extraction_tier(self, tier, pages, deadline, report, step, stop_when_found=False, page_cache=None,
+                             on_reuse=None):
         """
-        Enhanced extraction method that scans all pages with more comprehensive patterns
+        Run step(page_num, page) -> {field: value} over (page_num, page) pairs while another
+        page still fits in the deadline. Pages with a result for this tier in page_cache reuse
+        it instead (on_reuse(page_num) restores whatever else step would have recorded).
+        Returns {page_num: data} for pages that gave data and records the tier's time and yield.
+        """
+        found = {}
+        covered = 0
+        reused = 0
+        computed_fields = set()
+        status = 'done'
+        started = time.perf_counter()
+        for page_num, page in pages:
+            data = page_cache.get(page_num, tier) if page_cache is not None else None
+            if data is not None:
+                reused += 1
+                if on_reuse is not None:
+                    on_reuse(page_num)
+            else:
+                if not deadline.allows(TIER_COST_MODEL.page_ms(tier)):
+                    status = 'partial' if covered or reused else 'skipped_deadline'
+                    print(f"  ⏱️ Time budget reached - {tier} stopped after {covered} pages")
+                    break
+                data = step(page_num, page)
+                covered += 1
+                if page_cache is not None:
+                    page_cache.put(page_num, tier, data)
+                computed_fields.update(key for key in (data or {}) if key in self.feature_names)
+            if data:
+                found[page_num] = data
+                if stop_when_found:
+                    break
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Reused pages cost nothing, so time and yield cover only the pages processed here
+        TIER_COST_MODEL.observe(tier, covered, elapsed_ms, len(computed_fields))
+        report.record(tier, status, elapsed_ms, covered, len(computed_fields), reused)
+        return found
+
+    def _document_pages(self, pdf, budget):
+        """Cached per-page results for this document (an empty view if its pages can't be fingerprinted)"""
+        try:
+            fingerprints = page_fingerprints(pdf.pages)
+        except Exception as e:
+            print(f"⚠️  Could not fingerprint pages, extracting without the page cache: {e}")
+            return DocumentPages(None, [])
+        return DocumentPages(PAGE_CACHE, fingerprints, budget)
+
+    def _reuse_text_page(self, page_num, page_texts, amount_candidates, page_cache):
+        page_texts[page_num], amounts = page_cache.text(page_num)
+        amount_candidates.extend(amounts)
+        print(f"Page {page_num} unchanged - reusing its earlier text extraction")
+
+    def _text_tier_page(self, page, page_num, page_texts, amount_candidates, budget, page_cache=None):
+        """Text-layer extraction for one page: tender fields plus every amount token"""
+        print(f"Processing page {page_num}...")
+        text = page.extract_text()
+        page_texts[page_num] = text
+        print(f"[DEBUG] Page {page_num} text: {text[:500]}")
+        
+        # Debug: Look for contractor-related text
+        contractor_debug = budget.findall(r'(?i)(contractor|company|firm|name)[\s\-\:]*([^\n\r]+)', text)
+        if contractor_debug:
+            print(f"[DEBUG] Found contractor-related text on page {page_num}:")
+            for match in contractor_debug[:5]:  # Show first 5 matches
+                print(f"    '{match[0]}': '{match[1].strip()}'")
+        
+        # Every amount token on the page, found once with its label and unit
+        amounts = find_amounts(text, page_num)
+        amount_candidates.extend(amounts)
+        data = self._parse_tender_text(text, budget)
+        if page_cache is not None:
+            page_cache.keep_text(page_num, text, amounts)
+        return data
+
+    def _fields_found(self, results, amount_candidates, known=()):
+        found = {key for tier_results in results.values() for data in tier_results.values() for key in data}
+        found.update(known)
+        if best_amount(amount_candidates, MIN_EVIDENCE) is not None:
+            found.add('bid_amount')
+        return [param for param in self.feature_names if param in found]
+
+    def _tier_pages(self, tier, pages, page_texts, results, missing):
+        """(page_num, page) pairs a tier would process; only pages whose text was read are considered"""
+        if tier == 'enhanced':
+            return list(page_texts.items())
+        if tier == 'tables':
+            return [(n, pages[n - 1]) for n in sorted(page_texts)]
+        # OCR only pays off on pages with no usable text layer
+        scanned = [
+            (n, pages[n - 1]) for n in sorted(page_texts)
+            if len((page_texts[n] or '').strip()) < 50
+            and not results[TEXT_TIER].get(n) and not results['tables'].get(n)
+        ]
+        if tier == 'deep_ocr':
+            return scanned if 'bid_amount' in missing else []
+        return scanned
+
+    def _enhanced_extraction(self, pdf_path, missing_params, budget=None):
+        """
+        Enhanced extraction method that scans all pages with more comprehensive patterns.
+        pdf_path may be a list of already extracted page texts, or anything _open_pdf accepts.
         """
         enhanced_data = {}
+        amount_candidates = []
+        search = budget.search if budget is not None else re.search
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                print(f"🔍 Enhanced extraction scanning all {len(pdf.pages)} pages...")
+            if isinstance(pdf_path, list):
+                page_texts = pdf_path
+            else:
+                with _open_pdf(pdf_path) as pdf:
+                    page_texts = [page.extract_text() for page in pdf.pages]
+            print(f"🔍 Enhanced extraction scanning all {len(page_texts)} pages...")
+            
+            for page_num, text in enumerate(page_texts, 1):
+                if not text:
+                    continue
                 
-                for page_num, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text()
-                    if not text:
-                        continue
-                    
-                    # Enhanced patterns for each missing parameter
-                    if 'contract_name' in missing_params:
-                        contract_patterns = [
-                            r'(?i)Contract\s*Name\s*[:\-]\s*([^\n\r]+)',
-                            r'(?i)Project\s*Name\s*[:\-]\s*([^\n\r]+)',
-                            r'(?i)Tender\s*Name\s*[:\-]\s*([^\n\r]+)',
-                            r'(?i)Work\s*Description\s*[:\-]\s*([^\n\r]+)',
-                            r'(?i)Contract\s*Title\s*[:\-]\s*([^\n\r]+)',
-                            r'(?i)Project\s*Title\s*[:\-]\s*([^\n\r]+)'
-                        ]
-                        
-                        for pattern in contract_patterns:
-                            match = re.search(pattern, text)
-                            if match:
-                                contract_name = match.group(1).strip()
-                                if len(contract_name) > 5:  # Valid contract name
-                                    enhanced_data['contract_name'] = contract_name
-                                    print(f"  📄 Page {page_num}: Found contract name: {contract_name}")
-                                    break
+                # Enhanced patterns for each missing parameter
+                if 'contract_name' in missing_params:
+                    contract_patterns = [
+                        r'(?i)Contract\s*Name\s*[:\-]\s*([^\n\r]+)',
+                        r'(?i)Project\s*Name\s*[:\-]\s*([^\n\r]+)',
+                        r'(?i)Tender\s*Name\s*[:\-]\s*([^\n\r]+)',
+                        r'(?i)Work\s*Description\s*[:\-]\s*([^\n\r]+)',
+                        r'(?i)Contract\s*Title\s*[:\-]\s*([^\n\r]+)',
+                        r'(?i)Project\s*Title\s*[:\-]\s*([^\n\r]+)'
+                    ]
                     
-                    if 'project_duration' in missing_params:
-                        duration_patterns = [
-                            r'(?i)Duration\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                            r'(?i)Project\s*Duration\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                            r'(?i)Contract\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                            r'(?i)Time\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                            r'(?i)Completion\s*Time\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)'
-                        ]
-                        
-                        for pattern in duration_patterns:
-                            match = re.search(pattern, text)
-                            if match:
-                                duration = int(match.group(1))
-                                # Convert to months if needed
-                                if 'year' in text.lower():
-                                    duration *= 12
-                                elif 'day' in text.lower():
-                                    duration = max(1, duration // 30)
-                                enhanced_data['project_duration'] = duration
-                                print(f"  ⏱️ Page {page_num}: Found project duration: {duration} months")
+                    for pattern in contract_patterns:
+                        match = search(pattern, text)
+                        if match:
+                            contract_name = match.group(1).strip()
+                            if len(contract_name) > 5:  # Valid contract name
+                                enhanced_data['contract_name'] = contract_name
+                                print(f"  📄 Page {page_num}: Found contract name: {contract_name}")
                                 break
+                
+                if 'project_duration' in missing_params:
+                    duration_patterns = [
+                        r'(?i)Duration\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+                        r'(?i)Project\s*Duration\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+                        r'(?i)Contract\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+                        r'(?i)Time\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+                        r'(?i)Completion\s*Time\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)'
+                    ]
                     
-                    if 'warranty_period' in missing_params:
-                        warranty_patterns = [
-                            r'(?i)Warranty\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                            r'(?i)Warranty\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                            r'(?i)Guarantee\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                            r'(?i)Maintenance\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)'
-                        ]
-                        
-                        for pattern in warranty_patterns:
-                            match = re.search(pattern, text)
-                            if match:
-                                warranty = int(match.group(1))
-                                # Convert to months if needed
-                                if 'year' in text.lower():
-                                    warranty *= 12
-                                elif 'day' in text.lower():
-                                    warranty = max(1, warranty // 30)
-                                enhanced_data['warranty_period'] = warranty
-                                print(f"  🛡️ Page {page_num}: Found warranty period: {warranty} months")
-                                break
+                    for pattern in duration_patterns:
+                        match = search(pattern, text)
+                        if match:
+                            duration = int(match.group(1))
+                            # Convert to months if needed
+                            if 'year' in text.lower():
+                                duration *= 12
+                            elif 'day' in text.lower():
+                                duration = max(1, duration // 30)
+                            enhanced_data['project_duration'] = duration
+                            print(f"  ⏱️ Page {page_num}: Found project duration: {duration} months")
+                            break
+                
+                if 'warranty_period' in missing_params:
+                    warranty_patterns = [
+                        r'(?i)Warranty\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+                        r'(?i)Warranty\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+                        r'(?i)Guarantee\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
+                        r'(?i)Maintenance\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)'
+                    ]
                     
-                    if 'project_success_rate' in missing_params:
-                        success_patterns = [
-                            r'(?i)Success\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
-                            r'(?i)Completion\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
-                            r'(?i)Performance\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
-                            r'(?i)Track\s*Record\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%'
-                        ]
-                        
-                        for pattern in success_patterns:
-                            match = re.search(pattern, text)
-                            if match:
-                                success_rate = float(match.group(1))
-                                enhanced_data['project_success_rate'] = success_rate
-                                print(f"  📈 Page {page_num}: Found success rate: {success_rate}%")
-                                break
+                    for pattern in warranty_patterns:
+                        match = search(pattern, text)
+                        if match:
+                            warranty = int(match.group(1))
+                            # Convert to months if needed
+                            if 'year' in text.lower():
+                                warranty *= 12
+                            elif 'day' in text.lower():
+                                warranty = max(1, warranty // 30)
+                            enhanced_data['warranty_period'] = warranty
+                            print(f"  🛡️ Page {page_num}: Found warranty period: {warranty} months")
+                            break
+                
+                if 'project_success_rate' in missing_params:
+                    success_patterns = [
+                        r'(?i)Success\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
+                        r'(?i)Completion\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
+                        r'(?i)Performance\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
+                        r'(?i)Track\s*Record\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%'
+                    ]
                     
-                    if 'bid_amount' in missing_params:
-                        # Enhanced bid amount patterns
-                        bid_patterns = [
-                            r'(?i)Bid\s*Amount\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Total\s*Amount\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Contract\s*Value\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Project\s*Cost\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Tender\s*Value\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Estimated\s*Cost\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Budget\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Price\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Cost\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Value\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Amount\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)Rs\.?\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)₹\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)\$\s*([\d,]+(?:\.\d+)?)',
-                            r'(?i)([\d,]{6,}(?:\.\d+)?)\s*(?:lakhs?|crores?|million)',
-                            r'(?i)([\d,]+(?:\.\d+)?)\s*(?:lakhs?|crores?|million)\s*(?:rupees?|USD)'
-                        ]
-                        
-                        all_amounts = []
-                        for pattern in bid_patterns:
-                            matches = re.findall(pattern, text)
-                            for match in matches:
-                                try:
-                                    amount = float(match.replace(',', ''))
-                                    if amount >= 1000 and amount <= 1000000000:  # Reasonable range
-                                        all_amounts.append(amount)
-                                except:
-                                    continue
-                        
-                        if all_amounts:
-                            # Take the largest amount as bid amount
-                            bid_value = max(all_amounts)
-                            enhanced_data['bid_amount'] = bid_value
-                            print(f"  💰 Page {page_num}: Found bid amount: {bid_value}")
+                    for pattern in success_patterns:
+                        match = search(pattern, text)
+                        if match:
+                            success_rate = float(match.group(1))
+                            enhanced_data['project_success_rate'] = success_rate
+                            print(f"  📈 Page {page_num}: Found success rate: {success_rate}%")
+                            break
+                
+                if 'bid_amount' in missing_params:
+                    amount_candidates.extend(find_amounts(text, page_num))
+                
+                # Check if we found all missing parameters
+                if len(enhanced_data) == len(missing_params):
+                    print(f"✅ Enhanced extraction completed - found all missing parameters")
+                    break
+            
+            best = best_amount(amount_candidates, MIN_EVIDENCE)
+            if best is not None:
+                enhanced_data['bid_amount'] = best.value
+                print(f"  💰 Page {best.page}: Found bid amount: {best.value}")
                     
-                    # Check if we found all missing parameters
-                    if len(enhanced_data) == len(missing_params):
-                        print(f"✅ Enhanced extraction completed - found all missing parameters")
-                        break
-                        
         except Exception as e:
             print(f"⚠️ Enhanced extraction error: {e}")
         
         return enhanced_data
 
-    def _quick_ocr_extraction(self, page, page_num):
+    def _quick_ocr_extraction(self, page, page_num, budget=None):
         """
         Quick OCR extraction with minimal preprocessing for speed
         """
@@ -423,8 +876,8 @@ class TenderPredictor:
                 print(f"  📸 Quick OCR extracted {len(ocr_text)} characters from page {page_num}")
                 
                 # Parse OCR text for tender information
-                ocr_tender_info = self._parse_tender_text(ocr_text)
-                ocr_table_data = self._extract_tables_from_ocr_text(ocr_text)
+                ocr_tender_info = self._parse_tender_text(ocr_text, budget)
+                ocr_table_data = self._extract_tables_from_ocr_text(ocr_text, budget)
                 
                 # Combine OCR results
                 ocr_data = {**ocr_tender_info, **ocr_table_data}
@@ -496,375 +949,37 @@ class TenderPredictor:
                 print(f"  📸 Enhanced OCR extracted {len(best_ocr_text)} characters from page {page_num}")
                 print(f"  📝 OCR Text preview: {best_ocr_text[:300]}...")
                 
-                # Comprehensive bid amount patterns for OCR text
-                bid_patterns = [
-                    # Specific bid amount patterns
-                    r'Bid Amount\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'Bid Amount\s*=\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'Bid Amount\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'Bid\s*Amount\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'Bid\s*Amount\s*=\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    
-                    # General amount patterns
-                    r'Amount\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'Total\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'Value\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'Price\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'Cost\s*[:\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    
-                    # Currency patterns
-                    r'Rs\.?\s*([\d,]+(?:\.\d+)?)',
-                    r'₹\s*([\d,]+(?:\.\d+)?)',
-                    r'\$\s*([\d,]+(?:\.\d+)?)',
-                    r'[\$₹€]?\s*([\d,]+(?:\.\d+)?)\s*(?:USD|dollars?|rupees?)',
-                    
-                    # Large amount patterns
-                    r'([\d,]{6,}(?:\.\d+)?)\s*(?:lakhs?|crores?|million)',
-                    r'([\d,]+(?:\.\d+)?)\s*(?:lakhs?|crores?|million)\s*(?:rupees?|USD)',
-                    
-                    # Numbers with specific digit counts
-                    r'([\d,]{7,}(?:\.\d+)?)',  # Numbers with 7+ digits
-                    r'([\d,]{6,}(?:\.\d+)?)',  # Numbers with 6+ digits
-                    r'([\d,]{5,}(?:\.\d+)?)'   # Numbers with 5+ digits
-                ]
-                
-                all_matches = []
-                for pattern in bid_patterns:
-                    matches = re.findall(pattern, best_ocr_text, re.IGNORECASE)
-                    if matches:
-                        all_matches.extend(matches)
-                        print(f"  💰 OCR Pattern found: {matches}")
-                
-                if all_matches:
-                    print(f"  💰 All OCR amounts found: {all_matches}")
-                    # Try to find the most appropriate bid amount
-                    valid_amounts = []
-                    for match in all_matches:
-                        try:
-                            amount = float(match.replace(',', ''))
-                            # Accept reasonable range for bid amounts
-                            if amount >= 1000 and amount <= 1000000000:  # $1K to 1000 crores
-                                valid_amounts.append(amount)
-                        except:
-                            continue
-                    
-                    if valid_amounts:
-                        # Sort by amount size and take the largest reasonable amount
-                        valid_amounts.sort(reverse=True)
-                        bid_value = max(valid_amounts)
-                        print(f"  🎯 OCR found bid amount: {bid_value}")
-                        ocr_data['bid_amount'] = bid_value
-                    else:
-                        print(f"  ⚠️  No valid amounts found in OCR text")
+                candidates = [c for c in rank_amounts(find_amounts(best_ocr_text, page_num)) if c.score >= MIN_EVIDENCE]
+                if candidates:
+                    print(f"  💰 OCR amounts found: {[(c.raw, c.label) for c in candidates[:5]]}")
+                    bid_value = candidates[0].value
+                    print(f"  🎯 OCR found bid amount: {bid_value}")
+                    ocr_data['bid_amount'] = bid_value
                 else:
-                    print(f"  ⚠️  No bid amount patterns found in OCR text")
+                    print(f"  ⚠️  No labelled amounts found in OCR text")
             
         except Exception as e:
             print(f"  ⚠️  Enhanced OCR failed for page {page_num}: {e}")
             
         return ocr_data
     
-    def _extract_tables_from_ocr_text(self, ocr_text):
+    def _extract_tables_from_ocr_text(self, ocr_text, budget=None):
         """
         Extract table-like data from OCR text using pattern matching
         """
-        table_data = {}
-        
-        # Split text into lines
-        lines = ocr_text.split('\n')
-        
-        # Look for key-value patterns in OCR text
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Pattern for key-value pairs - specific parameter names
-            patterns = {
-                'contract_name': [
-                    r'(?i)Contract Name:\s*([^\n\r]+)',
-                    r'(?i)Project Name:\s*([^\n\r]+)',
-                    r'(?i)Tender Name:\s*([^\n\r]+)',
-                    r'(?i)Work Description:\s*([^\n\r]+)',
-                    r'(?i)Contract Title:\s*([^\n\r]+)',
-                    r'(?i)Project Title:\s*([^\n\r]+)',
-                    r'(?i)Name of Work:\s*([^\n\r]+)',
-                    r'(?i)Description of Work:\s*([^\n\r]+)',
-                    r'(?i)Contract Name:\s*([^\n\r]+)',
-                    r'(?i)Name\s*of\s*Work:\s*([^\n\r]+)',
-                    r'(?i)Description\s*of\s*Work:\s*([^\n\r]+)'
-                ],
-                'license_category': [
-                    r'(?i)Contractor License Category:\s*([^\n\r]+)',
-                    r'(?i)License Category:\s*([^\n\r]+)',
-                    r'(?i)Category:\s*([^\n\r]+)',
-                    r'(?i)Class:\s*([^\n\r]+)',
-                    r'(?i)Grade:\s*([^\n\r]+)',
-                    r'(?i)Category:\s*([^\n\r]+)',
-                    r'(?i)C\d+\s*[–\-]\s*([^\n\r]+)',
-                    r'(?i)([A-C]\d*)\s*[–\-]\s*([^\n\r]+)'
-                ],
-                'project_duration': [
-                    r'(?i)Project Duration:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Duration:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Contract Period:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Time Period:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Completion Time:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Period:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Duration:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Duration:\s*([^\n\r]+)\s*(?:months?|days?|years?)',
-                    r'(?i)Time\s*Period:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Completion\s*Time:\s*(\d+)\s*(?:months?|days?|years?)'
-                ],
-                'warranty_period': [
-                    r'(?i)Warranty Period:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Warranty:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Guarantee:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Maintenance Period:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Defect Liability:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Warranty:\s*([^\n\r]+)\s*(?:months?|days?|years?)',
-                    r'(?i)Period:\s*(\d+)\s*(?:months?|days?|years?)',
-                    r'(?i)Duration:\s*(\d+)\s*(?:months?|days?|years?)'
-                ],
-                'client_rating': [
-                    r'(?i)Average Client Rating:\s*(\d+(?:\.\d+)?)',
-                    r'(?i)Client Rating:\s*(\d+(?:\.\d+)?)',
-                    r'(?i)Rating:\s*(\d+(?:\.\d+)?)',
-                    r'(?i)Performance Rating:\s*(\d+(?:\.\d+)?)',
-                    r'(?i)Quality Rating:\s*(\d+(?:\.\d+)?)',
-                    r'(?i)Rating:\s*([^\n\r]+)',
-                    r'(?i)Score:\s*(\d+(?:\.\d+)?)'
-                ],
-                'project_success_rate': [
-                    r'(?i)Project Success Rate:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Success Rate:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Success:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Completion Rate:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Performance Rate:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Track Record:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Success Rate:\s*([^\n\r]+)\s*%',
-                    r'(?i)Success\s*Rate:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Success\s*([^\n\r]+)\s*%',
-                    r'(?i)Completion\s*Rate:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Performance\s*Rate:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Track\s*Record:\s*(\d+(?:\.\d+)?)\s*%',
-                    r'(?i)Success\s*Rate:\s*([^\n\r]+)\s*%'
-                ],
-                'rejection_history': [
-                    r'(?i)Rejection History:\s*(\d+)',
-                    r'(?i)Rejections:\s*(\d+)',
-                    r'(?i)Failed Bids:\s*(\d+)',
-                    r'(?i)Rejected Tenders:\s*(\d+)',
-                    r'(?i)Rejection:\s*([^\n\r]+)',
-                    r'(?i)History:\s*(\d+)'
-                ],
-                'safety_certification': [
-                    r'(?i)Safety Certification:\s*([^\n\r]+)',
-                    r'(?i)Safety:\s*([^\n\r]+)',
-                    r'(?i)Certification:\s*([^\n\r]+)',
-                    r'(?i)Safety Record:\s*([^\n\r]+)',
-                    r'(?i)Safety:\s*([^\n\r]+)',
-                    r'(?i)ISO:\s*([^\n\r]+)',
-                    r'(?i)Quality Certification:\s*([^\n\r]+)'
-                ],
-                'bid_amount': [
-                    r'(?i)Bid Amount:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Total Amount:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Contract Value:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Project Cost:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Tender Value:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Estimated Cost:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Budget:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Price:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Cost:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Value:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Amount:\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)Rs\.?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)₹\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)\$\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)(?:Total|Bid|Contract)\s*(?:Amount|Value|Price):\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                    r'(?i)([\d,]{6,}(?:\.\d+)?)\s*(?:lakhs?|crores?|million)',
-                    r'(?i)([\d,]+(?:\.\d+)?)\s*(?:lakhs?|crores?|million)\s*(?:rupees?|USD)',
-                    r'(?i)Bid Amount:\s*([^\n\r]+)',
-                    r'(?i)Bid Amount:\s*(\d+(?:\.\d+)?)',
-                    r'(?i)Amount:\s*(\d+(?:\.\d+)?)',
-                    r'(?i)Bid\s*Amount:\s*([^\n\r]+)',
-                    r'(?i)Bid\s*Amount:\s*(\d+(?:\.\d+)?)',
-                    r'(?i)Amount:\s*(\d+(?:\.\d+)?)'
-                ]
-            }
-            
-            for field, pattern_list in patterns.items():
-                for pattern in pattern_list:
-                    match = re.search(pattern, line, re.IGNORECASE)
-                    if match and field not in table_data:
-                        value = match.group(1).strip()
-                        
-                        # Convert to appropriate data type
-                        if field == 'bid_amount':
-                            try:
-                                value = float(value.replace(',', ''))
-                            except:
-                                continue
-                        elif field in ['client_rating', 'project_success_rate']:
-                            try:
-                                value = float(value)
-                            except:
-                                continue
-                        elif field in ['project_duration', 'warranty_period', 'rejection_history']:
-                            try:
-                                value = int(value)
-                            except:
-                                continue
-                        elif field == 'license_category':
-                            # Only strip whitespace, do not map or force to A/B/C
-                            value = value.strip()
-                        elif field == 'safety_certification':
-                            # Standardize safety certification
-                            value = value.strip().lower()
-                            if any(word in value for word in ['yes', 'true', '1', 'certified', 'approved']):
-                                value = 'Yes'
-                            elif any(word in value for word in ['no', 'false', '0', 'not']):
-                                value = 'No'
-                            else:
-                                value = 'Yes'  # Default to Yes if unclear
-                        
-                        table_data[field] = value
-                        break  # Found a match, move to next line
-        
-        return table_data
+        # Rules are compiled once and only run on lines mentioning their trigger words
+        return parse_ocr_fields(ocr_text, budget=budget)
     
-    def _parse_tender_text(self, text):
+    def _parse_tender_text(self, text, budget=None):
         """
         Parse tender information from text using specific parameter names
         """
         tender_data = {}
+        search = budget.search if budget is not None else re.search
         
-        # Comprehensive patterns for all possible parameter variations
-        patterns = {
-            'contractor_name': [
-                r'(?i)Contractor\s*Name\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Contractor\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Company\s*Name\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Firm\s*Name\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Name\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Contractor\s*Name\s*[•\s]*([^\n\r]+)',
-                r'(?i)Contractor\s*[•\s]*([^\n\r]+)',
-                r'(?i)Company\s*[•\s]*([^\n\r]+)',
-                r'(?i)Firm\s*[•\s]*([^\n\r]+)',
-                r'(?i)Name\s*[•\s]*([^\n\r]+)',
-                r'(?i)Contractor\s*Name\s*=\s*([^\n\r]+)',
-                r'(?i)Contractor\s*=\s*([^\n\r]+)',
-                r'(?i)Company\s*=\s*([^\n\r]+)',
-                r'(?i)Firm\s*=\s*([^\n\r]+)',
-                r'(?i)Name\s*=\s*([^\n\r]+)',
-                # More flexible patterns
-                r'(?i)Contractor\s*Name\s*([^\n\r]+)',
-                r'(?i)Contractor\s*([^\n\r]+)',
-                r'(?i)Company\s*([^\n\r]+)',
-                r'(?i)Firm\s*([^\n\r]+)',
-                r'(?i)Name\s*([^\n\r]+)'
-            ],
-            'contract_name': [
-                r'(?i)Contract\s*Name\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Project\s*Name\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Tender\s*Name\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Work\s*Description\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Contract\s*Title\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Project\s*Title\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Contract\s*Name\s*[•\s]*([^\n\r]+)',
-                r'(?i)Name\s*of\s*Work\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Description\s*of\s*Work\s*[:\-]\s*([^\n\r]+)'
-            ],
-            'license_category': [
-                r'(?i)Contractor\s*License\s*Category\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)License\s*Category\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Category\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Class\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Grade\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Category\s*[•\s]*([^\n\r]+)',
-                r'(?i)C\d+\s*[–\-]\s*([^\n\r]+)',
-                r'(?i)([A-C]\d*)\s*[–\-]\s*([^\n\r]+)'
-            ],
-            'project_duration': [
-                r'(?i)Project\s*Duration\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Duration\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Contract\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Time\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Completion\s*Time\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Duration\s*[•\s]*(\d+)\s*(?:months?|days?|years?)'
-            ],
-            'warranty_period': [
-                r'(?i)Warranty\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Warranty\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Guarantee\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Maintenance\s*Period\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Defect\s*Liability\s*[:\-]\s*(\d+)\s*(?:months?|days?|years?)',
-                r'(?i)Warranty\s*[•\s]*(\d+)\s*(?:months?|days?|years?)'
-            ],
-            'client_rating': [
-                r'(?i)Average\s*Client\s*Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
-                r'(?i)Client\s*Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
-                r'(?i)Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
-                r'(?i)Performance\s*Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
-                r'(?i)Quality\s*Rating\s*[:\-]\s*(\d+(?:\.\d+)?)',
-                r'(?i)Rating\s*[•\s]*(\d+(?:\.\d+)?)',
-                r'(?i)Score\s*[:\-]\s*(\d+(?:\.\d+)?)'
-            ],
-            'project_success_rate': [
-                r'(?i)Project\s*Success\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
-                r'(?i)Success\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
-                r'(?i)Success\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
-                r'(?i)Completion\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
-                r'(?i)Performance\s*Rate\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
-                r'(?i)Track\s*Record\s*[:\-]\s*(\d+(?:\.\d+)?)\s*%',
-                r'(?i)Success\s*Rate\s*[•\s]*(\d+(?:\.\d+)?)\s*%'
-            ],
-            'rejection_history': [
-                r'(?i)Rejection\s*History\s*[:\-]\s*(\d+)',
-                r'(?i)Rejections\s*[:\-]\s*(\d+)',
-                r'(?i)Failed\s*Bids\s*[:\-]\s*(\d+)',
-                r'(?i)Rejected\s*Tenders\s*[:\-]\s*(\d+)',
-                r'(?i)Rejection\s*[•\s]*(\d+)',
-                r'(?i)History\s*[:\-]\s*(\d+)'
-            ],
-            'safety_certification': [
-                r'(?i)Safety\s*Certification\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Safety\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Certification\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Safety\s*Record\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Safety\s*[•\s]*([^\n\r]+)',
-                r'(?i)ISO\s*[:\-]\s*([^\n\r]+)',
-                r'(?i)Quality\s*Certification\s*[:\-]\s*([^\n\r]+)'
-            ],
-            'bid_amount': [
-                r'(?i)Bid\s*Amount\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Total\s*Amount\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Contract\s*Value\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Project\s*Cost\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Tender\s*Value\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Estimated\s*Cost\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Budget\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Price\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Cost\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Value\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Amount\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Rs\.?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)₹\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)\$\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)(?:Total|Bid|Contract)\s*(?:Amount|Value|Price)\s*[:\-]\s*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)([\d,]{6,}(?:\.\d+)?)\s*(?:lakhs?|crores?|million)',
-                r'(?i)([\d,]+(?:\.\d+)?)\s*(?:lakhs?|crores?|million)\s*(?:rupees?|USD)',
-                r'(?i)Bid\s*Amount\s*[•\s]*[\$₹€]?\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Bid\s*Amount\s*([\d,]+(?:\.\d+)?)',
-                r'(?i)Amount\s*([\d,]+(?:\.\d+)?)'
-            ]
-        }
-        
-        for field, pattern_list in patterns.items():
+        for field, pattern_list in TENDER_TEXT_PATTERNS.items():
             for pattern in pattern_list:
-                match = re.search(pattern, text, re.IGNORECASE)
+                match = search(pattern, text, re.IGNORECASE)
                 if match:
                     value = match.group(1).strip()
                     
@@ -900,13 +1015,8 @@ class TenderPredictor:
                             if not value or value.lower() in ['undefined', 'null', 'none', '']:
                                 print(f"  ⚠️  Contractor name extracted as invalid: '{value}'")
                                 # Try to find any company-like text in the document
-                                company_patterns = [
-                                    r'(?i)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:Construction|Builders|Developers|Ltd|LLC|Inc|Corp|Company|Firm))',
-                                    r'(?i)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:&|and)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-                                    r'(?i)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+[A-Z][a-z]+)'
-                                ]
-                                for company_pattern in company_patterns:
-                                    company_match = re.search(company_pattern, text)
+                                for company_pattern in COMPANY_NAME_PATTERNS:
+                                    company_match = search(company_pattern, text)
                                     if company_match:
                                         value = company_match.group(1).strip()
                                         print(f"  ✅ Found fallback contractor name: {value}")
@@ -974,9 +1084,11 @@ class TenderPredictor:
         
         return table_data
 
-    def preprocess_data(self, data_list):
+    def preprocess_data(self, data_list, fit_encoders=None):
         """
         Preprocess extracted data for ML model - all parameters must be present
+        Categorical encoders are fitted only on training data (fit_encoders=True) or when
+        none are fitted yet; otherwise the fitted codes are reused so inference matches training
         """
         # Handle both DataFrame and list inputs
         if isinstance(data_list, pd.DataFrame):
@@ -1016,11 +1128,15 @@ class TenderPredictor:
         # Encode categorical variables
         categorical_features = ['contract_name', 'license_category', 'safety_certification']
         
-        for feature in categorical_features:
-            if feature in df.columns:
-                le = LabelEncoder()
-                df[f'{feature}_encoded'] = le.fit_transform(df[feature].astype(str))
-                self.label_encoders[feature] = le
+        if fit_encoders is None:
+            fit_encoders = not self.encoders.fitted
+        if fit_encoders:
+            self.encoders.fit(df)
+        
+        for feature, codes in self.encoders.transform(df).items():
+            df[f'{feature}_encoded'] = codes
+        if self.encoders.last_unknown_counts:
+            print(f"⚠️  Unseen categories encoded as unknown: {self.encoders.last_unknown_counts}")
         
         # Create additional features
         df['bid_per_duration'] = df['bid_amount'] / df['project_duration']
@@ -1078,14 +1194,8 @@ class TenderPredictor:
         """
         Create target variable for winner prediction
         """
-        # Create a scoring system to determine winners
-        df['score'] = (
-            df['client_rating'] * 0.25 +
-            df['project_success_rate'] * 0.25 +
-            (5 - df['rejection_history']) * 0.15 +
-            (df['warranty_period'] / df['project_duration']) * 0.15 +
-            (1 / df['bid_amount']) * 0.20  # Lower bid is better
-        )
+        # Create a scoring system to determine winners (weights: ranking.TARGET_SCORE_WEIGHTS)
+        df['score'] = target_scores(df)
         
         # Determine winners (top 20% as winners)
         threshold = df['score'].quantile(0.8)
@@ -1211,26 +1321,12 @@ class TenderPredictor:
             print("\n❌ No data extracted from any PDF files!")
             return None
         
-        # Preprocess all data
-        X, df = self.preprocess_data(all_data)
-        
-        if X is None:
-            print("❌ Failed to preprocess data - missing required parameters")
-            print("Please ensure all PDFs contain all required parameters:")
-            print("✅ Contract Name ✅ License Category")
-            print("✅ Project Duration ✅ Warranty Period ✅ Client Rating")
-            print("✅ Project Success Rate ✅ Rejection History ✅ Safety Certification ✅ Bid Amount")
-            return None
-        
-        # Create target variable for scoring
-        df = self.create_target_variable(df)
-        
-        # Train model if not already trained
+        # Train model if not already trained (before encoding the PDF data, so it uses the training codes)
         if self.model is None:
             # Create synthetic data for training
             print("\n🤖 Creating synthetic training data for XGBoost...")
             synthetic_data = self.create_synthetic_data(num_samples=1000)
-            X_synthetic, df_synthetic = self.preprocess_data(synthetic_data)
+            X_synthetic, df_synthetic = self.preprocess_data(synthetic_data, fit_encoders=True)
             
             if X_synthetic is None:
                 print("❌ Failed to preprocess synthetic data - missing required parameters")
@@ -1242,6 +1338,20 @@ class TenderPredictor:
             # Train XGBoost model
             self.train_model(X_synthetic, y_synthetic)
         
+        # Preprocess all data
+        X, df = self.preprocess_data(all_data)
+        
+        if X is None:
+            print("❌ Failed to preprocess data - missing required parameters")
+            print("Please ensure all PDFs contain all required parameters:")
+            print("✅ Contract Name ✅ License Category")
+            print("✅ Project Duration ✅ Warranty Period ✅ Client Rating")
+            print("✅ Project Success Rate ✅ Rejection History ✅ Safety Certification ✅ Bid Amount")
+            return None
+        
+        # Create target variable for scoring
+        df = self.create_target_variable(df)
+        
         # Make predictions on actual PDF data
         X_scaled = self.scaler.transform(X)
         predictions = self.model.predict(X_scaled)
@@ -1258,11 +1368,7 @@ class TenderPredictor:
         df['success_score'] = df['project_success_rate']
         max_bid = df['bid_amount'].max()
         df['bid_score'] = ((max_bid - df['bid_amount']) / max_bid) * 100
-        df['comprehensive_score'] = (
-            df['rating_score'] * 0.3 +
-            df['success_score'] * 0.3 +
-            df['bid_score'] * 0.4
-        )
+        df['comprehensive_score'] = comprehensive_scores(df)
         
         # Sort by comprehensive score
         df = df.sort_values('comprehensive_score', ascending=False)
@@ -1449,44 +1555,22 @@ class TenderPredictor:
             return 'Infrastructure'
         return 'Others'
 
-    def calculate_composite_score(self, df: pd.DataFrame) -> np.ndarray:
-        """Calculate balanced composite score with equal parameter weighting - compatibility method."""
-        normalized_scores = pd.DataFrame()
-        
-        # Normalize each parameter to 0-100 scale
-        params_to_normalize = {
-            'bid_amount': False,  # Lower is better
-            'project_duration': False,  # Lower is better
-            'warranty_period': True,  # Higher is better
-            'client_rating': True,  # Higher is better
-            'project_success_rate': True,  # Higher is better
-            'rejection_history': False,  # Lower is better
-            'safety_certification': True  # Higher is better
-        }
-        
-        for param, higher_better in params_to_normalize.items():
-            if param in df.columns:
-                # Convert safety_certification to numeric if it's string
-                if param == 'safety_certification' and df[param].dtype == 'object':
-                    param_data = (df[param] == 'Yes').astype(int)
-                else:
-                    param_data = pd.to_numeric(df[param], errors='coerce')
-                
-                # Skip if all values are NaN
-                if param_data.isna().all():
-                    continue
-                    
-                min_val = param_data.min()
-                max_val = param_data.max()
-                
-                if higher_better:
-                    normalized_scores[f'{param}_score'] = 100 * (param_data - min_val) / (max_val - min_val) if max_val != min_val else 50
-                else:
-                    normalized_scores[f'{param}_score'] = 100 * (max_val - param_data) / (max_val - min_val) if max_val != min_val else 50
-        
-        # Equal weighting of all parameters
-        composite_score = normalized_scores.mean(axis=1)
-        return composite_score.values
+    def calculate_composite_score(self, df: pd.DataFrame, group_col=None) -> np.ndarray:
+        """
+        Calculate balanced composite score with equal parameter weighting - compatibility method.
+        With group_col, each bid is normalized against the other bids of its own tender.
+        """
+        return composite_scores(df, group_col)
+
+    def rank_tenders(self, df: pd.DataFrame, group_col='tender_id', top_k=None, score='composite'):
+        """
+        Rank the bids of many tenders at once (e.g. every open tender, nightly).
+        Returns each tender's bids (or its best top_k) ordered by tender then rank.
+        """
+        if df.empty:
+            print("No data to rank")
+            return df
+        return rank_bids(df, group_col=group_col, score=score, top_k=top_k)
 
     def create_sample_data(self) -> pd.DataFrame:
         """Generate sample training data - compatibility method."""
@@ -1504,12 +1588,22 @@ class TenderPredictor:
         }
         return pd.DataFrame(data)
 
-    def initialize_model(self):
-        """Initialize the model with sample data if not already trained - compatibility method."""
+    def initialize_model(self, model_path=None):
+        """
+        Initialize the model with sample data if not already trained - compatibility method.
+        A model saved at model_path (default TENDER_MODEL_PATH) is loaded instead, and a newly
+        trained one is saved there.
+        """
+        model_path = model_path if model_path is not None else TENDER_MODEL_PATH
+        if self.model is None and model_path and os.path.exists(model_path):
+            try:
+                self.load_model(model_path)
+            except Exception as e:
+                print(f"⚠️ Could not load model from {model_path}, retraining: {e}")
         if self.model is None:
             print("Initializing model with sample data...")
             train_data = self.create_sample_data()
-            processed_data, full_df = self.preprocess_data(train_data)
+            processed_data, full_df = self.preprocess_data(train_data, fit_encoders=True)
             
             if processed_data is None:
                 print("Failed to preprocess data")
@@ -1520,9 +1614,69 @@ class TenderPredictor:
                 self.calculate_composite_score(train_data), 70)).astype(int)
             self.train_model(X, y)
             print("Model initialized successfully.")
+            if model_path:
+                self.save_model(model_path)
+
+    def compile_inference(self):
+        """Build the pandas-free inference path from the trained model and scaler."""
+        if self.model is None:
+            print("Model not trained. Please train the model first.")
+            return None
+        return CompiledPredictor(self.model, self.scaler, self.encoders)
+
+    def model_version(self):
+        """Short content hash of the trained model, scaler and encoders - changes whenever they are retrained or loaded."""
+        if self.model is None:
+            return None
+        if self._model_version is None or self._model_version[0] is not self.model:
+            digest = hashlib.sha256(bytes(self.model.get_booster().save_raw()))
+            for array in (self.scaler.mean_, self.scaler.scale_):
+                digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+            digest.update(json.dumps(self.encoders.to_dict(), sort_keys=True).encode('utf-8'))
+            self._model_version = (self.model, digest.hexdigest()[:12])
+        return self._model_version[1]
+
+    def save_model(self, path):
+        """Persist the model together with its scaler and fitted categorical encoders."""
+        if self.model is None:
+            print("Model not trained. Please train the model first.")
+            return False
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Written beside the target and moved into place, so a concurrent load never sees half a file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            joblib.dump({
+                'model': self.model,
+                'scaler': self.scaler,
+                'encoders': self.encoders.to_dict(),
+                'feature_columns': FEATURE_COLUMNS,
+            }, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        print(f"💾 Model saved to {path}")
+        return True
 
-    def run_prediction_pipeline(self, db_data: List[Dict]):
-        """Complete pipeline from database data to winner prediction - compatibility method."""
+    def load_model(self, path):
+        """Load a model saved with save_model - encoders are restored with it."""
+        bundle = joblib.load(path)
+        if bundle.get('feature_columns') != FEATURE_COLUMNS:
+            print(f"❌ Saved model uses a different feature layout: {bundle.get('feature_columns')}")
+            return False
+        self.model = bundle['model']
+        self.scaler = bundle['scaler']
+        self.encoders = CategoricalEncoderRegistry.from_dict(bundle['encoders'])
+        print(f"📦 Model loaded from {path}")
+        return True
+
+    def run_prediction_pipeline(self, db_data: List[Dict], plot=False):
+        """
+        Complete pipeline from database data to winner prediction - compatibility method.
+        The comparison chart is only rendered when plot=True (API callers render it on demand).
+        """
         self.initialize_model()
         
         print("\nProcessing data from database...")
@@ -1546,8 +1700,8 @@ class TenderPredictor:
         print(f"💰 Bid Amount: {winner['bid_amount']:,.2f}")
         print(f"🛠 Technical Merit: {winner['technical_merit']:.2f}")
         
-        # For API usage, you can save the plot if needed or show it conditionally
-        self.plot_comparison(results, show_plot=False)
+        if plot:
+            self.plot_comparison(results)
         
         return results
 
@@ -1596,31 +1750,15 @@ class TenderPredictor:
         return results
 
     def plot_comparison(self, results: pd.DataFrame, show_plot=True, save_path=None):
-        """Visual comparison of all bidders with contractor names - compatibility method."""
-        
-        metrics = ['composite_score', 'technical_merit']
-        normalized = results[['contractor_name'] + metrics].copy()
-        normalized[metrics] = normalized[metrics].apply(lambda x: (x - x.min()) / (x.max() - x.min()) * 100)
-        
-        angles = np.linspace(0, 2 * np.pi, len(metrics), endpoint=False).tolist()
-        angles += angles[:1]
-        
-        fig, ax = plt.subplots(figsize=(8, 8), subplot_kw={'polar': True})
-        
-        for idx, row in normalized.iterrows():
-            values = row[metrics].tolist()
-            values += values[:1]
-            ax.plot(angles, values, 'o-', linewidth=2, label=row['contractor_name'])
-            ax.fill(angles, values, alpha=0.1)
-        
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(metrics)
-        ax.set_title('Contractor Comparison (Normalized Scores)', size=14, pad=20)
-        ax.legend(bbox_to_anchor=(1.3, 1.1))
-        plt.tight_layout()
+        """
+        Visual comparison of all bidders with contractor names - compatibility method.
+        The drawing itself is shared with the API's ChartRenderer.
+        """
+        fig = plt.figure(figsize=(8, 8))
+        draw_comparison(fig, results)
         
         if save_path:
-            plt.savefig(save_path)
+            fig.savefig(save_path)
         if show_plot:
             plt.show()
-        plt.close()
+        plt.close(fig)
@@ -6,6 +6,8 @@ Test script for the AI Tender Predictor
 import sys
 import os
 import json
+import numpy as np
+import pandas as pd
 from tender_predictor import TenderPredictor
 
 def test_extraction():
@@ -89,6 +91,728 @@ def test_without_pdf():
         print(f"❌ Initialization test failed: {e}")
         return False
 
+def test_compiled_inference():
+    """Test that the pandas-free inference path matches the DataFrame pipeline"""
+    print("\n🧪 Testing compiled inference path...")
+    
+    try:
+        predictor = TenderPredictor()
+        predictor.initialize_model()
+        compiled = predictor.compile_inference()
+        
+        bids = predictor.create_synthetic_data(num_samples=50)
+        bids[3]['client_rating'] = None
+        bids[7]['license_category'] = None
+        
+        df = predictor.process_database_data(bids)
+        X, _ = predictor.preprocess_data(df)
+        X_scaled = predictor.scaler.transform(X)
+        expected_labels = predictor.model.predict(X_scaled)
+        expected_probas = predictor.model.predict_proba(X_scaled)[:, 1]
+        
+        labels, probas = compiled.predict_records(bids)
+        assert np.array_equal(labels, expected_labels), "Labels differ from pandas pipeline"
+        assert np.array_equal(probas, expected_probas), "Probabilities differ from pandas pipeline"
+        print("✅ Compiled inference matches the pandas pipeline")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Compiled inference test failed: {e}")
+        return False
+
+def test_multi_tender_ranking():
+    """Test that ranking many tenders at once scores each tender like ranking it on its own"""
+    print("\n🧪 Testing multi-tender ranking...")
+    
+    try:
+        from ranking import rank_bids
+        
+        predictor = TenderPredictor()
+        tenders = []
+        for tender_id in range(5):
+            bids = pd.DataFrame(predictor.create_synthetic_data(num_samples=6 + tender_id))
+            bids['tender_id'] = f"T{tender_id}"
+            tenders.append(bids)
+        all_bids = pd.concat(tenders, ignore_index=True)
+        
+        ranked = rank_bids(all_bids, group_col='tender_id', top_k=3)
+        assert len(ranked) == 15, "Expected the top 3 bids of each of the 5 tenders"
+        for tender_id, bids in all_bids.groupby('tender_id'):
+            expected = np.sort(predictor.calculate_composite_score(bids))[::-1][:3]
+            top = ranked[ranked['tender_id'] == tender_id]
+            assert top['rank'].tolist() == [1, 2, 3], f"Bad ranks for {tender_id}"
+            assert np.allclose(top['composite_score'], expected), f"Scores differ for {tender_id}"
+        print("✅ Multi-tender ranking matches per-tender scoring")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Multi-tender ranking test failed: {e}")
+        return False
+
+def test_incremental_ranking():
+    """Test that the live ranking stays identical to re-ranking from scratch after every bid"""
+    print("\n🧪 Testing incremental ranking...")
+    
+    try:
+        from ranking import IncrementalTenderRanking, LiveRankings, composite_scores
+        
+        predictor = TenderPredictor()
+        ranking = IncrementalTenderRanking('T1')
+        bids = predictor.create_synthetic_data(num_samples=40)
+        for i, bid in enumerate(bids, 1):
+            ranking.add_bid(bid)
+            expected = composite_scores(pd.DataFrame(bids[:i]))
+            expected_order = sorted(range(i), key=lambda j: (-expected[j], j))
+            assert [entry['bid_index'] for entry in ranking.top()] == expected_order, f"Order differs after {i} bids"
+        assert ranking.leader()['bid_index'] == expected_order[0], "Leader differs from full ranking"
+        
+        # Live rankings are bounded: least recently used tenders go first, closed ones at once
+        live = LiveRankings(max_tenders=2)
+        live.get_or_create('T1').add_bid(bids[0])
+        live.get_or_create('T2')
+        live.get('T1')
+        live.get_or_create('T3')
+        assert live.get('T2') is None and live.get('T1') is not None and len(live) == 2, "LRU tender not evicted"
+        assert live.close('T1').bids == [bids[0]] and live.get('T1') is None
+        print(f"✅ Incremental ranking matches full re-ranking ({ranking.rescores} re-scores for {len(bids)} bids)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Incremental ranking test failed: {e}")
+        return False
+
+def test_regex_guard():
+    """Test that the extraction regexes stay linear on hostile text"""
+    print("\n🧪 Testing extraction regex guard...")
+    
+    try:
+        import io
+        import time
+        import contextlib
+        from regex_guard import audit_patterns
+        from ocr_line_parser import OCR_FIELD_PATTERNS
+        from amounts import AMOUNT_TOKEN
+        from tender_predictor import TENDER_TEXT_PATTERNS, COMPANY_NAME_PATTERNS
+        
+        report = audit_patterns(TENDER_TEXT_PATTERNS)
+        report.update(audit_patterns(OCR_FIELD_PATTERNS))
+        report.update(audit_patterns([*COMPANY_NAME_PATTERNS, AMOUNT_TOKEN]))
+        assert not report, f"Super-linear patterns: {report}"
+        
+        predictor = TenderPredictor()
+        n = 20000
+        hostile = {
+            'spaces': ' ' * n + 'x',
+            'commas': '1,' * n + 'x',
+            'padded_label': 'Duration: ' + ' ' * n + 'x',
+            'long_number': 'Success ' + '9' * n,
+            'bullets': 'Name' + '• ' * n,
+            'repeated_labels': 'Duration: 5 ' * n,
+        }
+        for name, text in hostile.items():
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                predictor._parse_tender_text(text)
+                predictor._extract_tables_from_ocr_text(text)
+                predictor._parse_tender_tables([[[text[:n], text]]])
+            elapsed = time.perf_counter() - started
+            assert elapsed < 2.0, f"{name}: {elapsed:.2f}s for {len(text)} characters"
+        print(f"✅ No super-linear patterns; {len(hostile)} hostile {n}-character inputs parsed in time")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Regex guard test failed: {e}")
+        return False
+
+def test_extraction_budget():
+    """Test that tiers are scheduled by value per ms and that the time budget is honoured"""
+    print("\n🧪 Testing time-budgeted extraction...")
+    
+    try:
+        import io
+        import contextlib
+        from extraction_tiers import TierCostModel, next_tier
+        
+        model = TierCostModel()
+        missing = ['contract_name', 'project_duration']
+        # Cheap tables go before OCR; the enhanced fallback waits for both
+        assert next_tier(model, {'tables': 10, 'quick_ocr': 2, 'enhanced': 10}, missing, []) == 'tables'
+        assert next_tier(model, {'quick_ocr': 2, 'enhanced': 10}, missing, []) == 'quick_ocr'
+        assert next_tier(model, {'quick_ocr': 0, 'enhanced': 10}, missing, []) == 'enhanced'
+        assert next_tier(model, {'deep_ocr': 2}, missing, []) is None, "Deep OCR only looks for bid amounts"
+        
+        test_pdf = os.path.join("..", "uploaded_files", "g.pdf")
+        if os.path.exists(test_pdf):
+            # Without the page cache, so the zero-budget run can't reuse the first run's page
+            import tender_predictor
+            page_cache, tender_predictor.PAGE_CACHE = tender_predictor.PAGE_CACHE, None
+            try:
+                predictor = TenderPredictor()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    unlimited = predictor.extract_data_from_pdf(test_pdf)
+                info = predictor.last_extraction_info
+                assert not info['time_defaulted_fields'], "Nothing should be cut without a budget"
+                assert info['fields_source']['bid_amount']['tier'] == 'text'
+                
+                with contextlib.redirect_stdout(io.StringIO()):
+                    rushed = predictor.extract_data_from_pdf(test_pdf, time_budget=0)
+                info = predictor.last_extraction_info
+                assert info['tiers']['text']['status'] == 'skipped_deadline'
+                assert set(info['time_defaulted_fields']) == set(predictor.feature_names)
+                assert set(rushed) >= set(predictor.feature_names) - set(info['missing_fields'])
+            finally:
+                tender_predictor.PAGE_CACHE = page_cache
+            print(f"✅ Unlimited run read {len(unlimited)} fields; zero budget defaulted {len(info['time_defaulted_fields'])}")
+        else:
+            print(f"⚠️ {test_pdf} not found - checked the scheduler only")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Time-budgeted extraction test failed: {e}")
+        return False
+
+def test_extraction_scheduler():
+    """Test that extraction jobs are classed by estimated cost"""
+    print("\n🧪 Testing extraction job cost estimates...")
+    
+    try:
+        from extraction_scheduler import estimate_job
+        
+        test_pdf = os.path.join("..", "uploaded_files", "g.pdf")
+        if not os.path.exists(test_pdf):
+            print(f"⚠️ {test_pdf} not found - skipping")
+            return True
+        
+        estimate = estimate_job(test_pdf)
+        assert estimate.pages == 1 and estimate.sampled == 1, f"Unexpected sample: {estimate}"
+        assert estimate.scanned_ratio == 0.0, "A digital PDF should not look scanned"
+        assert estimate.job_class == 'fast'
+        assert estimate_job(test_pdf, fast_max_ms=0).job_class == 'heavy'
+        assert estimate_job(b"not a pdf").job_class == 'fast', "Unreadable files should fail fast"
+        print(f"✅ {estimate.pages}-page digital PDF estimated at {estimate.estimated_ms} ms ({estimate.job_class})")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Extraction scheduler test failed: {e}")
+        return False
+
+def test_admission_control():
+    """Test that extraction requests are accepted, degraded and shed as load rises"""
+    print("\n🧪 Testing extraction admission control...")
+    
+    try:
+        from admission import AdmissionController
+        
+        controller = AdmissionController(max_in_flight=4, max_queue=4, latency_target_ms=1000, degrade_at=0.75)
+        actions = [controller.admit().action for _ in range(5)]
+        assert actions == ['accept', 'accept', 'accept', 'degrade', 'reject'], f"Unexpected decisions: {actions}"
+        rejected = controller.admit()
+        assert rejected.status_code == 429 and rejected.retry_after >= 1
+        
+        for _ in range(4):
+            controller.release(latency_ms=2000)
+        assert controller.admit().action == 'accept', "An idle service should admit despite old latency"
+        assert controller.admit().status_code == 503, "Slow extractions with work in flight should shed with 503"
+        controller.release()
+        assert controller.admit(queue_depth=4).status_code == 503, "A full queue should shed with 503"
+        
+        stats = controller.stats()
+        assert stats['degraded'] == 1 and stats['shed_429'] == 2 and stats['shed_503'] == 2, f"Unexpected counts: {stats}"
+        print(f"✅ Admission decisions follow load ({stats['admitted']} admitted, {stats['degraded']} degraded, "
+              f"{stats['shed_429'] + stats['shed_503']} shed)")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Admission control test failed: {e}")
+        return False
+
+def test_single_flight():
+    """Test that concurrent identical extractions share one computation"""
+    print("\n🧪 Testing single-flight extraction coalescing...")
+    
+    try:
+        import asyncio
+        from single_flight import SingleFlight
+        
+        flights = SingleFlight()
+        calls = []
+        
+        async def extract(name):
+            calls.append(name)
+            await asyncio.sleep(0.05)
+            return {'document': name}
+        
+        async def burst():
+            same = [flights.do('abc', lambda: extract('abc')) for _ in range(5)]
+            other = flights.do('def', lambda: extract('def'))
+            return await asyncio.gather(*same, other)
+        
+        results = asyncio.run(burst())
+        assert calls == ['abc', 'def'], f"Expected one computation per document, got {calls}"
+        assert all(result == {'document': 'abc'} for result, _ in results[:5])
+        assert [shared for _, shared in results] == [False, True, True, True, True, False]
+        assert results[1][0] is not results[0][0], "Joined callers should get their own copy"
+        
+        # Nothing is kept once the computation is done
+        asyncio.run(flights.do('abc', lambda: extract('abc')))
+        assert calls == ['abc', 'def', 'abc'], "A later request should extract again"
+        
+        stats = flights.stats()
+        assert stats == {'in_flight': 0, 'started': 3, 'coalesced': 4, 'failed': 0}, f"Unexpected stats: {stats}"
+        print(f"✅ {stats['coalesced']} concurrent requests joined {stats['started']} extractions")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Single-flight test failed: {e}")
+        return False
+
+def _build_pdf(pages):
+    """Minimal PDF with one line of Helvetica text per string, given a list of lines per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        stream = b"BT /F1 12 Tf 14 TL 72 720 Td " + b" ".join(b"(%s) Tj T*" % line.encode() for line in lines) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+    
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+def test_page_cache():
+    """Test that a resubmitted bid only has its changed pages extracted again"""
+    print("\n🧪 Testing incremental re-extraction...")
+    
+    try:
+        import io
+        import contextlib
+        import tender_predictor
+        from result_cache import ResultCache
+        
+        pages = [
+            ["Contractor Name: Himalayan Builders Pvt Ltd", "License Category: Class A"],
+            ["Project Duration: 18 months", "Warranty Period: 24 months"],
+            ["Bid Amount: Rs. 2,500,000"],
+        ]
+        revised = pages[:2] + [["Bid Amount: Rs. 2,350,000"]]
+        
+        page_cache, tender_predictor.PAGE_CACHE = tender_predictor.PAGE_CACHE, ResultCache(64, None)
+        try:
+            predictor = TenderPredictor()
+            with contextlib.redirect_stdout(io.StringIO()):
+                original = predictor.extract_data_from_pdf(_build_pdf(pages))
+            first_hashes = predictor.last_extraction_info['page_hashes']
+            with contextlib.redirect_stdout(io.StringIO()):
+                resubmitted = predictor.extract_data_from_pdf(_build_pdf(revised))
+            info = predictor.last_extraction_info
+            
+            tender_predictor.PAGE_CACHE = None
+            with contextlib.redirect_stdout(io.StringIO()):
+                fresh = predictor.extract_data_from_pdf(_build_pdf(revised))
+        finally:
+            tender_predictor.PAGE_CACHE = page_cache
+        
+        assert len(first_hashes) == 3 and first_hashes[:2] == info['page_hashes'][:2]
+        assert first_hashes[2] != info['page_hashes'][2], "The revised page should get a new hash"
+        assert info['tiers']['text']['pages'] == 1 and info['pages_reused']['text'] == 2, f"Unexpected tiers: {info['tiers']}"
+        assert original['bid_amount'] == 2500000 and resubmitted['bid_amount'] == 2350000
+        assert resubmitted == fresh, "Merged cached pages should match a full re-extraction"
+        print(f"✅ Revised bid re-read 1 of 3 pages; bid amount {original['bid_amount']:.0f} -> {resubmitted['bid_amount']:.0f}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Incremental re-extraction test failed: {e}")
+        return False
+
+def test_near_duplicates():
+    """Test that near-duplicate bids are flagged and reuse the earlier extraction"""
+    print("\n🧪 Testing near-duplicate detection...")
+    
+    try:
+        import io
+        import contextlib
+        import tender_predictor
+        from near_duplicates import NearDuplicateIndex, fill_from_prior
+        
+        terms = [f"Clause {i}: the contractor shall carry out the works as set out in section {i} of the conditions" for i in range(30)]
+        pages = [
+            ["Contractor Name: Himalayan Builders Pvt Ltd", "License Category: Class A"] + terms[:15],
+            terms[15:],
+            ["Bid Amount: Rs. 2,500,000"],
+        ]
+        copied = pages[:2] + [["Bid Amount: Rs. 2,350,000"]]
+        unrelated = [[f"Steel girder {i} for the river bridge at chainage {i * 40} metres" for i in range(30)]]
+        
+        index = NearDuplicateIndex()
+        predictor = TenderPredictor()
+        page_cache, tender_predictor.PAGE_CACHE = tender_predictor.PAGE_CACHE, None
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                original = predictor.extract_data_from_pdf(_build_pdf(pages), duplicates=index.snapshot('tender-1'))
+            info = predictor.last_extraction_info
+            assert info['near_duplicate'] is None and 'project_success_rate' in info['defaulted_fields']
+            # As if a tier the copy will skip (tables, OCR) had read the success rate
+            found_later = [field for field in info['defaulted_fields'] if field != 'project_success_rate']
+            index.add('tender-1', 'original', info['minhash'], {**original, 'project_success_rate': 92.0}, found_later)
+            
+            with contextlib.redirect_stdout(io.StringIO()):
+                copy_data = predictor.extract_data_from_pdf(_build_pdf(copied), duplicates=index.snapshot('tender-1'))
+            copy_info = predictor.last_extraction_info
+            with contextlib.redirect_stdout(io.StringIO()):
+                predictor.extract_data_from_pdf(_build_pdf(unrelated), duplicates=index.snapshot('tender-1'))
+            unrelated_info = predictor.last_extraction_info
+        finally:
+            tender_predictor.PAGE_CACHE = page_cache
+        
+        # The copy is flagged within its tender only, and stops after the page text
+        matches = index.check('tender-1', copy_info['minhash'])
+        assert [m.document for m in matches] == ['original'] and matches[0].similarity >= 0.95, f"Unexpected matches: {matches}"
+        assert not index.check('tender-2', copy_info['minhash']), "Other tenders should not see the document"
+        assert not index.check('tender-1', unrelated_info['minhash']) and unrelated_info['near_duplicate'] is None
+        assert copy_info['near_duplicate']['document'] == 'original'
+        assert copy_info['tiers']['tables']['status'] == 'near_duplicate'
+        # A document is never its own near-duplicate (e.g. a coalesced caller checking after the owner indexed it)
+        flagged = index.flagged
+        assert not index.check('tender-1', info['minhash'], 'original') and index.flagged == flagged
+        assert index.snapshot('tender-1', 'original') is None
+        assert index.snapshot('tender-1').reusable(info['minhash'], 'original') is None
+        
+        # Fields the skipped tiers would have found come from the original; the new price is kept
+        filled_data, filled = fill_from_prior(copy_data, copy_info, *index.prior('tender-1', 'original'))
+        assert filled == ['project_success_rate'] and filled_data['project_success_rate'] == 92.0, f"Unexpected fill: {filled}"
+        assert filled_data['bid_amount'] == 2350000 and original['bid_amount'] == 2500000
+        print(f"✅ Copied bid flagged at similarity {matches[0].similarity}; reused {filled}, kept its own bid amount")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Near-duplicate test failed: {e}")
+        return False
+
+def test_contractor_profiles():
+    """Test that confirmed contractor fields are reused by later bids of the same contractor"""
+    print("\n🧪 Testing contractor profiles...")
+    
+    try:
+        import io
+        import contextlib
+        import tempfile
+        import threading
+        import tender_predictor
+        import time
+        from contractor_profiles import ContractorProfileStore
+        
+        stated = [[
+            "Employer PAN No: 600111222", "Contractor Name: Himalayan Builders Pvt Ltd", "Contractor PAN No: 301234567",
+            "Client Rating: 4.5", "Rejection History: 1", "Bid Amount: Rs. 2,500,000",
+        ]]
+        # Another bid of the firm stating the same track record
+        other = [[
+            "Contractor Name: Himalayan Builders Pvt Ltd", "Contractor PAN No: 301234567",
+            "Client Rating: 4.5", "Rejection History: 1", "Bid Amount: Rs. 3,100,000",
+        ]]
+        # Same firm, written differently, without its track record
+        later = [["Contractor Name: M/S Himalayan Builders", "Contractor PAN No: 301234567", "Bid Amount: Rs. 2,100,000"]]
+        # Bids without a contractor-labelled name or registration: the placeholder name and the
+        # employer's PAN must not become one shared profile
+        anonymous = [
+            [["Employer PAN No: 600111222", "Name: Unknown Contractor", "Client Rating: 3.0", f"Bid Amount: Rs. {amount}"]]
+            for amount in ('1,200,000', '1,900,000', '2,700,000')
+        ]
+        
+        store = ContractorProfileStore()
+        predictor = TenderPredictor()
+        page_cache, tender_predictor.PAGE_CACHE = tender_predictor.PAGE_CACHE, None
+        profiles, tender_predictor.CONTRACTOR_PROFILES = tender_predictor.CONTRACTOR_PROFILES, store
+        try:
+            infos = []
+            for pages in (stated, stated, later, other, later):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    data = predictor.extract_data_from_pdf(_build_pdf(pages))
+                infos.append(predictor.last_extraction_info)
+            keys = store.stats()['keys']
+            for pages in anonymous:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    predictor.extract_data_from_pdf(_build_pdf(pages))
+                assert predictor.last_extraction_info['contractor_profile'] is None or \
+                    not predictor.last_extraction_info['contractor_profile']['filled'], "Placeholder bid filled from a profile"
+        finally:
+            tender_predictor.PAGE_CACHE = page_cache
+            tender_predictor.CONTRACTOR_PROFILES = profiles
+        
+        # The same document submitted twice is one confirmation, so the later bid goes without a rating
+        assert infos[0]['contractor_profile']['recorded_as'] == 'reg:301234567'
+        assert infos[2]['contractor_profile']['trusted'] == [], f"Trusted too early: {infos[2]['contractor_profile']}"
+        assert not infos[2]['contractor_profile']['filled'] and infos[2]['contractor_profile']['recorded_as'] is None
+        # A second, different document confirms the values
+        profile = infos[4]['contractor_profile']
+        assert profile['filled'] == ['client_rating', 'rejection_history'], f"Unexpected fill: {profile}"
+        assert data['client_rating'] == 4.5 and data['rejection_history'] == 1 and data['bid_amount'] == 2100000
+        assert infos[4]['fields_source']['client_rating']['tier'] == 'profile'
+        assert store.trusted_fields('Himalayan Builders Ltd.')[1] == {'client_rating': 4.5, 'rejection_history': 1}
+        assert store.trusted_fields('Himalayan Builders', now=time.time() + 200 * 86400)[1] == {}, "Stale profile trusted"
+        assert store.stats()['keys'] == keys, "Placeholder name or employer PAN recorded as a contractor"
+        assert store.trusted_fields('Unknown Contractor', '600111222') == (None, {})
+        
+        # Stores in different processes share the file without losing each other's updates
+        path = os.path.join(tempfile.mkdtemp(), 'profiles.json')
+        writers = [ContractorProfileStore(path), ContractorProfileStore(path)]
+        def record_many(store, prefix):
+            for i in range(20):
+                store.record(f"{prefix} Builders {i}", None, {'client_rating': 4.0}, f"{prefix}-{i}")
+        threads = [threading.Thread(target=record_many, args=(w, prefix)) for w, prefix in zip(writers, ('Everest', 'Kanchan'))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert ContractorProfileStore(path).stats()['keys'] == 40, "Concurrent profile updates were lost"
+        print(f"✅ Profile {profile['key']} filled {profile['filled']} after two different confirming bids")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Contractor profile test failed: {e}")
+        return False
+
+def test_uncertainty():
+    """Test that Monte Carlo intervals bracket the point estimate and collapse for fully extracted bids"""
+    print("\n🧪 Testing uncertainty simulation...")
+    
+    try:
+        from uncertainty import simulate_bids
+        
+        predictor = TenderPredictor()
+        predictor.initialize_model()
+        compiled = predictor.compile_inference()
+        bids = predictor.create_synthetic_data(num_samples=4)
+        result = simulate_bids(
+            compiled, bids,
+            defaulted_fields=[[], ['client_rating', 'project_success_rate'], ['bid_amount'], []],
+            low_confidence_fields=[[], [], [], ['project_duration']],
+            samples=2000, seed=7
+        )
+        
+        point = result['win_probability']
+        assert ((result['win_probability_p5'] <= point) & (point <= result['win_probability_p95'])).all(), \
+            "Interval misses the point estimate"
+        # Nothing guessed in bid 0: every sample is the bid itself
+        assert result.loc[0, 'win_probability_p5'] == result.loc[0, 'win_probability_p95'] == point[0], \
+            "Fully extracted bid has a non-zero interval"
+        assert (result['win_probability_p95'] - result['win_probability_p5'])[1:3].gt(0).all(), "Guessed fields add no spread"
+        assert np.allclose([sum(dist) for dist in result['rank_distribution']], 1.0)
+        print("✅ Intervals contain the point estimates; fully extracted bid interval has zero width")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Uncertainty test failed: {e}")
+        return False
+
+def test_weight_scenarios():
+    """Test that scenario ranks equal rank_bids under each weighting"""
+    print("\n🧪 Testing weight scenarios...")
+    
+    try:
+        from scenarios import evaluate_scenarios
+        from ranking import COMPREHENSIVE_SCORE_WEIGHTS as baseline, rank_bids
+        
+        rng = np.random.default_rng(3)
+        n = 12
+        df = pd.DataFrame({
+            'contractor_name': [f"Contractor {i}" for i in range(n)],
+            'client_rating': rng.uniform(1, 5, n),
+            'project_success_rate': rng.uniform(60, 100, n),
+            'bid_amount': rng.uniform(1e5, 5e6, n),
+        })
+        
+        # The baseline weighting itself changes nothing
+        same = evaluate_scenarios(df, weights=[dict(baseline)])['scenarios']
+        assert not same['winner_changed'][0] and same['spearman_vs_baseline'][0] == 1.0, f"Baseline scenario moved: {same}"
+        
+        weightings = [
+            dict(baseline),
+            {'rating_score': 0.6, 'success_score': 0.1, 'bid_score': 0.3},
+            {'rating_score': 0.0, 'success_score': 0.2, 'bid_score': 0.8},
+            {'rating_score': 0.5, 'success_score': 0.5, 'bid_score': 0.0},
+        ]
+        max_bid = df['bid_amount'].max()
+        expected = []
+        for weights in weightings:
+            # The same bids restated so that rank_bids' comprehensive score is this weighting's score
+            restated = df.assign(
+                client_rating=df['client_rating'] * weights['rating_score'] / baseline['rating_score'],
+                project_success_rate=df['project_success_rate'] * weights['success_score'] / baseline['success_score'],
+                bid_amount=max_bid - (max_bid - df['bid_amount']) * weights['bid_score'] / baseline['bid_score'],
+            )
+            expected.append(rank_bids(restated, group_col=None, score='comprehensive')['rank'].sort_index().to_numpy())
+            single = evaluate_scenarios(df, weights=[weights])['bids']['mean_rank'].sort_index().to_numpy()
+            assert np.array_equal(single, expected[-1]), f"Ranks differ from rank_bids under {weights}"
+        
+        # All weightings at once summarise the same per-scenario ranks
+        bids = evaluate_scenarios(df, weights=weightings)['bids'].sort_index()
+        expected = np.column_stack(expected)
+        assert np.array_equal(bids['best_rank'], expected.min(axis=1)) and np.array_equal(bids['worst_rank'], expected.max(axis=1))
+        assert np.allclose(bids['win_share'], (expected == 1).mean(axis=1))
+        print(f"✅ Scenario ranks match rank_bids under {len(weightings)} weightings")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Weight scenario test failed: {e}")
+        return False
+
+def test_bid_amount_selection():
+    """Test that the bid amount is picked by label evidence, with units, on any page"""
+    print("\n🧪 Testing bid amount selection...")
+    
+    try:
+        import io
+        import contextlib
+        import tender_predictor
+        from amounts import MIN_EVIDENCE, best_amount, find_amounts
+        
+        # A labelled bid amount beats a larger unlabelled or generic total
+        best = best_amount(find_amounts("Ref. 98,765,432\nTotal: Rs. 9,750,000\nBid Amount: Rs. 2,500,000"))
+        assert (best.value, best.label) == (2500000, 'bid_amount'), f"Unexpected pick: {best}"
+        
+        # Units are applied to the value
+        lakh = best_amount(find_amounts("Bid Amount: NRs 25 lakh"))
+        crore = best_amount(find_amounts("Contract value: 1.2 crore"))
+        assert (lakh.value, lakh.unit) == (2500000, 'lakh') and (crore.value, crore.unit) == (12000000, 'crore')
+        
+        # Label words only count whole
+        for text in ("assumption 5,000,000", "evaluation 5,000,000", "subtotal 5,000,000"):
+            assert find_amounts(text)[0].label is None, f"Label found inside a word: {text}"
+        
+        # A year or a postcode isn't a found bid amount, so the tiers still hunt for one...
+        predictor = TenderPredictor()
+        notice = find_amounts("Tender notice issued 15 March 2024. Kathmandu 44600.")
+        assert best_amount(notice, MIN_EVIDENCE) is None, f"Bare number counted as evidence: {notice}"
+        assert 'bid_amount' not in predictor._fields_found({}, notice), "Bare number stopped the bid amount hunt"
+        
+        # The old page-38 form: earlier pages carry larger estimates, page 38 states the bid
+        pages = (
+            [["Contractor Name: Annapurna Construction"], ["Estimated Cost: Rs. 8,000,000", "Total: Rs. 9,750,000"]]
+            + [[f"Section {i}: general conditions of contract"] for i in range(3, 38)]
+            + [["Bid Amount: Rs. 2,345,678"]]
+        )
+        page_cache, tender_predictor.PAGE_CACHE = tender_predictor.PAGE_CACHE, None
+        profiles, tender_predictor.CONTRACTOR_PROFILES = tender_predictor.CONTRACTOR_PROFILES, None
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                predictor.extract_data_from_pdf(_build_pdf([["Tender notice issued 15 March 2024. Kathmandu 44600."]]))
+            last_resort = predictor.last_extraction_info['bid_amount_source']
+            with contextlib.redirect_stdout(io.StringIO()):
+                data = predictor.extract_data_from_pdf(_build_pdf(pages))
+        finally:
+            tender_predictor.PAGE_CACHE = page_cache
+            tender_predictor.CONTRACTOR_PROFILES = profiles
+        # ...and is only taken once every tier has come up empty, marked as unlabelled
+        assert last_resort['score'] == 0 and last_resort['label'] is None, f"Unexpected last resort: {last_resort}"
+        source = predictor.last_extraction_info['bid_amount_source']
+        assert data['bid_amount'] == 2345678 and source['page'] == 38, f"Unexpected bid amount: {data['bid_amount']} ({source})"
+        print(f"✅ Labelled amounts win, units applied, page-38 bid found: {data['bid_amount']}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Bid amount selection test failed: {e}")
+        return False
+
+def test_model_persistence():
+    """Test that a saved model reloads with identical predictions and encoders"""
+    print("\n🧪 Testing model persistence...")
+    
+    try:
+        import io
+        import contextlib
+        import tempfile
+        
+        path = os.path.join(tempfile.mkdtemp(), 'tender_model.joblib')
+        trained = TenderPredictor()
+        with contextlib.redirect_stdout(io.StringIO()):
+            trained.initialize_model(path)
+        assert os.path.exists(path), "Trained model was not saved"
+        
+        # A fresh predictor loads the saved model instead of retraining
+        loaded = TenderPredictor()
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            loaded.initialize_model(path)
+        assert "Initializing model with sample data" not in output.getvalue(), "Model retrained despite saved copy"
+        assert loaded.model_version() == trained.model_version(), "Loaded model differs from the saved one"
+        
+        bids = trained.create_synthetic_data(num_samples=20)
+        bids[0]['license_category'] = 'Z9 - Never Seen'
+        _, expected = trained.compile_inference().predict_records(bids)
+        _, probas = loaded.compile_inference().predict_records(bids)
+        assert np.array_equal(probas, expected), "Probabilities differ after reload"
+        
+        codes = loaded.encoders.transform({'license_category': ['Z9 - Never Seen', bids[1]['license_category']]})
+        assert codes['license_category'][0] == -1, f"Unseen category not coded -1: {codes}"
+        assert codes['license_category'][1] == trained.encoders.transform(
+            {'license_category': [bids[1]['license_category']]})['license_category'][0]
+        print(f"✅ Model {loaded.model_version()} reloaded with identical probabilities")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Model persistence test failed: {e}")
+        return False
+
+def test_result_cache_disk():
+    """Test that the on-disk cache tier stays under its size limit and drops expired entries"""
+    print("\n🧪 Testing result cache disk pruning...")
+    
+    try:
+        import tempfile
+        import time
+        from result_cache import ResultCache
+        
+        directory = tempfile.mkdtemp()
+        value = b'x' * 10000
+        cache = ResultCache(max_entries=4, ttl_seconds=3600, disk_dir=directory, max_disk_bytes=50000)
+        for i in range(12):
+            cache.put(f"key{i}", value)
+        files = sorted(os.listdir(directory))
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        assert size <= 50000, f"Disk tier grew to {size} bytes"
+        # The oldest entries went first; the newest is still served from disk
+        assert 'key0.pkl' not in files and 'key11.pkl' in files, f"Unexpected survivors: {files}"
+        assert ResultCache(disk_dir=directory).get('key11') == value
+        
+        # Expired entries are removed by the next write, not only when read again
+        stale = os.path.join(directory, 'key11.pkl')
+        os.utime(stale, (time.time() - 7200, time.time() - 7200))
+        fresh = ResultCache(max_entries=4, ttl_seconds=3600, disk_dir=directory, max_disk_bytes=50000)
+        fresh.put('key12', value)
+        assert not os.path.exists(stale), "Expired entry left on disk"
+        print(f"✅ Disk tier kept at {size} bytes, {cache.stats()['disk_evictions']} files evicted")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Result cache disk test failed: {e}")
+        return False
+
 if __name__ == "__main__":
     print("🚀 AI Tender Predictor Test Suite")
     print("=" * 50)
@@ -99,9 +823,73 @@ if __name__ == "__main__":
     # Test 2: PDF extraction (if test PDF exists)
     test2_passed = test_extraction()
     
+    # Test 3: Compiled inference parity
+    test3_passed = test_compiled_inference()
+    
+    # Test 4: Vectorized multi-tender ranking
+    test4_passed = test_multi_tender_ranking()
+    
+    # Test 5: Incremental (live) ranking
+    test5_passed = test_incremental_ranking()
+    
+    # Test 6: Extraction regexes stay linear on hostile text
+    test6_passed = test_regex_guard()
+    
+    # Test 7: Deadline-aware tiered extraction
+    test7_passed = test_extraction_budget()
+    
+    # Test 8: Cost-based routing of extraction jobs
+    test8_passed = test_extraction_scheduler()
+    
+    # Test 9: Admission control under load
+    test9_passed = test_admission_control()
+    
+    # Test 10: Coalescing of identical concurrent extractions
+    test10_passed = test_single_flight()
+    
+    # Test 11: Incremental re-extraction of revised documents
+    test11_passed = test_page_cache()
+    
+    # Test 12: Near-duplicate bids within a tender
+    test12_passed = test_near_duplicates()
+    
+    # Test 13: Contractor profiles for history-derived fields
+    test13_passed = test_contractor_profiles()
+    
+    # Test 14: Monte Carlo uncertainty of win probabilities
+    test14_passed = test_uncertainty()
+    
+    # Test 15: Scoring-weight scenarios
+    test15_passed = test_weight_scenarios()
+    
+    # Test 16: Bid amount selection by label evidence
+    test16_passed = test_bid_amount_selection()
+    
+    # Test 17: Model persistence with its encoders
+    test17_passed = test_model_persistence()
+    
+    # Test 18: Size and age limits of the on-disk cache tier
+    test18_passed = test_result_cache_disk()
+    
     print("\n📊 Test Results:")
     print(f"✅ Initialization: {'PASSED' if test1_passed else 'FAILED'}")
     print(f"✅ PDF Extraction: {'PASSED' if test2_passed else 'FAILED'}")
+    print(f"✅ Compiled Inference: {'PASSED' if test3_passed else 'FAILED'}")
+    print(f"✅ Multi-Tender Ranking: {'PASSED' if test4_passed else 'FAILED'}")
+    print(f"✅ Incremental Ranking: {'PASSED' if test5_passed else 'FAILED'}")
+    print(f"✅ Regex Guard: {'PASSED' if test6_passed else 'FAILED'}")
+    print(f"✅ Time-Budgeted Extraction: {'PASSED' if test7_passed else 'FAILED'}")
+    print(f"✅ Extraction Scheduler: {'PASSED' if test8_passed else 'FAILED'}")
+    print(f"✅ Admission Control: {'PASSED' if test9_passed else 'FAILED'}")
+    print(f"✅ Single-Flight Extraction: {'PASSED' if test10_passed else 'FAILED'}")
+    print(f"✅ Page Cache: {'PASSED' if test11_passed else 'FAILED'}")
+    print(f"✅ Near-Duplicate Detection: {'PASSED' if test12_passed else 'FAILED'}")
+    print(f"✅ Contractor Profiles: {'PASSED' if test13_passed else 'FAILED'}")
+    print(f"✅ Uncertainty Simulation: {'PASSED' if test14_passed else 'FAILED'}")
+    print(f"✅ Weight Scenarios: {'PASSED' if test15_passed else 'FAILED'}")
+    print(f"✅ Bid Amount Selection: {'PASSED' if test16_passed else 'FAILED'}")
+    print(f"✅ Model Persistence: {'PASSED' if test17_passed else 'FAILED'}")
+    print(f"✅ Result Cache Disk Tier: {'PASSED' if test18_passed else 'FAILED'}")
     
     if test1_passed:
         print("\n🎉 Basic functionality is working!")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo robustness of predictions when bid fields were guessed
+Every defaulted (or low-confidence) field is replaced by plausible samples, all
+bids x samples rows are scored in one batched booster call through CompiledPredictor,
+and the spread of win probabilities and composite-score ranks is reported per bid
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .fast_inference import FLOAT_FIELDS, INT_FIELDS
+    from .ranking import column_ranks, composite_scores
+except ImportError:
+    from fast_inference import FLOAT_FIELDS, INT_FIELDS
+    from ranking import column_ranks, composite_scores
+
+NUMERIC_FIELDS = FLOAT_FIELDS + INT_FIELDS
+
+# Defaulted fields are drawn from the ranges the model was trained on (create_synthetic_data)
+FIELD_PRIORS = {
+    'bid_amount': ('uniform', 100000, 5000000),
+    'project_duration': ('integers', 6, 60),
+    'warranty_period': ('integers', 12, 120),
+    'client_rating': ('uniform', 1.0, 5.0),
+    'project_success_rate': ('uniform', 60, 100),
+    'rejection_history': ('integers', 0, 5),
+    'safety_certification': ('choice', ['Yes', 'No']),
+    'license_category': ('choice', ['C1', 'C2', 'C3', 'C4', 'C5']),
+}
+# Low-confidence fields keep their value but get +/- this relative noise (clipped to the prior range)
+LOW_CONFIDENCE_SPREAD = {
+    'bid_amount': 0.10,
+    'project_duration': 0.25,
+    'warranty_period': 0.25,
+    'client_rating': 0.15,
+    'project_success_rate': 0.10,
+    'rejection_history': 0.50,
+}
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+
+def sample_field(field, rng, size, value=None):
+    """size draws for one field: from its prior, or around value when one is given"""
+    kind, *params = FIELD_PRIORS[field]
+    if kind == 'choice':
+        if value is not None:
+            # A categorical value we are unsure of keeps half its mass
+            draws = rng.choice(params[0], size=size)
+            return np.where(rng.random(size) < 0.5, value, draws).astype(object)
+        return rng.choice(params[0], size=size).astype(object)
+
+    low, high = params
+    if value is None:
+        if kind == 'integers':
+            return rng.integers(low, high, size=size).astype(np.float64)
+        return rng.uniform(low, high, size=size)
+
+    spread = LOW_CONFIDENCE_SPREAD.get(field, 0.1) * max(abs(float(value)), 1.0)
+    draws = np.clip(rng.normal(float(value), spread, size=size), low, high)
+    return np.round(draws) if kind == 'integers' else draws
+
+
+def simulate_bids(compiled, bids: List[Dict], defaulted_fields: Optional[List[List[str]]] = None,
+                  low_confidence_fields: Optional[List[List[str]]] = None, samples=2000, seed=None,
+                  percentiles=DEFAULT_PERCENTILES) -> Optional[pd.DataFrame]:
+    """
+    Win-probability interval and composite-rank distribution for each bid.
+    defaulted_fields[i] lists bid i's guessed fields (resampled from the prior);
+    low_confidence_fields[i] lists extracted-but-doubtful ones (perturbed around the value).
+    Sample s of every bid forms one simulated tender, so ranks are taken across bids per sample.
+    """
+    if not bids:
+        print("No data to simulate")
+        return None
+
+    n_bids = len(bids)
+    defaulted_fields = defaulted_fields or [[] for _ in bids]
+    low_confidence_fields = low_confidence_fields or [[] for _ in bids]
+    base = compiled.records_to_columns(bids)
+    if base is None:
+        return None
+    rng = np.random.default_rng(seed)
+
+    # Rows are bid-major: row b * samples + s is bid b in simulated tender s
+    columns = {field: np.repeat(values, samples) for field, values in base.items()}
+    for b in range(n_bids):
+        rows = slice(b * samples, (b + 1) * samples)
+        for field in defaulted_fields[b]:
+            if field in FIELD_PRIORS:
+                columns[field][rows] = sample_field(field, rng, samples)
+        for field in low_confidence_fields[b]:
+            if field in FIELD_PRIORS and field not in defaulted_fields[b]:
+                columns[field][rows] = sample_field(field, rng, samples, value=base[field][b])
+
+    # One booster call for every sample of every bid
+    _, probabilities = compiled.predict_columns(columns)
+    probabilities = np.asarray(probabilities, dtype=np.float64).reshape(n_bids, samples)
+    _, point_probabilities = compiled.predict_columns(base)
+
+    frame = pd.DataFrame({field: columns[field] for field in NUMERIC_FIELDS + ['safety_certification']})
+    frame['simulation'] = np.tile(np.arange(samples), n_bids)
+    scores = composite_scores(frame, group_col='simulation').reshape(n_bids, samples)
+    ranks = column_ranks(scores)
+
+    result = pd.DataFrame({
+        'contract_name': base['contract_name'],
+        'defaulted_fields': [list(fields) for fields in defaulted_fields],
+        'win_probability': np.asarray(point_probabilities, dtype=np.float64),
+        'win_probability_mean': probabilities.mean(axis=1),
+    })
+    for q, values in zip(percentiles, np.percentile(probabilities, percentiles, axis=1)):
+        result[f'win_probability_p{q:g}'] = values
+    result['rank_mean'] = ranks.mean(axis=1)
+    result['rank_distribution'] = [
+        (np.bincount(ranks[b], minlength=n_bids + 1)[1:] / samples).tolist() for b in range(n_bids)
+    ]
+    result['first_place_share'] = (ranks == 1).mean(axis=1)
+    result['samples'] = samples
+    return result
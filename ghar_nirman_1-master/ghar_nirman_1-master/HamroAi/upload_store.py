@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Content-addressed storage for uploaded tender files
+Uploads are streamed to disk in chunks while their SHA-256 is computed, stored as
+<root>/<sha[:2]>/<sha><ext> so identical files are kept once, and evicted by age / LRU
+when the store grows past its quota
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+HEX_PREFIX = re.compile(r'^[0-9a-f]{2}$')
+
+
+class StoredFile:
+    """Where an upload ended up and whether an identical file was already stored"""
+
+    def __init__(self, path, sha256, size, deduplicated, filename=None):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.deduplicated = deduplicated
+        self.filename = filename
+
+    def info(self):
+        return {
+            'path': self.path,
+            'sha256': self.sha256,
+            'size': self.size,
+            'deduplicated': self.deduplicated,
+            'filename': self.filename,
+        }
+
+
+class ContentAddressedStore:
+    """
+    A file's last use is its mtime (refreshed on every duplicate upload), which drives
+    both age-based and LRU eviction. Only files inside the <sha[:2]>/ shards are managed.
+    Files saved with pin=True are never evicted until every pin is released with unpin(),
+    so a path handed to extraction can't disappear underneath it.
+    """
+
+    def __init__(self, root, quota_bytes=None, max_age_seconds=None, chunk_size=1 << 20):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.max_age_seconds = max_age_seconds
+        self.chunk_size = chunk_size
+        self.evicted = 0
+        self.deduplicated = 0
+
+        self._lock = threading.Lock()
+        self._index = None  # path -> [size, last_used]
+        self._pins = {}  # path -> number of holders
+
+    @staticmethod
+    def _suffix(filename):
+        ext = os.path.splitext(filename or '')[1].lower()
+        return ext if re.fullmatch(r'\.[a-z0-9]{1,10}', ext) else ''
+
+    def path_for(self, sha256, filename=None):
+        return os.path.join(self.root, sha256[:2], sha256 + self._suffix(filename))
+
+    def _load_index(self):
+        """Scan the shards once; afterwards the index is kept up to date in memory"""
+        index = {}
+        if os.path.isdir(self.root):
+            for shard in os.scandir(self.root):
+                if not (shard.is_dir() and HEX_PREFIX.match(shard.name)):
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.is_file() and not entry.name.endswith('.part'):
+                        stat = entry.stat()
+                        index[entry.path] = [stat.st_size, stat.st_mtime]
+        self._index = index
+
+    async def save_upload(self, upload, prefix=b'', pin=False):
+        """
+        Stream an UploadFile into the store without blocking the event loop.
+        prefix holds bytes the caller already read from the upload; with pin=True the
+        stored file is pinned until unpin(path).
+        """
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        tmp = await run_in_threadpool(
+            tempfile.NamedTemporaryFile, dir=self.root, suffix='.part', delete=False
+        )
+        try:
+            chunk = prefix
+            while True:
+                if chunk:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await run_in_threadpool(tmp.write, chunk)
+                chunk = await upload.read(self.chunk_size)
+                if not chunk:
+                    break
+            await run_in_threadpool(tmp.close)
+            return await run_in_threadpool(
+                self._commit, tmp.name, digest.hexdigest(), size, upload.filename, None, pin
+            )
+        except BaseException:
+            tmp.close()
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+            raise
+
+    def save_bytes(self, data, filename=None, sha256=None):
+        """Store an in-memory buffer (blocking - call from a worker thread or background task)"""
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+        target = self.path_for(sha256, filename)
+        if os.path.exists(target):
+            # Likely a duplicate; _commit writes data after all if the file is evicted meanwhile
+            return self._commit(None, sha256, len(data), filename, data)
+        os.makedirs(self.root, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.root, suffix='.part', delete=False) as tmp:
+            tmp.write(data)
+        return self._commit(tmp.name, sha256, len(data), filename)
+
+    def _commit(self, tmp_path, sha256, size, filename, data=None, pin=False):
+        """Move tmp_path (or, when it is None, write data) into place unless the file is already stored"""
+        target = self.path_for(sha256, filename)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            now = time.time()
+            deduplicated = os.path.exists(target)
+            if deduplicated:
+                if tmp_path:
+                    os.remove(tmp_path)
+                os.utime(target, (now, now))
+                self.deduplicated += 1
+            else:
+                if tmp_path is None:
+                    with tempfile.NamedTemporaryFile(dir=self.root, suffix='.part', delete=False) as tmp:
+                        tmp.write(data)
+                    tmp_path = tmp.name
+                os.replace(tmp_path, target)
+            self._index[target] = [size, now]
+            if pin:
+                self._pins[target] = self._pins.get(target, 0) + 1
+            self._evict(keep=target, now=now)
+        return StoredFile(target, sha256, size, deduplicated, filename)
+
+    def unpin(self, path):
+        """Release one pin taken by save_upload(pin=True)"""
+        with self._lock:
+            holders = self._pins.get(path, 0) - 1
+            if holders > 0:
+                self._pins[path] = holders
+            else:
+                self._pins.pop(path, None)
+
+    def _evict(self, keep, now):
+        """Drop expired files, then least recently used ones until under quota (lock held); pinned files stay"""
+        doomed = []
+        if self.max_age_seconds:
+            doomed = [path for path, (_, used) in self._index.items()
+                      if path != keep and path not in self._pins and now - used > self.max_age_seconds]
+
+        if self.quota_bytes:
+            doomed_set = set(doomed)
+            total = sum(size for path, (size, _) in self._index.items() if path not in doomed_set)
+            if total > self.quota_bytes:
+                for path, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+                    if total <= self.quota_bytes:
+                        break
+                    if path == keep or path in doomed_set or path in self._pins:
+                        continue
+                    doomed.append(path)
+                    total -= size
+
+        for path in doomed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️  Could not evict {path}: {e}")
+                continue
+            self._index.pop(path, None)
+            self.evicted += 1
+
+    def stats(self):
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            return {
+                'files': len(self._index),
+                'bytes': sum(size for size, _ in self._index.values()),
+                'quota_bytes': self.quota_bytes,
+                'max_age_seconds': self.max_age_seconds,
+                'deduplicated': self.deduplicated,
+                'evicted': self.evicted,
+                'pinned': len(self._pins),
+            }
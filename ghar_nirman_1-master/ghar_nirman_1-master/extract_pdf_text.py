@@ -53,6 +53,9 @@ def extract_tender_data(pdf_path):
                 "data": {}
             }
         
+        # Fields the extractor estimated, plus the ones defaulted below
+        defaulted_fields = list(predictor.last_extraction_info.get('defaulted_fields', []))
+        
         # Fill in missing parameters with default values
         required_params = [
             'contract_name', 'license_category', 'project_duration', 'warranty_period',
@@ -62,6 +65,7 @@ def extract_tender_data(pdf_path):
         
         for param in required_params:
             if param not in extracted_data or extracted_data[param] is None:
+                defaulted_fields.append(param)
                 if param == 'contract_name':
                     extracted_data[param] = "Unknown Contractor"
                 elif param == 'license_category':
@@ -105,6 +109,7 @@ def extract_tender_data(pdf_path):
         return {
             "success": True,
             "data": extracted_data,
+            "defaulted_fields": defaulted_fields,
             "processed_data": processed_data_dict,
             "prediction": prediction_result,
             "message": "Data extracted successfully using advanced AI system"
@@ -0,0 +1,91 @@
+// Admission control for routes that start Python extraction processes.
+// Every admitted request holds a slot until its response is done. Near the limit, documents
+// are read from the text layer only (no OCR); at the limit, requests are refused with
+// 429 (too many in flight) or 503 (recent extractions too slow) and a Retry-After hint.
+
+// Seconds the Python extractor may spend on one PDF (it defaults whatever it can't read in time);
+// the process is killed if it overruns that by the grace period
+export const AI_EXTRACTION_BUDGET_SECONDS = Number(process.env.AI_EXTRACTION_BUDGET_SECONDS || 60);
+export const AI_EXTRACTION_TIMEOUT_MS = (AI_EXTRACTION_BUDGET_SECONDS + 30) * 1000;
+
+const MAX_IN_FLIGHT = Number(process.env.AI_EXTRACTION_MAX_IN_FLIGHT || 4);
+const DEGRADE_AT = Number(process.env.AI_EXTRACTION_DEGRADE_AT || 0.75);
+const LATENCY_TARGET_MS = Number(process.env.AI_EXTRACTION_LATENCY_TARGET_MS || AI_EXTRACTION_BUDGET_SECONDS * 1000);
+const LATENCY_ALPHA = 0.2;
+
+const state = {
+  inFlight: 0,
+  latencyEwmaMs: null,
+  admitted: 0,
+  degraded: 0,
+  shed429: 0,
+  shed503: 0,
+};
+
+// Arguments for run_tender_predictor.py after the PDF path(s)
+export const extractionArgs = (degraded = false) => [
+  "--budget", String(AI_EXTRACTION_BUDGET_SECONDS),
+  ...(degraded ? ["--no-ocr"] : []),
+];
+
+const currentLoad = () => ({
+  inFlight: state.inFlight / MAX_IN_FLIGHT,
+  // Old latency only matters while work is still running; an idle server admits again
+  latency: state.inFlight && state.latencyEwmaMs !== null ? state.latencyEwmaMs / LATENCY_TARGET_MS : 0,
+});
+
+// Seconds until the in-flight work should have drained, at the recent latency
+const retryAfterSeconds = () => {
+  const latencyMs = state.latencyEwmaMs ?? LATENCY_TARGET_MS;
+  return Math.max(1, Math.ceil((latencyMs * state.inFlight) / MAX_IN_FLIGHT / 1000));
+};
+
+export const admitExtraction = (req, res, next) => {
+  const load = currentLoad();
+  const pressure = Math.max(load.inFlight, load.latency);
+
+  if (pressure >= 1) {
+    const status = load.inFlight >= 1 ? 429 : 503;
+    if (status === 429) state.shed429 += 1;
+    else state.shed503 += 1;
+    res.set("Retry-After", String(retryAfterSeconds()));
+    return res.status(status).json({
+      success: false,
+      error: "Document analysis is busy, please retry shortly",
+      retryAfter: retryAfterSeconds(),
+    });
+  }
+
+  const degraded = pressure >= DEGRADE_AT;
+  state.inFlight += 1;
+  state.admitted += 1;
+  if (degraded) state.degraded += 1;
+  req.extractionArgs = extractionArgs(degraded);
+  req.extractionMode = degraded ? "text_only" : "full";
+
+  const started = Date.now();
+  let released = false;
+  const release = () => {
+    if (released) return;
+    released = true;
+    state.inFlight -= 1;
+    const latencyMs = Date.now() - started;
+    state.latencyEwmaMs = state.latencyEwmaMs === null
+      ? latencyMs
+      : (1 - LATENCY_ALPHA) * state.latencyEwmaMs + LATENCY_ALPHA * latencyMs;
+  };
+  res.on("finish", release);
+  res.on("close", release);
+  next();
+};
+
+export const extractionAdmissionStats = () => ({
+  inFlight: state.inFlight,
+  latencyEwmaMs: state.latencyEwmaMs === null ? null : Math.round(state.latencyEwmaMs),
+  load: currentLoad(),
+  admitted: state.admitted,
+  degraded: state.degraded,
+  shed429: state.shed429,
+  shed503: state.shed503,
+  limits: { maxInFlight: MAX_IN_FLIGHT, degradeAt: DEGRADE_AT, latencyTargetMs: LATENCY_TARGET_MS },
+});
@@ -6,6 +6,8 @@ import { execFile } from "child_process";
 import Tender from "../models/Tender.js";
 import Bid from "../models/Bid.js";
 import Contractor from "../models/Contractor.js";
+import { admitExtraction, extractionArgs, extractionAdmissionStats, AI_EXTRACTION_TIMEOUT_MS } from "../middleware/extractionAdmission.js";
+import { hashFile, singleFlight, singleFlightStats } from "../utils/singleFlight.js";
 
 const router = express.Router();
 
@@ -42,10 +44,27 @@ const upload = multer({
 // AI ANALYSIS FUNCTIONS
 // =============================================================================
 
-const runAIAnalysis = (pdfPath) => {
+// Users opening the same tender or bid comparison at once share one Python run per
+// document set (by content, not path) and extraction mode
+const extractionKey = async (pdfPaths, options) => {
+  const hashes = await Promise.all(pdfPaths.map(hashFile));
+  return `${hashes.join(",")}|${options.join(" ")}`;
+};
+
+const runAIAnalysis = async (pdfPath, options = extractionArgs()) => {
+  const key = await extractionKey([pdfPath], options);
+  return singleFlight(key, () => spawnAIAnalysis(pdfPath, options));
+};
+
+const runMultiPDFAnalysis = async (pdfPaths, options = extractionArgs()) => {
+  const key = await extractionKey(pdfPaths, options);
+  return singleFlight(`multi:${key}`, () => spawnMultiPDFAnalysis(pdfPaths, options));
+};
+
+const spawnAIAnalysis = (pdfPath, options) => {
   return new Promise((resolve, reject) => {
     const scriptPath = path.join(process.cwd(), "..", "..", "ghar_nirman_1-master", "ghar_nirman_1-master", "HamroAi", "run_tender_predictor.py");
-    execFile("python", [scriptPath, "analyze", pdfPath], (error, stdout, stderr) => {
+    execFile("python", [scriptPath, "analyze", pdfPath, ...options], { timeout: AI_EXTRACTION_TIMEOUT_MS }, (error, stdout, stderr) => {
       if (error) {
         console.error("❌ Error running AI analysis:", error);
         reject(new Error("Failed to run AI analysis"));
@@ -91,11 +110,11 @@ const runAIAnalysis = (pdfPath) => {
   });
 };
 
-const runMultiPDFAnalysis = (pdfPaths) => {
+const spawnMultiPDFAnalysis = (pdfPaths, options) => {
   return new Promise((resolve, reject) => {
     const scriptPath = path.join(process.cwd(), "..", "..", "ghar_nirman_1-master", "ghar_nirman_1-master", "HamroAi", "run_tender_predictor.py");
-    const args = ["analyze", ...pdfPaths];
-    execFile("python", [scriptPath, ...args], (error, stdout, stderr) => {
+    const args = ["analyze", ...pdfPaths, ...options];
+    execFile("python", [scriptPath, ...args], { timeout: AI_EXTRACTION_TIMEOUT_MS * pdfPaths.length }, (error, stdout, stderr) => {
       if (error) {
         console.error("❌ Error running multi-PDF analysis:", error);
         reject(new Error("Failed to run multi-PDF analysis"));
@@ -161,7 +180,7 @@ router.get("/test", (req, res) => {
 });
 
 // ✅ Analyze single PDF with AI
-router.post("/analyze-pdf", upload.single("pdf"), async (req, res) => {
+router.post("/analyze-pdf", admitExtraction, upload.single("pdf"), async (req, res) => {
   try {
     if (!req.file) {
       return res.status(400).json({ error: "No PDF file uploaded" });
@@ -169,7 +188,7 @@ router.post("/analyze-pdf", upload.single("pdf"), async (req, res) => {
 
     console.log("🔍 Starting AI analysis for:", req.file.filename);
 
-    const analysisResult = await runAIAnalysis(req.file.path);
+    const analysisResult = await runAIAnalysis(req.file.path, req.extractionArgs);
 
     if (!analysisResult.success) {
       return res.status(500).json({
@@ -196,7 +215,7 @@ router.post("/analyze-pdf", upload.single("pdf"), async (req, res) => {
 });
 
 // ✅ Analyze multiple PDFs with AI comparison
-router.post("/analyze-multiple", upload.array("pdfs", 10), async (req, res) => {
+router.post("/analyze-multiple", admitExtraction, upload.array("pdfs", 10), async (req, res) => {
   try {
     if (!req.files || req.files.length === 0) {
       return res.status(400).json({ error: "No PDF files uploaded" });
@@ -205,7 +224,7 @@ router.post("/analyze-multiple", upload.array("pdfs", 10), async (req, res) => {
     console.log("🔍 Starting multi-PDF AI analysis for", req.files.length, "files");
 
     const pdfPaths = req.files.map(file => file.path);
-    const analysisResult = await runMultiPDFAnalysis(pdfPaths);
+    const analysisResult = await runMultiPDFAnalysis(pdfPaths, req.extractionArgs);
 
     if (!analysisResult.success) {
       return res.status(500).json({
@@ -232,7 +251,7 @@ router.post("/analyze-multiple", upload.array("pdfs", 10), async (req, res) => {
 });
 
 // ✅ Analyze existing tender with AI
-router.post("/analyze-tender/:tenderId", async (req, res) => {
+router.post("/analyze-tender/:tenderId", admitExtraction, async (req, res) => {
   try {
     const { tenderId } = req.params;
     
@@ -259,7 +278,7 @@ router.post("/analyze-tender/:tenderId", async (req, res) => {
       
       if (fs.existsSync(documentPath)) {
         try {
-          const analysisResult = await runAIAnalysis(documentPath);
+          const analysisResult = await runAIAnalysis(documentPath, req.extractionArgs);
           analysisResults.push({
             document: document,
             analysis: analysisResult
@@ -297,7 +316,7 @@ router.post("/analyze-tender/:tenderId", async (req, res) => {
 });
 
 // ✅ Compare bids for a tender with AI
-router.post("/compare-bids/:tenderId", async (req, res) => {
+router.post("/compare-bids/:tenderId", admitExtraction, async (req, res) => {
   try {
     const { tenderId } = req.params;
     
@@ -347,7 +366,7 @@ router.post("/compare-bids/:tenderId", async (req, res) => {
     }
 
     // Run AI analysis on all bid documents
-    const analysisResult = await runMultiPDFAnalysis(pdfPaths);
+    const analysisResult = await runMultiPDFAnalysis(pdfPaths, req.extractionArgs);
 
     if (!analysisResult.success) {
       return res.status(500).json({
@@ -376,6 +395,11 @@ router.post("/compare-bids/:tenderId", async (req, res) => {
   }
 });
 
+// ✅ Admission control metrics for the extraction routes (in flight, degraded, shed)
+router.get("/extraction-metrics", (req, res) => {
+  res.json({ ...extractionAdmissionStats(), singleFlight: singleFlightStats() });
+});
+
 // ✅ Get AI model information and status
 router.get("/model-info", (req, res) => {
   res.json({
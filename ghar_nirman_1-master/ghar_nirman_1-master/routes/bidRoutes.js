@@ -7,6 +7,7 @@ import { execFile } from "child_process";
 import Bid from "../models/Bid.js";
 import Tender from "../models/Tender.js";
 import Notification from "../models/Notification.js";
+import { admitExtraction, AI_EXTRACTION_TIMEOUT_MS } from "../middleware/extractionAdmission.js";
 import { sendNotificationToSpecificHomeowner, sendNotificationToSpecificContractor, EVENTS } from "../config/pusher.js";
 
 
@@ -48,7 +49,7 @@ router.get("/test", (req, res) => {
 });
 
 // ✅ AI-powered PDF upload and bid extraction
-router.post("/upload", upload.single("pdf"), async (req, res) => {
+router.post("/upload", admitExtraction, upload.single("pdf"), async (req, res) => {
   try {
     if (!req.file) {
       return res.status(400).json({ error: "No PDF file uploaded" });
@@ -63,7 +64,8 @@ router.post("/upload", upload.single("pdf"), async (req, res) => {
     const scriptPath = path.join(__dirname, "..", "..", "..", "ghar_nirman_1-master", "ghar_nirman_1-master", "HamroAi", "run_tender_predictor.py");
     
     // Execute the Python script
-    execFile("python", [scriptPath, "analyze", req.file.path], {
+    execFile("python", [scriptPath, "analyze", req.file.path, ...req.extractionArgs], {
+      timeout: AI_EXTRACTION_TIMEOUT_MS,
       env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
     }, async (error, stdout, stderr) => {
       if (error) {
@@ -7,6 +7,7 @@ import Tender from "../models/Tender.js";
 import { sendNotificationToContractors, EVENTS } from '../config/pusher.js';
 import Contractor from '../models/Contractor.js';
 import Notification from '../models/Notification.js';
+import { admitExtraction, extractionArgs, AI_EXTRACTION_TIMEOUT_MS } from '../middleware/extractionAdmission.js';
 
 const router = express.Router();
 // ...existing code...
@@ -97,7 +98,7 @@ const upload = multer({
 // PDF TEXT EXTRACTION USING PYTHON (pdfplumber)
 // =============================================================================
 
-const extractTextFromPDF = (pdfPath) => {
+const extractTextFromPDF = (pdfPath, options = extractionArgs()) => {
   return new Promise((resolve, reject) => {
     // Try multiple possible paths for the Python script
     const possiblePaths = [
@@ -124,7 +125,7 @@ const extractTextFromPDF = (pdfPath) => {
     
     console.log("🔍 Using script path:", scriptPath);
     
-    const child = execFile("python", [scriptPath, "analyze", pdfPath], (error, stdout, stderr) => {
+    const child = execFile("python", [scriptPath, "analyze", pdfPath, ...options], { timeout: AI_EXTRACTION_TIMEOUT_MS }, (error, stdout, stderr) => {
       if (error) {
         console.error("❌ Error running Python script:", error);
         reject(new Error("Failed to extract text using Python"));
@@ -402,7 +403,7 @@ router.put("/:id", async (req, res) => {
 });
 
 // ✅ Upload PDF and auto-extract data with AI
-router.post("/upload", upload.single("pdf"), async (req, res) => {
+router.post("/upload", admitExtraction, upload.single("pdf"), async (req, res) => {
   try {
     if (!req.file) {
       return res.status(400).json({ error: "No PDF file uploaded" });
@@ -417,7 +418,7 @@ router.post("/upload", upload.single("pdf"), async (req, res) => {
     const { execFile } = await import("child_process");
     
     const aiAnalysisResult = await new Promise((resolve, reject) => {
-      const child = execFile("python", [scriptPath, "analyze", req.file.path], (error, stdout, stderr) => {
+      const child = execFile("python", [scriptPath, "analyze", req.file.path, ...req.extractionArgs], { timeout: AI_EXTRACTION_TIMEOUT_MS }, (error, stdout, stderr) => {
         if (error) {
           console.error("❌ Error running AI analysis:", error);
           console.error("❌ Command that failed:", `python ${scriptPath} analyze ${req.file.path}`);
@@ -482,13 +483,13 @@ router.post("/upload", upload.single("pdf"), async (req, res) => {
       } else {
         console.log("⚠️ AI analysis failed, falling back to basic extraction for:", req.file.filename);
         // Fallback to basic extraction
-        const extractedText = await extractTextFromPDF(req.file.path);
+        const extractedText = await extractTextFromPDF(req.file.path, req.extractionArgs);
         extractedData = extractTenderDataFromText(extractedText);
       }
     } catch (aiError) {
       console.error("❌ AI analysis error, falling back to basic extraction:", aiError);
       // Fallback to basic extraction
-      const extractedText = await extractTextFromPDF(req.file.path);
+      const extractedText = await extractTextFromPDF(req.file.path, req.extractionArgs);
       extractedData = extractTenderDataFromText(extractedText);
     }
 
@@ -731,7 +732,7 @@ router.delete("/:id", async (req, res) => {
 });
 
 // ✅ Bulk upload multiple PDFs
-router.post("/upload/bulk", upload.array("pdfs", 10), async (req, res) => {
+router.post("/upload/bulk", admitExtraction, upload.array("pdfs", 10), async (req, res) => {
   try {
     if (!req.files?.length) {
       return res.status(400).json({ error: "No PDF files uploaded" });
@@ -743,7 +744,7 @@ router.post("/upload/bulk", upload.array("pdfs", 10), async (req, res) => {
     await Promise.all(
       req.files.map(async (file) => {
         try {
-          const extractedText = await extractTextFromPDF(file.path);
+          const extractedText = await extractTextFromPDF(file.path, req.extractionArgs);
           const extractedData = extractTenderDataFromText(extractedText);
 
           const newTender = new Tender({
@@ -0,0 +1,40 @@
+import crypto from "crypto";
+import fs from "fs";
+
+// Single-flight for Python extraction runs: while a run for some key is in progress, callers
+// with the same key wait for it instead of starting their own. Nothing is kept once it
+// settles, so a later call runs afresh.
+
+const inFlight = new Map();
+const counters = { started: 0, coalesced: 0, failed: 0 };
+
+// sha256 of a file's content, so the same document uploaded twice maps to the same key
+export const hashFile = (filePath) => new Promise((resolve, reject) => {
+  const hash = crypto.createHash("sha256");
+  fs.createReadStream(filePath)
+    .on("error", reject)
+    .on("data", (chunk) => hash.update(chunk))
+    .on("end", () => resolve(hash.digest("hex")));
+});
+
+// Result of fn() shared by every concurrent caller with the same key; joined callers get their own copy
+export const singleFlight = (key, fn) => {
+  const running = inFlight.get(key);
+  if (running) {
+    counters.coalesced += 1;
+    return running.then((result) => structuredClone(result));
+  }
+
+  counters.started += 1;
+  const promise = Promise.resolve()
+    .then(fn)
+    .catch((error) => {
+      counters.failed += 1;
+      throw error;
+    })
+    .finally(() => inFlight.delete(key));
+  inFlight.set(key, promise);
+  return promise;
+};
+
+export const singleFlightStats = () => ({ inFlight: inFlight.size, ...counters });